@@ -1,7 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from .models import User, Band, BandMember, Reservation, Guest, Invitation
+from .models import (
+    User, Band, BandMember, Reservation, Guest, Invitation, AuthToken, Notification, WaitlistEntry,
+    AllocationRound, SlotPreference,
+)
+from .tokens import revoke_token
 
 
 # Inline para gestionar BandMember dentro de BandAdmin
@@ -74,3 +79,55 @@ class InvitationAdmin(admin.ModelAdmin):
     list_display = ('reservation', 'invited_user', 'invited_name', 'invited_email', 'invited_at')
     search_fields = ('reservation__band__name', 'invited_user__username', 'invited_name', 'invited_email')
     list_filter = ('reservation', 'invited_user', 'invited_at')
+
+
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ('jti', 'user', 'created_at', 'expires_at', 'revoked_at')
+    search_fields = ('jti', 'user__username')
+    list_filter = ('revoked_at',)
+    readonly_fields = ('jti', 'user', 'created_at', 'expires_at', 'revoked_at')
+    actions = ['revoke']
+
+    @admin.action(description="Revocar los tokens seleccionados")
+    def revoke(self, request, queryset):
+        for jti in queryset.filter(revoked_at__isnull=True).values_list('jti', flat=True):
+            revoke_token(jti)
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('recipient', 'dedup_key')
+    readonly_fields = ('dedup_key', 'created_at', 'sent_at', 'last_error')
+    actions = ['retry']
+
+    @admin.action(description="Reintentar los avisos seleccionados")
+    def retry(self, request, queryset):
+        queryset.exclude(status=Notification.Status.SENT).update(
+            status=Notification.Status.PENDING, attempts=0, next_attempt_at=timezone.now(),
+        )
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('band', 'room', 'start_time', 'end_time', 'priority', 'status', 'created_at')
+    list_filter = ('status', 'room')
+    search_fields = ('band__name',)
+    list_editable = ('priority',)
+    readonly_fields = ('reservation', 'last_error', 'created_at', 'resolved_at')
+
+
+class SlotPreferenceInline(admin.TabularInline):
+    model = SlotPreference
+    extra = 0
+    readonly_fields = ('reservation', 'reason', 'created_at')
+
+
+@admin.register(AllocationRound)
+class AllocationRoundAdmin(admin.ModelAdmin):
+    list_display = ('week', 'hours_start', 'hours_end', 'opens_at', 'closes_at', 'status', 'allocated_at')
+    list_filter = ('status',)
+    readonly_fields = ('seed', 'allocated_at')
+    inlines = [SlotPreferenceInline]
@@ -0,0 +1,285 @@
+# application/allocation.py
+
+import random
+from bisect import insort
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from collection.occupancy import mark_occupied
+from composer.cache import get_global_settings
+from .booking import overlaps, reservations_changed, validate_schedule
+from .events import publish_reservation_events, reservation_event
+from .guests import capacity_exceeded_message, guest_limit
+from .models import AllocationRound, BandWeekUsage, Reservation, SlotPreference
+from .notifications import notify_reservation_changes
+from .quota import week_of
+from .stats import apply_reservation_delta, is_upcoming
+
+NOT_ASSIGNED = "El horario fue asignado a otra banda."
+QUOTA_REACHED = "La banda alcanzó el máximo de reservas de la semana."
+
+
+def _local(day, value):
+    return timezone.make_aware(datetime.combine(day, value))
+
+
+def week_bounds(week):
+    # Semana local completa [lunes 00:00, lunes siguiente 00:00)
+    return _local(week, time.min), _local(week + timedelta(days=7), time.min)
+
+
+def in_window(allocation_round, start_time, end_time):
+    """
+    Indica si el intervalo toca la franja de la ronda en algún día de su semana.
+    """
+    day = timezone.localtime(start_time).date()
+    last_day = timezone.localtime(end_time).date()
+    while day <= last_day:
+        if allocation_round.week <= day < allocation_round.week + timedelta(days=7):
+            window_start = _local(day, allocation_round.hours_start)
+            window_end = _local(day, allocation_round.hours_end)
+            if start_time < window_end and window_start < end_time:
+                return True
+        day += timedelta(days=1)
+    return False
+
+
+def open_rounds(weeks):
+    """
+    Rondas aún sin asignar de las semanas indicadas: {lunes: ronda}.
+    """
+    return {
+        allocation_round.week: allocation_round
+        for allocation_round in AllocationRound.objects.filter(week__in=set(weeks),
+                                                               status=AllocationRound.Status.OPEN)
+    }
+
+
+def window_error(start_time, end_time, rounds=None):
+    """
+    Mensaje de error si el intervalo cae en una franja que se asigna por lotes, o None.
+    `rounds` permite pasar las rondas ya cargadas con open_rounds().
+    """
+    weeks = {week_of(start_time), week_of(end_time)}
+    if rounds is None:
+        rounds = open_rounds(weeks)
+    for week in sorted(weeks):
+        allocation_round = rounds.get(week)
+        if allocation_round and in_window(allocation_round, start_time, end_time):
+            return ("Ese horario se asigna por lotes: registra tus preferencias antes del "
+                    f"{timezone.localtime(allocation_round.closes_at):%d/%m/%Y %H:%M}.")
+    return None
+
+
+def draft_order(band_ids, past_usage, rng):
+    """
+    Orden de elección: primero las bandas que menos usaron las salas en las semanas
+    anteriores; los empates se resuelven por sorteo.
+    """
+    lottery = {band_id: rng.random() for band_id in sorted(band_ids)}
+    return sorted(band_ids, key=lambda band_id: (past_usage.get(band_id, 0), lottery[band_id]))
+
+
+def solve(requests, taken, band_taken, quota, order):
+    """
+    Reparto por turnos ("snake draft"): en cada vuelta, cada banda con cupo recibe su
+    preferencia mejor clasificada que siga libre, y el orden se invierte en la vuelta
+    siguiente para que nadie elija siempre primero.
+
+    `requests` es {banda: [(sala, inicio, fin), ...]} en orden de preferencia; `taken`
+    ({sala: [...]}) y `band_taken` ({banda: [...]}) son listas ordenadas de intervalos
+    ocupados y se modifican; `quota` es {banda: reservas disponibles} y también se descuenta.
+
+    Cada preferencia se revisa una sola vez (un horario ocupado no vuelve a quedar libre),
+    así que el costo es O(P log S). Devuelve {banda: [índice de la preferencia asignada, ...]}.
+    """
+    assigned = defaultdict(list)
+    position = dict.fromkeys(order, 0)
+    active = [band_id for band_id in order if quota.get(band_id, 0) > 0 and requests.get(band_id)]
+    while active:
+        still_active = []
+        for band_id in active:
+            preferences = requests[band_id]
+            index = position[band_id]
+            while index < len(preferences):
+                room_id, start_time, end_time = preferences[index]
+                index += 1
+                if overlaps(taken[room_id], start_time, end_time) or \
+                        overlaps(band_taken[band_id], start_time, end_time):
+                    continue
+                insort(taken[room_id], (start_time, end_time))
+                insort(band_taken[band_id], (start_time, end_time))
+                assigned[band_id].append(index - 1)
+                quota[band_id] -= 1
+                break
+            position[band_id] = index
+            if quota[band_id] > 0 and index < len(preferences):
+                still_active.append(band_id)
+        still_active.reverse()
+        active = still_active
+    return assigned
+
+
+def past_usage(band_ids, week):
+    """
+    Reservas de cada banda en las ALLOCATION_FAIRNESS_WEEKS semanas anteriores, según el libro de cuota.
+    """
+    first_week = week - timedelta(weeks=settings.ALLOCATION_FAIRNESS_WEEKS)
+    return dict(
+        BandWeekUsage.objects.filter(band_id__in=band_ids, week__gte=first_week, week__lt=week)
+        .values('band_id').annotate(total=Sum('used')).values_list('band_id', 'total').order_by()
+    )
+
+
+def busy_intervals(room_ids, band_ids, week):
+    """
+    Intervalos ya reservados en la semana, por sala y por banda, en una sola consulta.
+    """
+    taken = defaultdict(list)
+    band_taken = defaultdict(list)
+    rows = Reservation.objects.filter(
+        Q(room_id__in=room_ids) | Q(band_id__in=band_ids),
+        period__overlap=DateTimeTZRange(*week_bounds(week), '[)'),
+    ).values_list('room_id', 'band_id', 'start_time', 'end_time')
+    for room_id, band_id, start_time, end_time in rows:
+        taken[room_id].append((start_time, end_time))
+        band_taken[band_id].append((start_time, end_time))
+    for intervals in [*taken.values(), *band_taken.values()]:
+        intervals.sort()
+    return taken, band_taken
+
+
+def _lock_week_usage(band_ids, week):
+    # Igual que quota.lock_usage, pero para todas las bandas de la ronda con dos consultas
+    BandWeekUsage.objects.bulk_create(
+        [BandWeekUsage(band_id=band_id, week=week) for band_id in band_ids],
+        ignore_conflicts=True,
+    )
+    return {
+        usage.band_id: usage
+        for usage in BandWeekUsage.objects.select_for_update().filter(band_id__in=band_ids, week=week)
+    }
+
+
+def run_allocation(allocation_round, seed=None, dry_run=False):
+    """
+    Asigna la ronda: valida las preferencias con las reglas de horario y de capacidad,
+    reparte con solve() respetando max_reservations_per_band_week y crea todas las
+    reservas con bulk_create en una sola transacción. Con `dry_run` sólo calcula el resultado.
+
+    Devuelve un resumen con el número de preferencias, bandas y reservas asignadas.
+    """
+    global_settings = get_global_settings()
+    if not global_settings:
+        raise ValueError("Configuraciones globales no definidas.")
+
+    with transaction.atomic():
+        allocation_round = AllocationRound.objects.select_for_update().get(pk=allocation_round.pk)
+        if allocation_round.status != AllocationRound.Status.OPEN:
+            raise ValueError("La ronda ya fue asignada.")
+        if seed is None:
+            seed = allocation_round.seed if allocation_round.seed is not None else random.SystemRandom().getrandbits(62)
+        week = allocation_round.week
+
+        now = timezone.now()
+        preferences = list(
+            allocation_round.preferences.select_related('room').order_by('band_id', 'rank', 'id')
+        )
+        requests = defaultdict(list)
+        candidates = defaultdict(list)
+        for preference in preferences:
+            limit = guest_limit(preference.room, global_settings)
+            if preference.start_time <= now:
+                preference.reason = "El horario ya comenzó."
+            elif preference.attendees > limit:
+                preference.reason = capacity_exceeded_message(limit)
+            else:
+                preference.reason = validate_schedule(global_settings, preference.start_time,
+                                                      preference.end_time) or ''
+            if not preference.reason:
+                requests[preference.band_id].append(
+                    (preference.room_id, preference.start_time, preference.end_time)
+                )
+                candidates[preference.band_id].append(preference)
+
+        band_ids = sorted(requests)
+        usage = _lock_week_usage(band_ids, week)
+        quota = {
+            band_id: max(global_settings.max_reservations_per_band_week - usage[band_id].used, 0)
+            for band_id in band_ids
+        }
+        taken, band_taken = busy_intervals({room_id for items in requests.values() for room_id, _, _ in items},
+                                           band_ids, week)
+        order = draft_order(band_ids, past_usage(band_ids, week), random.Random(seed))
+        assigned = solve(requests, taken, band_taken, quota, order)
+
+        reservations = []
+        for band_id, items in candidates.items():
+            chosen = set(assigned.get(band_id, ()))
+            for index, preference in enumerate(items):
+                if index in chosen:
+                    preference.reservation = Reservation(
+                        band_id=band_id,
+                        room_id=preference.room_id,
+                        start_time=preference.start_time,
+                        end_time=preference.end_time,
+                        # bulk_create no llama a save(): el rango se asigna aquí
+                        period=Reservation.build_period(preference.start_time, preference.end_time),
+                    )
+                    reservations.append(preference.reservation)
+                else:
+                    preference.reason = QUOTA_REACHED if quota[band_id] == 0 else NOT_ASSIGNED
+
+        summary = {
+            'seed': seed,
+            'preferences': len(preferences),
+            'bands': len({preference.band_id for preference in preferences}),
+            'assigned': len(reservations),
+            'bands_served': len(assigned),
+            'first_choice': sum(1 for band_id in assigned if candidates[band_id][0].rank == 1 and 0 in assigned[band_id]),
+        }
+        if dry_run:
+            transaction.set_rollback(True)
+            return summary
+
+        Reservation.objects.bulk_create(reservations)
+        for band_id, indexes in assigned.items():
+            usage[band_id].used += len(indexes)
+        BandWeekUsage.objects.bulk_update(usage.values(), ['used'])
+        SlotPreference.objects.bulk_update(preferences, ['reservation', 'reason'])
+
+        # bulk_create no emite post_save: bitmap, contadores, caches, eventos y avisos a mano
+        by_room = defaultdict(list)
+        by_band = defaultdict(list)
+        for reservation in reservations:
+            by_room[reservation.room_id].append((reservation.start_time, reservation.end_time))
+            by_band[reservation.band_id].append(reservation)
+        for room_id, intervals in by_room.items():
+            mark_occupied(room_id, intervals)
+        for band_id, items in by_band.items():
+            apply_reservation_delta(band_id, len(items), sum(1 for item in items if is_upcoming(item.start_time, now)))
+        reservations_changed(
+            (reservation.room_id, reservation.band_id, reservation.start_time, reservation.end_time)
+            for reservation in reservations
+        )
+        publish_reservation_events(
+            reservation_event('created', reservation.pk, reservation.room_id, reservation.band_id,
+                              reservation.start_time, reservation.end_time)
+            for reservation in reservations
+        )
+        notify_reservation_changes('created', [
+            (reservation.pk, reservation.band_id, reservation.start_time, reservation.end_time)
+            for reservation in reservations
+        ])
+
+        allocation_round.status = AllocationRound.Status.ALLOCATED
+        allocation_round.seed = seed
+        allocation_round.allocated_at = now
+        allocation_round.save(update_fields=['status', 'seed', 'allocated_at'])
+    return summary
@@ -0,0 +1,133 @@
+# application/archive.py
+
+from datetime import date, datetime, time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    ArchivedGuest, ArchivedInvitation, ArchivedReservation, Guest, Invitation, Reservation, SlotPreference,
+    WaitlistEntry,
+)
+
+
+def semester_start(value):
+    """
+    Inicio (hora local) del semestre que contiene `value`: 1 de enero o 1 de julio.
+    """
+    local = timezone.localtime(value) if isinstance(value, datetime) else value
+    month = 1 if local.month <= 6 else 7
+    return timezone.make_aware(datetime.combine(date(local.year, month, 1), time.min))
+
+
+def next_semester(start):
+    if start.month == 1:
+        return start.replace(month=7)
+    return start.replace(year=start.year + 1, month=1)
+
+
+def previous_semester(start):
+    if start.month == 7:
+        return start.replace(month=1)
+    return start.replace(year=start.year - 1, month=7)
+
+
+def partition_name(start):
+    return f"{ArchivedReservation._meta.db_table}_{start.year}s{1 if start.month == 1 else 2}"
+
+
+def ensure_partition(start):
+    """
+    Crea (si no existe) la partición del archivo para el semestre que empieza en `start`.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {quote(partition_name(start))} "
+            f"PARTITION OF {quote(ArchivedReservation._meta.db_table)} FOR VALUES FROM (%s) TO (%s)",
+            [start, next_semester(start)],
+        )
+
+
+def archive_cutoff(hot_semesters, now=None):
+    """
+    Inicio del semestre más antiguo que se conserva en la tabla de reservas
+    (`hot_semesters` incluye el semestre en curso).
+    """
+    cutoff = semester_start(now or timezone.now())
+    for _ in range(max(hot_semesters, 1) - 1):
+        cutoff = previous_semester(cutoff)
+    return cutoff
+
+
+def _copy(cursor, source, target, columns, extra_columns, extra_values, key, ids):
+    quote = connection.ops.quote_name
+    target_columns = ', '.join(quote(column) for column in columns + extra_columns)
+    source_columns = ', '.join([quote(column) for column in columns] + ['%s'] * len(extra_values))
+    cursor.execute(
+        f"INSERT INTO {quote(target)} ({target_columns}) "
+        f"SELECT {source_columns} FROM {quote(source)} WHERE {quote(key)} = ANY(%s)",
+        [*extra_values, ids],
+    )
+
+
+def _delete(cursor, table, key, ids):
+    quote = connection.ops.quote_name
+    cursor.execute(f"DELETE FROM {quote(table)} WHERE {quote(key)} = ANY(%s)", [ids])
+    return cursor.rowcount
+
+
+def _unlink(cursor, table, column, ids):
+    # SET_NULL sólo lo aplica el ORM: el DELETE directo debe soltar antes las referencias
+    quote = connection.ops.quote_name
+    cursor.execute(
+        f"UPDATE {quote(table)} SET {quote(column)} = NULL WHERE {quote(column)} = ANY(%s)",
+        [ids],
+    )
+
+
+def _column_names(model):
+    # Columnas del modelo de archivo: todas existen con el mismo nombre en la tabla de origen
+    return [field.column for field in model._meta.concrete_fields]
+
+
+def archive_chunk(before, chunk_size):
+    """
+    Mueve al archivo hasta `chunk_size` reservas terminadas antes de `before`, con sus
+    invitados e invitaciones, en una sola transacción. Devuelve el número de reservas movidas.
+
+    Se usa SQL directo a propósito: las reservas pasadas no deben tocar las estadísticas,
+    la cuota semanal ni los eventos, así que no se emiten señales.
+    """
+    with transaction.atomic():
+        rows = list(
+            Reservation.objects.filter(end_time__lt=before)
+            .order_by('id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', 'start_time')[:chunk_size]
+        )
+        if not rows:
+            return 0
+        ids = [pk for pk, _ in rows]
+
+        semester = semester_start(min(start for _, start in rows))
+        last = semester_start(max(start for _, start in rows))
+        while semester <= last:
+            ensure_partition(semester)
+            semester = next_semester(semester)
+
+        now = timezone.now()
+        reservation_columns = ['id', 'band_id', 'room_id', 'start_time', 'end_time', 'created_at']
+        with connection.cursor() as cursor:
+            _copy(cursor, Reservation._meta.db_table, ArchivedReservation._meta.db_table,
+                  reservation_columns, ['archived_at'], [now], 'id', ids)
+            _copy(cursor, Guest._meta.db_table, ArchivedGuest._meta.db_table,
+                  _column_names(ArchivedGuest), [], [], 'reservation_id', ids)
+            _copy(cursor, Invitation._meta.db_table, ArchivedInvitation._meta.db_table,
+                  _column_names(ArchivedInvitation), [], [], 'reservation_id', ids)
+
+            _unlink(cursor, WaitlistEntry._meta.db_table, 'reservation_id', ids)
+            _unlink(cursor, SlotPreference._meta.db_table, 'reservation_id', ids)
+            _delete(cursor, Guest._meta.db_table, 'reservation_id', ids)
+            _delete(cursor, Invitation._meta.db_table, 'reservation_id', ids)
+            return _delete(cursor, Reservation._meta.db_table, 'id', ids)
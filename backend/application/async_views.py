@@ -0,0 +1,120 @@
+# application/async_views.py
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+
+from .events import get_broker
+
+from .models import UserStats
+from .serializers import CurrentUserSerializer, DashboardStatsSerializer, current_band_queryset
+from .tokens import resolve_token
+
+NOT_AUTHENTICATED = {'detail': "Las credenciales de autenticación no se proveyeron."}
+
+
+async def authenticated_user(request):
+    authorization = request.headers.get('Authorization', '')
+    if authorization[:7].lower() == 'bearer ':
+        resolved = await sync_to_async(resolve_token)(authorization[7:].strip())
+        return resolved[0] if resolved else None
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+async def user_stats_data(user):
+    stats = await UserStats.objects.filter(user=user).values(
+        'band_count', 'total_reservations', 'upcoming_reservations'
+    ).afirst() or {'band_count': 0, 'total_reservations': 0, 'upcoming_reservations': 0}
+    return DashboardStatsSerializer({
+        'totalReservations': stats['total_reservations'],
+        'upcomingReservations': stats['upcoming_reservations'],
+        'bandCount': stats['band_count'],
+    }).data
+
+
+async def dashboard_stats(request):
+    """
+    Versión asíncrona de DashboardStatsView para servir bajo ASGI.
+    """
+    user = await authenticated_user(request)
+    if user is None:
+        return JsonResponse(NOT_AUTHENTICATED, status=403)
+    return JsonResponse(await user_stats_data(user))
+
+
+async def current_user(request):
+    """
+    Versión asíncrona de CurrentUserView: la banda y sus miembros se cargan con el
+    ORM asíncrono y el serializer trabaja sólo sobre datos ya precargados.
+    """
+    user = await authenticated_user(request)
+    if user is None:
+        return JsonResponse(NOT_AUTHENTICATED, status=403)
+
+    band = await current_band_queryset(user).afirst()
+    return JsonResponse(CurrentUserSerializer(user, context={'current_band': band}).data)
+
+
+async def dashboard(request):
+    """
+    Usuario actual y estadísticas en una sola respuesta. Las consultas del ORM asíncrono
+    pasan por el mismo hilo de sync_to_async, así que se ejecutan una tras otra.
+    """
+    user = await authenticated_user(request)
+    if user is None:
+        return JsonResponse(NOT_AUTHENTICATED, status=403)
+
+    band = await current_band_queryset(user).afirst()
+    stats = await user_stats_data(user)
+    return JsonResponse({
+        'currentUser': CurrentUserSerializer(user, context={'current_band': band}).data,
+        'stats': stats,
+    })
+
+
+def _id_filter(value):
+    if not value:
+        return None
+    try:
+        return {int(item) for item in value.split(',')}
+    except ValueError:
+        return None
+
+
+async def reservation_events(request):
+    """
+    Server-Sent Events con las reservas creadas, modificadas o eliminadas.
+    Se puede filtrar con `room=1,2` y/o `band=3`. Requiere un servidor ASGI.
+    """
+    user = await authenticated_user(request)
+    if user is None:
+        return JsonResponse(NOT_AUTHENTICATED, status=403)
+
+    rooms = _id_filter(request.GET.get('room'))
+    bands = _id_filter(request.GET.get('band'))
+    subscription = get_broker().subscribe()
+
+    async def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                event = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                if event is None:
+                    # Comentario SSE para mantener viva la conexión a través de proxies
+                    yield ': keepalive\n\n'
+                    continue
+                if rooms is not None and event['room'] not in rooms:
+                    continue
+                if bands is not None and event['band'] not in bands:
+                    continue
+                yield f"event: reservation.{event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,53 @@
+# application/authentication.py
+
+from rest_framework.authentication import BaseAuthentication, SessionAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .ical import resolve_feed_token
+from .tokens import resolve_token
+
+
+class BearerTokenAuthentication(BaseAuthentication):
+    """
+    `Authorization: Bearer <token>` con los tokens emitidos por UserLoginView.
+    No lee la tabla de sesiones y, con el cache caliente, tampoco la de usuarios.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        header = get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise AuthenticationFailed("Encabezado Authorization inválido.")
+
+        resolved = resolve_token(header[1].decode('latin-1'))
+        if resolved is None:
+            raise AuthenticationFailed("Token inválido, expirado o revocado.")
+        user, jti, band_ids = resolved
+        if band_ids is not None:
+            # Lo usa membership.user_band_ids, que busca el atributo en el HttpRequest
+            request._request._band_ids = band_ids
+        return user, jti
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+class CalendarFeedAuthentication(BaseAuthentication):
+    """
+    `?token=<token>` en las URL de los calendarios .ics, con los tokens de ical.feed_token.
+    """
+
+    def authenticate(self, request):
+        raw = request.query_params.get('token')
+        if not raw:
+            return None
+        user = resolve_feed_token(raw)
+        if user is None:
+            raise AuthenticationFailed("Enlace de calendario inválido o revocado.")
+        return user, None
+
+
+# Los .ics aceptan el token del enlace además de las credenciales de la API
+CALENDAR_AUTHENTICATION = [CalendarFeedAuthentication, BearerTokenAuthentication, SessionAuthentication]
@@ -0,0 +1,160 @@
+# application/booking.py
+
+from bisect import bisect_left, insort
+
+from django.db import transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
+
+from backend.versioning import bump_versions
+from collection.availability import invalidate_room_days
+from collection.occupancy import mark_occupied
+from .events import publish_reservation_events, reservation_event
+from .notifications import notify_reservation_changes
+from .models import BandWeekUsage, Reservation
+from .quota import lock_usage, week_of
+from .stats import apply_reservation_delta, is_upcoming
+
+
+def reservations_changed(changes):
+    """
+    Después del commit, invalida la disponibilidad cacheada y los sellos de los
+    calendarios afectados. `changes` son tuplas (room_id, band_id, start_time, end_time).
+    """
+    changes = list(changes)
+
+    def invalidate():
+        names = set()
+        for room_id, band_id, start_time, end_time in changes:
+            invalidate_room_days(room_id, start_time, end_time)
+            names.update((f'calendar:room:{room_id}', f'calendar:band:{band_id}'))
+        bump_versions(*names)
+
+    # Invalidar después del commit para que nadie vuelva a cachear datos sin confirmar
+    transaction.on_commit(invalidate)
+
+
+def validate_schedule(global_settings, start_time, end_time):
+    """
+    Reglas de horario y duración. Devuelve el mensaje de error o None.
+    """
+    if end_time <= start_time:
+        return "La hora de término debe ser posterior a la hora de inicio."
+
+    opening = global_settings.available_hours_start
+    closing = global_settings.available_hours_end
+    if not (opening <= timezone.localtime(start_time).time() <= closing and
+            opening <= timezone.localtime(end_time).time() <= closing):
+        return "Las reservas deben estar dentro de los horarios disponibles."
+
+    if end_time - start_time > global_settings.max_reservation_duration:
+        return f"La duración máxima de la reserva es {global_settings.max_reservation_duration}."
+    return None
+
+
+def quota_exceeded_message(global_settings):
+    return (f"Has alcanzado el número máximo de reservas "
+            f"({global_settings.max_reservations_per_band_week}) para esta semana.")
+
+
+def room_busy_intervals(room, start_time, end_time):
+    """
+    Intervalos ocupados de la sala entre start_time y end_time, ordenados por inicio.
+    """
+    return list(
+        Reservation.objects.filter(
+            room=room,
+            period__overlap=DateTimeTZRange(start_time, end_time, '[)'),
+        ).order_by('start_time').values_list('start_time', 'end_time')
+    )
+
+
+def overlaps(taken, start_time, end_time):
+    """
+    `taken` es una lista ordenada de intervalos que no se solapan entre sí.
+    """
+    position = bisect_left(taken, (start_time, end_time))
+    if position > 0 and taken[position - 1][1] > start_time:
+        return True
+    if position < len(taken) and taken[position][0] < end_time:
+        return True
+    return False
+
+
+def book_many(band, room, candidates, global_settings):
+    """
+    Valida todos los intervalos candidatos con unas pocas consultas y crea los
+    aceptados con bulk_create en una sola transacción.
+
+    Devuelve (aceptados, rechazados): los aceptados como pares (índice, Reservation)
+    y los rechazados como diccionarios con el índice, el intervalo y el motivo.
+    """
+    from .allocation import open_rounds, window_error
+
+    candidates = list(candidates)
+    rounds = open_rounds(week_of(value) for interval in candidates for value in interval)
+    rejected = []
+    valid = []
+    for index, (start_time, end_time) in enumerate(candidates):
+        error = validate_schedule(global_settings, start_time, end_time) or window_error(start_time, end_time, rounds)
+        if error:
+            rejected.append({'index': index, 'start_time': start_time, 'end_time': end_time, 'reason': error})
+        else:
+            valid.append((start_time, end_time, index))
+    valid.sort()
+
+    accepted = []
+    with transaction.atomic():
+        if valid:
+            # Bloquear las filas del libro de cuota de la banda para las semanas involucradas
+            usage = lock_usage(band.pk, {week_of(start_time) for start_time, _, _ in valid})
+            taken = room_busy_intervals(room, valid[0][0], max(end_time for _, end_time, _ in valid))
+
+        for start_time, end_time, index in valid:
+            week = usage[week_of(start_time)]
+            if week.used >= global_settings.max_reservations_per_band_week:
+                reason = quota_exceeded_message(global_settings)
+            elif overlaps(taken, start_time, end_time):
+                reason = "La sala ya está reservada en el horario seleccionado."
+            else:
+                insort(taken, (start_time, end_time))
+                week.used += 1
+                accepted.append((index, Reservation(
+                    band=band,
+                    room=room,
+                    start_time=start_time,
+                    end_time=end_time,
+                    # bulk_create no llama a save(): el rango se asigna aquí
+                    period=Reservation.build_period(start_time, end_time),
+                )))
+                continue
+            rejected.append({'index': index, 'start_time': start_time, 'end_time': end_time, 'reason': reason})
+
+        if accepted:
+            BandWeekUsage.objects.bulk_update(usage.values(), ['used'])
+            Reservation.objects.bulk_create([reservation for _, reservation in accepted])
+            # bulk_create tampoco emite post_save: actualizar bitmap, contadores y disponibilidad a mano
+            mark_occupied(room.pk, [(reservation.start_time, reservation.end_time) for _, reservation in accepted])
+            now = timezone.now()
+            apply_reservation_delta(
+                band.pk,
+                len(accepted),
+                sum(1 for _, reservation in accepted if is_upcoming(reservation.start_time, now)),
+            )
+            reservations_changed([
+                (room.pk, band.pk, reservation.start_time, reservation.end_time)
+                for _, reservation in accepted
+            ])
+            publish_reservation_events(
+                reservation_event('created', reservation.pk, room.pk, band.pk,
+                                  reservation.start_time, reservation.end_time)
+                for _, reservation in accepted
+            )
+            notify_reservation_changes('created', [
+                (reservation.pk, band.pk, reservation.start_time, reservation.end_time)
+                for _, reservation in accepted
+            ])
+
+    accepted.sort(key=lambda item: item[0])
+    rejected.sort(key=lambda item: item['index'])
+    return accepted, rejected
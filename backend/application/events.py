@@ -0,0 +1,175 @@
+# application/events.py
+
+import asyncio
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class InProcessSubscription:
+    def __init__(self, broker, maxsize):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        # Se ejecuta en el loop del suscriptor; si no da abasto, se descarta el evento más antiguo
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Pub/sub dentro del proceso: sólo reparte eventos a los clientes conectados al
+    mismo worker. Es el broker por defecto y el más rápido.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def publish(self, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # El loop del suscriptor ya se cerró
+                self.unsubscribe(subscription)
+
+    def subscribe(self):
+        subscription = InProcessSubscription(self, settings.EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+
+class CacheSubscription:
+    def __init__(self, broker, last_seq):
+        self.broker = broker
+        self.last_seq = last_seq
+        self.gap = None
+        self.pending = []
+
+    async def get(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not self.pending:
+            self.pending, self.last_seq, self.gap = await sync_to_async(self.broker.read_since)(
+                self.last_seq, self.gap
+            )
+            if self.pending:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(settings.EVENTS_POLL_INTERVAL, remaining))
+        return self.pending.pop(0)
+
+    def close(self):
+        pass
+
+
+class CacheBroker:
+    """
+    Sustituto de un broker externo sobre el cache de Django: los eventos se numeran
+    con un contador y los suscriptores los leen por sondeo. Con un cache compartido
+    reparte eventos entre todos los workers con una latencia de EVENTS_POLL_INTERVAL.
+    """
+    SEQ_KEY = 'events:seq'
+
+    def event_key(self, seq):
+        return f'events:{seq}'
+
+    def current_seq(self):
+        return cache.get(self.SEQ_KEY, 0)
+
+    def publish(self, event):
+        cache.add(self.SEQ_KEY, 0, None)
+        seq = cache.incr(self.SEQ_KEY)
+        # Entre el incr y el set un lector puede ver el número sin el evento: read_since lo espera
+        cache.set(self.event_key(seq), event, settings.EVENTS_RETENTION)
+
+    def read_since(self, last_seq, gap=None):
+        """
+        Eventos posteriores a `last_seq`: devuelve (eventos, último leído, hueco). La lectura
+        se detiene en el primer evento que falta, que puede estar publicándose todavía; si en
+        el sondeo siguiente sigue faltando (`gap`), se da por perdido (expiró) y se salta.
+        """
+        seq = self.current_seq()
+        if seq <= last_seq:
+            return [], last_seq, None
+        # Un cliente muy atrasado sólo recibe los últimos EVENTS_QUEUE_SIZE eventos
+        first = max(last_seq + 1, seq - settings.EVENTS_QUEUE_SIZE + 1)
+        found = cache.get_many([self.event_key(n) for n in range(first, seq + 1)])
+        events = []
+        for n in range(first, seq + 1):
+            key = self.event_key(n)
+            if key in found:
+                events.append(found[key])
+            elif n != gap:
+                return events, n - 1, n
+        return events, seq, None
+
+    def subscribe(self):
+        return CacheSubscription(self, self.current_seq())
+
+    def unsubscribe(self, subscription):
+        pass
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.EVENTS_BROKER)()
+    return _broker
+
+
+def reservation_event(kind, reservation_id, room_id, band_id, start_time, end_time):
+    return {
+        'type': kind,
+        'id': reservation_id,
+        'room': room_id,
+        'band': band_id,
+        'start_time': start_time.isoformat(),
+        'end_time': end_time.isoformat(),
+    }
+
+
+def publish_reservation_events(events):
+    """
+    Publica los eventos después del commit, para no anunciar cambios que se revierten.
+    """
+    events = list(events)
+
+    def publish():
+        broker = get_broker()
+        for event in events:
+            broker.publish(event)
+
+    transaction.on_commit(publish)
@@ -0,0 +1,28 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class ReservationConflict(APIException):
+    """
+    La sala ya tiene una reserva que se solapa con el horario solicitado.
+
+    Responde 409 (antes 400) tanto en la comprobación previa como cuando la detecta la
+    restricción de exclusión, con el mensaje en `detail`: así el cliente puede distinguir
+    el choque de horario de un error de validación y ofrecer la lista de espera.
+    """
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "La sala ya está reservada en el horario seleccionado."
+    default_code = 'reservation_conflict'
+
+
+# Código SQLSTATE de PostgreSQL para violaciones de restricciones de exclusión
+EXCLUSION_VIOLATION = '23P01'
+
+
+def is_exclusion_violation(error):
+    """
+    Indica si un IntegrityError proviene de la restricción de exclusión de reservas.
+    """
+    cause = getattr(error, '__cause__', None)
+    return getattr(cause, 'pgcode', None) == EXCLUSION_VIOLATION or \
+        getattr(cause, 'sqlstate', None) == EXCLUSION_VIOLATION
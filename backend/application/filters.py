@@ -0,0 +1,23 @@
+# application/filters.py
+
+import django_filters
+
+from .models import User
+from .rut import normalize_rut
+
+
+class UserFilter(django_filters.FilterSet):
+    """
+    ?ruf= acepta el RUT con o sin puntos, guion o 'k' minúscula y busca por la columna normalizada.
+    """
+    ruf = django_filters.CharFilter(method='filter_ruf')
+
+    class Meta:
+        model = User
+        fields = ['ruf']
+
+    def filter_ruf(self, queryset, name, value):
+        rut = normalize_rut(value)
+        if rut is None:
+            return queryset.none()
+        return queryset.filter(ruf_normalized=rut)
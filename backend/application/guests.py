@@ -0,0 +1,44 @@
+# application/guests.py
+
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .models import Reservation
+
+
+def guest_limit(room, global_settings):
+    """
+    Invitados permitidos en una reserva: la capacidad de la sala, acotada por
+    GlobalSettings.max_people_per_room.
+    """
+    limit = room.capacity
+    if global_settings:
+        limit = min(limit, global_settings.max_people_per_room)
+    return limit
+
+
+def capacity_exceeded_message(limit):
+    return f"La sala ha alcanzado su capacidad máxima de personas ({limit})."
+
+
+def reserve_guest_slots(reservation_id, limit, amount=1):
+    """
+    Suma `amount` invitados con un único UPDATE condicional (guest_count + amount <= limit).
+    Debe llamarse dentro de la transacción que crea los invitados. Devuelve False si no caben.
+    """
+    return Reservation.objects.filter(
+        pk=reservation_id, guest_count__lte=limit - amount,
+    ).update(guest_count=F('guest_count') + amount) == 1
+
+
+def add_guest_slots(reservation_id, amount=1):
+    """
+    Suma invitados sin comprobar el límite (invitados creados fuera de la API, p. ej. el admin).
+    """
+    Reservation.objects.filter(pk=reservation_id).update(guest_count=F('guest_count') + amount)
+
+
+def release_guest_slots(reservation_id, amount=1):
+    Reservation.objects.filter(pk=reservation_id).update(
+        guest_count=Greatest(F('guest_count') - Value(amount), Value(0))
+    )
@@ -0,0 +1,127 @@
+# application/ical.py
+
+import secrets
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Reservation, User
+
+PRODID = '-//UDP//Bandas UDP//ES'
+UID_DOMAIN = 'bandas-udp'
+FEED_SALT = 'application.ical'
+
+
+def rotate_feed_key(user):
+    """
+    Nuevo secreto para los enlaces de calendario del usuario: los anteriores dejan de funcionar.
+    """
+    user.calendar_feed_key = secrets.token_hex(16)
+    user.save(update_fields=['calendar_feed_key'])
+
+
+def feed_token(user):
+    """
+    Token firmado para el parámetro `token` de los .ics. Los clientes de calendario no
+    envían cookies ni encabezados Authorization, así que la URL lleva la credencial.
+    """
+    if not user.calendar_feed_key:
+        rotate_feed_key(user)
+    return signing.dumps({'uid': user.pk, 'key': user.calendar_feed_key}, salt=FEED_SALT)
+
+
+def resolve_feed_token(raw):
+    """
+    Usuario activo dueño del token, o None si la firma no es válida o el secreto cambió.
+    """
+    try:
+        payload = signing.loads(raw, salt=FEED_SALT)
+    except signing.BadSignature:
+        return None
+    if not payload.get('key'):
+        return None
+    return User.objects.filter(pk=payload.get('uid'), calendar_feed_key=payload['key'], is_active=True).first()
+
+
+def window_start():
+    """
+    Inicio (medianoche local) de las reservas pasadas que se incluyen. Avanza una vez al
+    día, así que forma parte del ETag junto con los sellos de versión.
+    """
+    day = timezone.localdate() - timedelta(days=settings.ICAL_HISTORY_DAYS)
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _escape(text):
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+
+def _format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _fold(line):
+    """
+    Líneas de contenido de a lo más 75 octetos (RFC 5545, sección 3.1).
+    """
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    chunks = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # No cortar en medio de un carácter multibyte
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        chunks.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74  # las líneas de continuación empiezan con un espacio
+    return '\r\n '.join(chunks) + '\r\n'
+
+
+def _event(stamp, reservation_id, start_time, end_time, band_name, room_name):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:reservation-{reservation_id}@{UID_DOMAIN}',
+        f'DTSTAMP:{stamp}',
+        f'DTSTART:{_format_datetime(start_time)}',
+        f'DTEND:{_format_datetime(end_time)}',
+        f'SUMMARY:{_escape(f"{band_name} - {room_name}")}',
+        f'LOCATION:{_escape(room_name)}',
+        'END:VEVENT',
+    ]
+    return ''.join(_fold(line) for line in lines)
+
+
+def calendar_lines(queryset, name):
+    """
+    Genera el calendario por partes, recorriendo las reservas con un iterador por bloques.
+    """
+    yield _fold('BEGIN:VCALENDAR')
+    yield _fold('VERSION:2.0')
+    yield _fold(f'PRODID:{PRODID}')
+    yield _fold('CALSCALE:GREGORIAN')
+    yield _fold(f'X-WR-CALNAME:{_escape(name)}')
+    rows = queryset.order_by('start_time', 'id').values_list(
+        'id', 'start_time', 'end_time', 'band__name', 'room__name'
+    )
+    # Sin METHOD, DTSTAMP es la última revisión: las reservas no guardan la suya, se usa la hora de generación
+    stamp = _format_datetime(timezone.now())
+    for row in rows.iterator(chunk_size=settings.ICAL_CHUNK_SIZE):
+        yield _event(stamp, *row)
+    yield _fold('END:VCALENDAR')
+
+
+def calendar_response(filters, name, filename):
+    """
+    Respuesta en streaming con las reservas recientes y futuras que cumplen `filters`.
+    """
+    queryset = Reservation.objects.filter(start_time__gte=window_start(), **filters)
+    response = StreamingHttpResponse(calendar_lines(queryset, name), content_type='text/calendar; charset=utf-8')
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    return response
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from application.allocation import run_allocation
+from application.models import AllocationRound
+
+
+class Command(BaseCommand):
+    help = ("Resuelve las rondas de asignación semanal cuya ventana de preferencias ya cerró: "
+            "reparte los horarios disputados y crea todas las reservas en una transacción.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--week', help="Asignar sólo la ronda de la semana que contiene esta fecha (YYYY-MM-DD).")
+        parser.add_argument('--seed', type=int, help="Semilla del sorteo de desempate (por defecto, aleatoria).")
+        parser.add_argument('--force', action='store_true', help="Asignar aunque la ventana siga abierta.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        rounds = AllocationRound.objects.filter(status=AllocationRound.Status.OPEN).order_by('week')
+        if options['week']:
+            day = parse_date(options['week'])
+            if day is None:
+                raise CommandError("--week debe tener el formato YYYY-MM-DD.")
+            rounds = rounds.filter(week=day - timedelta(days=day.weekday()))
+        if not options['force']:
+            rounds = rounds.filter(closes_at__lte=timezone.now())
+
+        for allocation_round in rounds:
+            try:
+                summary = run_allocation(allocation_round, seed=options['seed'], dry_run=options['dry_run'])
+            except ValueError as e:
+                raise CommandError(f"{allocation_round}: {e}")
+            prefix = "[simulación] " if options['dry_run'] else ""
+            self.stdout.write(self.style.SUCCESS(
+                f"{prefix}Semana del {allocation_round.week}: {summary['assigned']} reservas para "
+                f"{summary['bands_served']}/{summary['bands']} bandas ({summary['preferences']} preferencias, "
+                f"{summary['first_choice']} con su primera opción, semilla {summary['seed']})."
+            ))
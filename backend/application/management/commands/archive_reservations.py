@@ -0,0 +1,45 @@
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from application.archive import archive_chunk, archive_cutoff
+from application.models import Reservation
+
+
+class Command(BaseCommand):
+    help = ("Mueve al archivo particionado por semestre las reservas de temporadas pasadas, "
+            "con sus invitados e invitaciones, por bloques.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help="Archivar las reservas terminadas antes de esta fecha (YYYY-MM-DD).")
+        parser.add_argument('--hot-semesters', type=int, default=settings.RESERVATION_HOT_SEMESTERS,
+                            help="Semestres que se conservan en la tabla de reservas, incluido el actual.")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['before']:
+            day = parse_date(options['before'])
+            if day is None:
+                raise CommandError("--before debe tener el formato YYYY-MM-DD.")
+            before = timezone.make_aware(datetime.combine(day, time.min))
+        else:
+            before = archive_cutoff(options['hot_semesters'])
+
+        if options['dry_run']:
+            pending = Reservation.objects.filter(end_time__lt=before).count()
+            self.stdout.write(f"Se archivarían {pending} reservas terminadas antes de {before:%Y-%m-%d}.")
+            return
+
+        moved = 0
+        while True:
+            count = archive_chunk(before, options['chunk_size'])
+            if not count:
+                break
+            moved += count
+            self.stdout.write(f"  {moved} reservas archivadas...")
+
+        self.stdout.write(self.style.SUCCESS(f"Archivo terminado: {moved} reservas anteriores a {before:%Y-%m-%d}."))
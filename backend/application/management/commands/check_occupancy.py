@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from collection.models import Room
+from collection.occupancy import find_inconsistencies, rebuild_days
+
+
+class Command(BaseCommand):
+    help = ("Compara el bitmap de ocupación con las reservas y reporta los días que no coinciden. "
+            "Con --fix los reconstruye.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, action='append', dest='rooms', help="Limitar a estas salas (repetible).")
+        parser.add_argument('--from', dest='date_from', help="YYYY-MM-DD (por defecto, hoy).")
+        parser.add_argument('--to', dest='date_to', help="YYYY-MM-DD (por defecto, AVAILABILITY_MAX_DAYS días más).")
+        parser.add_argument('--fix', action='store_true')
+
+    def handle(self, *args, **options):
+        date_from = parse_date(options['date_from']) if options['date_from'] else timezone.localdate()
+        date_to = (parse_date(options['date_to']) if options['date_to']
+                   else date_from + timedelta(days=settings.AVAILABILITY_MAX_DAYS))
+        room_ids = options['rooms'] or list(Room.objects.values_list('id', flat=True))
+
+        mismatches = find_inconsistencies(room_ids, date_from, date_to)
+        for room_id, day, stored, expected in mismatches:
+            self.stdout.write(
+                f"  sala {room_id} {day}: guardado full={stored[0]:#x} touched={stored[1]:#x}, "
+                f"esperado full={expected[0]:#x} touched={expected[1]:#x}"
+            )
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("El bitmap de ocupación es consistente."))
+            return
+
+        if options['fix']:
+            for room_id in {room_id for room_id, _, _, _ in mismatches}:
+                with transaction.atomic():
+                    rebuild_days(room_id, [day for other, day, _, _ in mismatches if other == room_id])
+            self.stdout.write(self.style.SUCCESS(f"{len(mismatches)} días corregidos."))
+            return
+
+        raise CommandError(f"{len(mismatches)} días inconsistentes (usa --fix para corregirlos).")
@@ -0,0 +1,177 @@
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from application.models import User
+from application.rut import normalize_rut
+from application.tokens import revoke_user_tokens
+from backend.versioning import bump_versions
+
+UPDATE_FIELDS = ['username', 'email', 'first_name', 'last_name', 'is_udp', 'is_active']
+
+# Con menos contraseñas por lote, iniciar los procesos cuesta más que calcular los hashes aquí
+PARALLEL_HASH_MIN = 64
+
+
+def _setup_worker():
+    # Con el método "spawn" los procesos hijos no heredan la configuración de Django
+    django.setup()
+
+
+def _read_rows(path, file_format):
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        if file_format == 'csv':
+            yield from csv.DictReader(handle)
+        elif file_format == 'jsonl':
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(handle)
+
+
+def _batches(rows, size):
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _as_bool(value, default):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'si', 'sí', 'yes', 'y')
+
+
+class Command(BaseCommand):
+    help = ("Importa un listado de estudiantes (CSV, JSON o JSON Lines) con inserciones masivas. "
+            "Columnas: ruf, username, email, first_name, last_name, password, is_udp. "
+            "Los usuarios existentes (mismo RUT) se actualizan.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'],
+                            help="Por defecto se deduce de la extensión del archivo.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Procesos para calcular los hashes de contraseñas.")
+        parser.add_argument('--not-udp', action='store_true',
+                            help="Marca como externos a los usuarios sin columna is_udp.")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"No existe el archivo {path}.")
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in ('csv', 'json', 'jsonl'):
+            raise CommandError("Formato no soportado: usa --format csv, json o jsonl.")
+
+        self.default_udp = not options['not_udp']
+        self.summary = {'created': 0, 'updated': 0, 'skipped': 0}
+        self.workers = options['workers']
+        self.pool = None
+        processed = 0
+        try:
+            for batch in _batches(_read_rows(path, file_format), options['batch_size']):
+                self.import_batch(batch, options['batch_size'])
+                processed += len(batch)
+                self.stdout.write(f"  {processed} filas procesadas...")
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación terminada: {self.summary['created']} creados, "
+            f"{self.summary['updated']} actualizados, {self.summary['skipped']} omitidos."
+        ))
+
+    def skip(self, row, reason):
+        self.summary['skipped'] += 1
+        self.stderr.write(f"  omitido {row.get('ruf') or row.get('username') or row}: {reason}")
+
+    def hash_passwords(self, passwords):
+        """
+        Hashes en paralelo sólo cuando el lote lo justifica; el pool se crea la primera vez.
+        """
+        if len(passwords) < PARALLEL_HASH_MIN or self.workers == 1:
+            return [make_password(password) for password in passwords]
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_setup_worker)
+        return list(self.pool.map(make_password, passwords, chunksize=32))
+
+    def import_batch(self, batch, batch_size):
+        # Normalizar y deduplicar por RUT dentro del lote (la última fila gana)
+        rows = {}
+        for row in batch:
+            ruf = normalize_rut(row.get('ruf'), validate=True)
+            if not ruf:
+                self.skip(row, "RUT inválido")
+                continue
+            rows[ruf] = row
+
+        # Una consulta sobre el índice de User.ruf_normalized para todo el lote
+        existing = {user.ruf_normalized: user for user in User.objects.filter(ruf_normalized__in=rows)}
+
+        # Sin columna username, los existentes conservan el suyo (es su login) y los nuevos usan el RUT
+        usernames = {
+            ruf: (row.get('username') or '').strip() or (existing[ruf].username if ruf in existing else ruf)
+            for ruf, row in rows.items()
+        }
+        # Usernames ocupados por otros usuarios
+        taken = dict(User.objects.filter(username__in=usernames.values()).values_list('username', 'ruf_normalized'))
+        for ruf in list(rows):
+            owner = taken.get(usernames[ruf], ruf)
+            if owner != ruf:
+                self.skip(rows.pop(ruf), f"el username '{usernames[ruf]}' ya está en uso")
+
+        # Dos RUT distintos con el mismo username en el lote: se queda la primera fila
+        seen = set()
+        for ruf in list(rows):
+            if usernames[ruf] in seen:
+                self.skip(rows.pop(ruf), f"el username '{usernames[ruf]}' está repetido en el archivo")
+            else:
+                seen.add(usernames[ruf])
+
+        # Calcular los hashes en paralelo, sólo para las filas que traen contraseña
+        with_password = [ruf for ruf, row in rows.items() if row.get('password')]
+        hashes = dict(zip(with_password, self.hash_passwords([rows[ruf]['password'] for ruf in with_password])))
+
+        to_create, to_update, password_reset = [], [], []
+        for ruf, row in rows.items():
+            user = existing.get(ruf) or User(ruf=ruf, ruf_normalized=ruf, is_active=True)
+            user.username = usernames[ruf]
+            user.email = row.get('email') or user.email
+            user.first_name = row.get('first_name') or user.first_name
+            user.last_name = row.get('last_name') or user.last_name
+            user.is_udp = _as_bool(row.get('is_udp'), user.is_udp if user.pk else self.default_udp)
+            if ruf in hashes:
+                user.password = hashes[ruf]
+                if user.pk:
+                    password_reset.append(user.pk)
+            elif not user.pk:
+                user.set_unusable_password()
+            (to_update if user.pk else to_create).append(user)
+
+        with transaction.atomic():
+            User.objects.bulk_create(to_create, batch_size=batch_size)
+            fields = UPDATE_FIELDS + (['password'] if hashes else [])
+            User.objects.bulk_update(to_update, fields, batch_size=batch_size)
+            # bulk_update no emite señales: invalidar los ETag de /current-user/
+            updated_names = [f'user:{user.pk}' for user in to_update]
+            if updated_names:
+                transaction.on_commit(lambda: bump_versions(*updated_names))
+            # Ni las señales de User: revocar los tokens de quienes cambiaron de contraseña
+            for user_id in password_reset:
+                transaction.on_commit(partial(revoke_user_tokens, user_id))
+
+        self.summary['created'] += len(to_create)
+        self.summary['updated'] += len(to_update)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from application.models import AuthToken
+
+
+class Command(BaseCommand):
+    help = "Elimina los tokens de acceso expirados o revocados."
+
+    def handle(self, *args, **options):
+        deleted, _ = AuthToken.objects.filter(
+            Q(expires_at__lte=timezone.now()) | Q(revoked_at__isnull=False)
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f"Tokens eliminados: {deleted}."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from application.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero las estadísticas del dashboard (BandStats y UserStats)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        bands, users = rebuild_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Estadísticas reconstruidas: {bands} bandas, {users} usuarios."
+        ))
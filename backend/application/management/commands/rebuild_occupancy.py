@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from application.models import Reservation
+from collection.availability import days_between
+from collection.models import Room
+from collection.occupancy import rebuild_days
+
+
+class Command(BaseCommand):
+    help = ("Reconstruye el bitmap de ocupación por sala y día a partir de las reservas. "
+            "Por defecto, desde hoy hasta la última reserva.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', type=int, action='append', dest='rooms', help="Limitar a estas salas (repetible).")
+        parser.add_argument('--from', dest='date_from', help="YYYY-MM-DD (por defecto, hoy).")
+        parser.add_argument('--to', dest='date_to', help="YYYY-MM-DD (por defecto, el día de la última reserva).")
+
+    def handle(self, *args, **options):
+        date_from = parse_date(options['date_from']) if options['date_from'] else timezone.localdate()
+        if options['date_to']:
+            date_to = parse_date(options['date_to'])
+        else:
+            last = Reservation.objects.order_by('-end_time').values_list('end_time', flat=True).first()
+            date_to = max(timezone.localtime(last).date(), date_from) if last else date_from
+
+        room_ids = options['rooms'] or list(Room.objects.values_list('id', flat=True))
+        days = list(days_between(date_from, date_to))
+        for room_id in room_ids:
+            # Una transacción por sala para no mantener bloqueados todos los bitmaps a la vez
+            with transaction.atomic():
+                rebuild_days(room_id, days)
+            self.stdout.write(f"  sala {room_id}: {len(days)} días")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Bitmap reconstruido para {len(room_ids)} salas entre {date_from} y {date_to}."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from application.quota import reconcile_usage
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el libro de cuota semanal (BandWeekUsage) a partir de las reservas existentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--band', type=int, action='append', dest='bands',
+                            help="Limitar a estas bandas (repetible).")
+
+    def handle(self, *args, **options):
+        rows = reconcile_usage(band_ids=options['bands'])
+        self.stdout.write(self.style.SUCCESS(f"Libro de cuota reconstruido: {rows} filas."))
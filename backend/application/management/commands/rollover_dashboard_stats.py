@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from application.stats import rollover_upcoming
+
+
+class Command(BaseCommand):
+    help = ("Recalcula el contador de reservas próximas. Pensado para ejecutarse "
+            "periódicamente (p. ej. cada 5 minutos vía cron).")
+
+    def handle(self, *args, **options):
+        bands, users = rollover_upcoming()
+        self.stdout.write(self.style.SUCCESS(
+            f"Reservas próximas actualizadas: {bands} bandas, {users} usuarios."
+        ))
@@ -0,0 +1,36 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from application.notifications import claim_batch, get_transport, send_batch
+
+
+class Command(BaseCommand):
+    help = ("Vacía el outbox de notificaciones por lotes, con varios envíos en paralelo y "
+            "reintentos con backoff. Sin --once queda escuchando la cola.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--workers', type=int, default=8, help="Envíos simultáneos.")
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help="Segundos de espera cuando la cola está vacía.")
+        parser.add_argument('--once', action='store_true', help="Terminar cuando no queden avisos vencidos.")
+
+    def handle(self, *args, **options):
+        transport = get_transport()
+        sent = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = claim_batch(options['batch_size'])
+                if not batch:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                batch_sent, batch_failed = send_batch(pool, transport, batch)
+                sent += batch_sent
+                failed += batch_failed
+                self.stdout.write(f"  {sent} enviados, {failed} con error...")
+
+        self.stdout.write(self.style.SUCCESS(f"Outbox vacío: {sent} enviados, {failed} con error."))
@@ -0,0 +1,44 @@
+# application/membership.py
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import BandMember
+
+
+def membership_cache_key(user_id):
+    return f"membership:user:{user_id}"
+
+
+def user_band_ids(request):
+    """
+    IDs de las bandas del usuario autenticado.
+
+    Se resuelven una vez por request (guardados en el propio request) y se
+    comparten entre requests mediante un cache de vida corta por usuario.
+    """
+    band_ids = getattr(request, '_band_ids', None)
+    if band_ids is not None:
+        return band_ids
+
+    user = request.user
+    if not user or not user.is_authenticated:
+        band_ids = frozenset()
+    else:
+        key = membership_cache_key(user.pk)
+        band_ids = cache.get(key)
+        if band_ids is None:
+            band_ids = frozenset(BandMember.objects.filter(user=user).values_list('band_id', flat=True))
+            cache.set(key, band_ids, settings.MEMBERSHIP_CACHE_TIMEOUT)
+
+    request._band_ids = band_ids
+    return band_ids
+
+
+def is_band_member(request, band):
+    band_id = getattr(band, 'pk', band)
+    return band_id in user_band_ids(request)
+
+
+def invalidate_user_bands(user_id):
+    cache.delete(membership_cache_key(user_id))
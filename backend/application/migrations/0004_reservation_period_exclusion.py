@@ -0,0 +1,68 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:00
+
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations
+
+# Pares que se listan en el mensaje de error; el resto sólo se cuenta
+OVERLAP_REPORT_LIMIT = 50
+
+
+def check_overlaps(apps, schema_editor):
+    """
+    La restricción de exclusión no se puede crear si ya hay reservas solapadas. En lugar
+    de dejar que AddConstraint aborte con un error genérico de PostgreSQL, se listan los
+    pares en conflicto para resolverlos a mano (mover o eliminar una de las reservas) y
+    volver a ejecutar migrate. No se resuelven solos: elegir cuál se conserva es decisión
+    de la administración.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT a.room_id, a.id, b.id, lower(a.period), lower(b.period), count(*) OVER () "
+            "FROM application_reservation a "
+            "JOIN application_reservation b ON b.room_id = a.room_id AND b.id > a.id AND b.period && a.period "
+            "ORDER BY a.room_id, lower(a.period), a.id, b.id "
+            "LIMIT %s",
+            [OVERLAP_REPORT_LIMIT],
+        )
+        rows = cursor.fetchall()
+    if not rows:
+        return
+    lines = [
+        f"  sala {room_id}: reservas {first_id} ({first_start:%Y-%m-%d %H:%M}) y {second_id} ({second_start:%Y-%m-%d %H:%M})"
+        for room_id, first_id, second_id, first_start, second_start, _ in rows
+    ]
+    total = rows[0][5]
+    if total > len(rows):
+        lines.append(f"  ... y {total - len(rows)} pares más")
+    raise RuntimeError(
+        f"Hay {total} pares de reservas solapadas en la misma sala; resuélvelos antes de aplicar "
+        "la restricción reservation_room_no_overlap:\n" + "\n".join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0003_band_is_approved_delete_bandrequest'),
+    ]
+
+    operations = [
+        # Necesaria para combinar la igualdad de room_id con el solapamiento de rangos en un índice GiST
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='reservation',
+            name='period',
+            field=django.contrib.postgres.fields.ranges.DateTimeRangeField(blank=True, editable=False, help_text='Rango [start_time, end_time) usado por la restricción de exclusión de la sala.', null=True),
+        ),
+        migrations.RunSQL(
+            sql="UPDATE application_reservation SET period = tstzrange(start_time, end_time, '[)') WHERE period IS NULL;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunPython(check_overlaps, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[('room', '='), ('period', '&&')], name='reservation_room_no_overlap'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0004_reservation_period_exclusion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['start_time', 'id'], name='reservation_start_id_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.3 on 2026-10-18 13:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def populate_stats(apps, schema_editor):
+    Band = apps.get_model('application', 'Band')
+    BandStats = apps.get_model('application', 'BandStats')
+    User = apps.get_model('application', 'User')
+    UserStats = apps.get_model('application', 'UserStats')
+    now = timezone.now()
+
+    BandStats.objects.bulk_create([
+        BandStats(band_id=band_id, total_reservations=total, upcoming_reservations=upcoming)
+        for band_id, total, upcoming in Band.objects.annotate(
+            total=Count('reservations'),
+            upcoming=Count('reservations', filter=Q(reservations__start_time__gte=now)),
+        ).values_list('id', 'total', 'upcoming')
+    ], batch_size=1000)
+
+    UserStats.objects.bulk_create([
+        UserStats(user_id=user_id, band_count=band_count, total_reservations=total, upcoming_reservations=upcoming)
+        for user_id, band_count, total, upcoming in User.objects.filter(bands__isnull=False).annotate(
+            band_count=Count('bands', distinct=True),
+            total=Count('bands__reservations'),
+            upcoming=Count('bands__reservations', filter=Q(bands__reservations__start_time__gte=now)),
+        ).values_list('id', 'band_count', 'total', 'upcoming')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0005_reservation_start_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BandStats',
+            fields=[
+                ('band', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='application.band')),
+                ('total_reservations', models.PositiveIntegerField(default=0)),
+                ('upcoming_reservations', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('band_count', models.PositiveIntegerField(default=0)),
+                ('total_reservations', models.PositiveIntegerField(default=0)),
+                ('upcoming_reservations', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_stats, migrations.RunPython.noop),
+    ]
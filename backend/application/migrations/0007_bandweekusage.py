@@ -0,0 +1,42 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+
+def populate_week_usage(apps, schema_editor):
+    Reservation = apps.get_model('application', 'Reservation')
+    BandWeekUsage = apps.get_model('application', 'BandWeekUsage')
+    rows = Reservation.objects.annotate(week=TruncWeek('start_time')).values('band_id', 'week').annotate(
+        total=Count('id')
+    ).order_by()
+    BandWeekUsage.objects.bulk_create([
+        BandWeekUsage(band_id=row['band_id'], week=timezone.localtime(row['week']).date(), used=row['total'])
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0006_bandstats_userstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BandWeekUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField(help_text='Lunes de la semana ISO (hora local).')),
+                ('used', models.PositiveIntegerField(default=0)),
+                ('band', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='week_usage', to='application.band')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('band', 'week'), name='band_week_usage_unique')],
+            },
+        ),
+        migrations.RunPython(populate_week_usage, migrations.RunPython.noop),
+    ]
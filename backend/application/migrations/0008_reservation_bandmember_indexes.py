@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-18 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0007_bandweekusage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bandmember',
+            index=models.Index(fields=['user', 'band'], name='bandmember_user_band_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['room', 'start_time'], include=('end_time',), name='reservation_room_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['band', 'start_time'], name='reservation_band_start_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:00
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0008_reservation_bandmember_indexes'),
+    ]
+
+    operations = [
+        # Operadores y clases de índice de trigramas para la búsqueda de bandas
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='band',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='band_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.3 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+from application.rut import normalize_rut
+
+BATCH_SIZE = 1000
+
+
+def _populate(model, source, target):
+    batch = []
+    for instance in model.objects.exclude(**{f'{source}__isnull': True}).only('pk', source).iterator(chunk_size=BATCH_SIZE):
+        setattr(instance, target, normalize_rut(getattr(instance, source)))
+        batch.append(instance)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_update(batch, [target])
+            batch = []
+    if batch:
+        model.objects.bulk_update(batch, [target])
+
+
+def populate_normalized_ruts(apps, schema_editor):
+    _populate(apps.get_model('application', 'User'), 'ruf', 'ruf_normalized')
+    _populate(apps.get_model('application', 'Guest'), 'ruf', 'ruf_normalized')
+    _populate(apps.get_model('application', 'Invitation'), 'invited_ruf', 'invited_ruf_normalized')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0009_band_name_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='ruf_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text="RUT en forma canónica ('12345678-K'), para búsquedas exactas.", max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='guest',
+            name='ruf_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='invitation',
+            name='invited_ruf_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.RunPython(populate_normalized_ruts, migrations.RunPython.noop),
+    ]
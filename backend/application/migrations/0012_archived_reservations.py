@@ -0,0 +1,78 @@
+# Generated by Django 5.1.3 on 2026-10-18 16:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0011_authtoken'),
+        ('collection', '0001_initial'),
+    ]
+
+    operations = [
+        # Tabla particionada por rango de start_time: la clave primaria debe incluir la columna de partición.
+        # Las particiones semestrales las crea archive_reservations a medida que las necesita.
+        migrations.RunSQL(
+            sql="""
+                CREATE TABLE application_archivedreservation (
+                    id bigint NOT NULL,
+                    band_id bigint NOT NULL,
+                    room_id bigint NOT NULL,
+                    start_time timestamp with time zone NOT NULL,
+                    end_time timestamp with time zone NOT NULL,
+                    created_at timestamp with time zone NOT NULL,
+                    archived_at timestamp with time zone NOT NULL,
+                    PRIMARY KEY (id, start_time)
+                ) PARTITION BY RANGE (start_time);
+                CREATE INDEX archivedreservation_band_start_idx ON application_archivedreservation (band_id, start_time);
+                CREATE INDEX archivedreservation_room_start_idx ON application_archivedreservation (room_id, start_time);
+            """,
+            reverse_sql="DROP TABLE application_archivedreservation;",
+            state_operations=[
+                migrations.CreateModel(
+                    name='ArchivedReservation',
+                    fields=[
+                        ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                        ('start_time', models.DateTimeField()),
+                        ('end_time', models.DateTimeField()),
+                        ('created_at', models.DateTimeField()),
+                        ('archived_at', models.DateTimeField()),
+                        ('band', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='application.band')),
+                        ('room', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='collection.room')),
+                    ],
+                    options={
+                        'db_table': 'application_archivedreservation',
+                        'managed': False,
+                    },
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedGuest',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=100, null=True)),
+                ('ruf', models.CharField(blank=True, max_length=12, null=True)),
+                ('ruf_normalized', models.CharField(blank=True, max_length=12, null=True)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('reservation', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='guests', to='application.archivedreservation')),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedInvitation',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('invited_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('invited_ruf', models.CharField(blank=True, max_length=12, null=True)),
+                ('invited_ruf_normalized', models.CharField(blank=True, max_length=12, null=True)),
+                ('invited_email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('invited_at', models.DateTimeField()),
+                ('invited_user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('reservation', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='invitations', to='application.archivedreservation')),
+            ],
+        ),
+    ]
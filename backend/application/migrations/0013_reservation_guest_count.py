@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_guest_count(apps, schema_editor):
+    Reservation = apps.get_model('application', 'Reservation')
+    Guest = apps.get_model('application', 'Guest')
+    Reservation.objects.update(guest_count=Coalesce(Subquery(
+        Guest.objects.filter(reservation=OuterRef('pk'))
+        .order_by()
+        .values('reservation')
+        .annotate(total=Count('id'))
+        .values('total')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0012_archived_reservations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='guest_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Invitados de la reserva, mantenido con UPDATE condicionales (ver application/guests.py).'),
+        ),
+        migrations.RunPython(populate_guest_count, migrations.RunPython.noop),
+    ]
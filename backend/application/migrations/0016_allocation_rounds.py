@@ -0,0 +1,48 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0015_waitlistentry'),
+        ('collection', '0002_roomoccupancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllocationRound',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField(help_text='Lunes de la semana que se asigna.', unique=True)),
+                ('hours_start', models.TimeField(default='18:00', help_text='Inicio de la franja que se asigna por lotes.')),
+                ('hours_end', models.TimeField(default='22:00', help_text='Fin de la franja que se asigna por lotes.')),
+                ('opens_at', models.DateTimeField(help_text='Desde cuándo se reciben preferencias.')),
+                ('closes_at', models.DateTimeField(help_text='Hasta cuándo se reciben preferencias.')),
+                ('status', models.CharField(choices=[('open', 'Abierta'), ('allocated', 'Asignada')], default='open', max_length=10)),
+                ('seed', models.BigIntegerField(blank=True, help_text='Semilla del sorteo de desempate; se guarda para poder reproducir la asignación.', null=True)),
+                ('allocated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SlotPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('attendees', models.PositiveIntegerField(default=1, help_text='Personas que asistirán (se compara con la capacidad).')),
+                ('reason', models.CharField(blank=True, help_text='Motivo por el que no se asignó.', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('allocation_round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='preferences', to='application.allocationround')),
+                ('band', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_preferences', to='application.band')),
+                ('reservation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='application.reservation')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_preferences', to='collection.room')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('allocation_round', 'band', 'rank'), name='slot_preference_unique_rank'), models.UniqueConstraint(fields=('allocation_round', 'band', 'room', 'start_time'), name='slot_preference_unique_slot')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.3 on 2026-10-19 10:00
+
+import django.contrib.postgres.fields.ranges
+from django.db import migrations, models
+
+
+STALE = "a.period IS NULL OR a.period <> tstzrange(a.start_time, a.end_time, '[)')"
+
+
+def fix_periods(apps, schema_editor):
+    """
+    Recalcula el rango de las filas escritas sin pasar por save() (bulk_create, update(),
+    SQL directo). Con period NULL la exclusión las ignoraba, así que antes se comprueba
+    que el rango corregido no choque con otra reserva de la sala.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT a.room_id, a.id, b.id FROM application_reservation a "
+            "JOIN application_reservation b ON b.room_id = a.room_id AND b.id <> a.id "
+            "AND tstzrange(b.start_time, b.end_time, '[)') && tstzrange(a.start_time, a.end_time, '[)') "
+            f"WHERE {STALE} ORDER BY a.room_id, a.id, b.id LIMIT 50"
+        )
+        conflicts = cursor.fetchall()
+        if conflicts:
+            raise RuntimeError(
+                "Hay reservas sin rango que se solapan con otras de la misma sala; resuélvelas antes de migrar:\n"
+                + "\n".join(f"  sala {room_id}: reservas {first_id} y {second_id}"
+                             for room_id, first_id, second_id in conflicts)
+            )
+        cursor.execute(
+            "UPDATE application_reservation a SET period = tstzrange(a.start_time, a.end_time, '[)') "
+            f"WHERE {STALE}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0016_allocation_rounds'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_periods, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reservation',
+            name='period',
+            field=django.contrib.postgres.fields.ranges.DateTimeRangeField(editable=False, help_text='Rango [start_time, end_time) usado por la restricción de exclusión de la sala.'),
+        ),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=models.CheckConstraint(condition=models.Q(('period', models.Func(models.F('start_time'), models.F('end_time'), models.Value('[)'), function='tstzrange', output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField()))), name='reservation_period_matches_times'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0017_reservation_period_not_null'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='calendar_feed_key',
+            field=models.CharField(blank=True, editable=False, help_text='Secreto de los enlaces de calendario (.ics); cambiarlo revoca los enlaces anteriores.', max_length=32),
+        ),
+    ]
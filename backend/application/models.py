@@ -1,6 +1,19 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
 from collection.models import Room
+from .rut import normalize_rut
+
+
+def _with_update_field(kwargs, source, target):
+    # Si se guarda sólo `source`, también hay que guardar la columna derivada
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and source in update_fields:
+        kwargs['update_fields'] = set(update_fields) | {target}
 
 
 class User(AbstractUser):
@@ -13,6 +26,20 @@ class User(AbstractUser):
         unique=True,
         help_text="Rol Único Tributario (RUT) del usuario."
     )
+    ruf_normalized = models.CharField(
+        max_length=12,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        help_text="RUT en forma canónica ('12345678-K'), para búsquedas exactas."
+    )
+    calendar_feed_key = models.CharField(
+        max_length=32,
+        blank=True,
+        editable=False,
+        help_text="Secreto de los enlaces de calendario (.ics); cambiarlo revoca los enlaces anteriores."
+    )
     # Cambiamos los `related_name` para evitar conflictos
     groups = models.ManyToManyField(
         'auth.Group',
@@ -30,6 +57,11 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        self.ruf_normalized = normalize_rut(self.ruf)
+        _with_update_field(kwargs, 'ruf', 'ruf_normalized')
+        super().save(*args, **kwargs)
+
 
 class Band(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -45,6 +77,12 @@ class Band(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Búsqueda de bandas: ILIKE y similitud de trigramas (pg_trgm)
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='band_name_trgm_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -56,6 +94,10 @@ class BandMember(models.Model):
 
     class Meta:
         unique_together = ('band', 'user')
+        indexes = [
+            # Bandas de un usuario (membresía y permisos) sin leer la tabla: index-only scan
+            models.Index(fields=['user', 'band'], name='bandmember_user_band_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} en {self.band.name}"
@@ -73,17 +115,75 @@ class Reservation(models.Model):
         blank=True,
         help_text="Invitados a la sesión de la banda."
     )
+    period = DateTimeRangeField(
+        editable=False,
+        help_text="Rango [start_time, end_time) usado por la restricción de exclusión de la sala."
+    )
+    guest_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Invitados de la reserva, mantenido con UPDATE condicionales (ver application/guests.py)."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Clave de la paginación por cursor de /reservations/
+            models.Index(fields=['start_time', 'id'], name='reservation_start_id_idx'),
+            # Chequeo de solape al reservar y calendario de la sala
+            models.Index(fields=['room', 'start_time'], include=['end_time'], name='reservation_room_start_idx'),
+            # Próximas reservas de una banda (estadísticas, calendario, cuota semanal)
+            models.Index(fields=['band', 'start_time'], name='reservation_band_start_idx'),
+        ]
+        constraints = [
+            # La base de datos impide que dos reservas de la misma sala se solapen,
+            # aunque lleguen en paralelo desde distintos workers.
+            ExclusionConstraint(
+                name='reservation_room_no_overlap',
+                expressions=[
+                    ('room', RangeOperators.EQUAL),
+                    ('period', RangeOperators.OVERLAPS),
+                ],
+            ),
+            # bulk_create, update() y el SQL directo no pasan por save(): un rango que no
+            # coincide con start_time/end_time dejaría la reserva fuera de la exclusión
+            models.CheckConstraint(
+                condition=models.Q(period=models.Func(
+                    models.F('start_time'), models.F('end_time'), models.Value('[)'),
+                    function='tstzrange', output_field=DateTimeRangeField(),
+                )),
+                name='reservation_period_matches_times',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.band.name} reservó {self.room.name} de {self.start_time} a {self.end_time}"
 
+    @staticmethod
+    def build_period(start_time, end_time):
+        return DateTimeTZRange(start_time, end_time, '[)')
+
+    def save(self, *args, **kwargs):
+        # Mantener el rango sincronizado con start_time/end_time
+        self.period = self.build_period(self.start_time, self.end_time)
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # guest_count lo mantienen UPDATE condicionales: un save() completo no debe pisarlo
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'guest_count'
+            ]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'start_time', 'end_time'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'period'}
+        super().save(*args, **kwargs)
+
 
 class Guest(models.Model):
     reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     name = models.CharField(max_length=100, blank=True, null=True)
     ruf = models.CharField(max_length=12, blank=True, null=True)
+    ruf_normalized = models.CharField(max_length=12, null=True, blank=True, editable=False, db_index=True)
     email = models.EmailField(blank=True, null=True)
 
     def __str__(self):
@@ -91,12 +191,18 @@ class Guest(models.Model):
             return f"{self.user.username} invitado a {self.reservation}"
         return f"{self.name} invitado a {self.reservation}"
 
+    def save(self, *args, **kwargs):
+        self.ruf_normalized = normalize_rut(self.ruf)
+        _with_update_field(kwargs, 'ruf', 'ruf_normalized')
+        super().save(*args, **kwargs)
+
 
 class Invitation(models.Model):
     reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='invitations')
     invited_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='invitations')
     invited_name = models.CharField(max_length=100, blank=True, null=True)
     invited_ruf = models.CharField(max_length=12, blank=True, null=True)
+    invited_ruf_normalized = models.CharField(max_length=12, null=True, blank=True, editable=False, db_index=True)
     invited_email = models.EmailField(blank=True, null=True)
     invited_at = models.DateTimeField(auto_now_add=True)
 
@@ -104,3 +210,258 @@ class Invitation(models.Model):
         if self.invited_user:
             return f"Invitación de {self.invited_user.username} a {self.reservation}"
         return f"Invitación de {self.invited_name} a {self.reservation}"
+
+    def save(self, *args, **kwargs):
+        self.invited_ruf_normalized = normalize_rut(self.invited_ruf)
+        _with_update_field(kwargs, 'invited_ruf', 'invited_ruf_normalized')
+        super().save(*args, **kwargs)
+
+
+class BandStats(models.Model):
+    """
+    Contadores precalculados de reservas por banda, mantenidos por señales.
+    """
+    band = models.OneToOneField(Band, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    total_reservations = models.PositiveIntegerField(default=0)
+    upcoming_reservations = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Estadísticas de {self.band_id}"
+
+
+class UserStats(models.Model):
+    """
+    Contadores del dashboard por usuario: suma de las estadísticas de sus bandas.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    band_count = models.PositiveIntegerField(default=0)
+    total_reservations = models.PositiveIntegerField(default=0)
+    upcoming_reservations = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Estadísticas de {self.user_id}"
+
+
+class BandWeekUsage(models.Model):
+    """
+    Libro de cuota semanal: reservas usadas por una banda en una semana ISO.
+    """
+    band = models.ForeignKey(Band, on_delete=models.CASCADE, related_name='week_usage')
+    week = models.DateField(help_text="Lunes de la semana ISO (hora local).")
+    used = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['band', 'week'], name='band_week_usage_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.band_id} usó {self.used} reservas la semana del {self.week}"
+
+
+class AuthToken(models.Model):
+    """
+    Token de acceso emitido al iniciar sesión. El token firmado que recibe el cliente
+    lleva el `jti`; la fila sólo se consulta para comprobar que no fue revocado.
+    """
+    jti = models.CharField(max_length=32, primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='auth_tokens')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Token {self.jti} de {self.user_id}"
+
+
+class ArchivedReservation(models.Model):
+    """
+    Reservas de temporadas pasadas, movidas por archive_reservations. La tabla está
+    particionada por semestre sobre start_time (ver application/archive.py) y no la
+    administra Django; conserva el id original de la reserva.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    band = models.ForeignKey(Band, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    room = models.ForeignKey(Room, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'application_archivedreservation'
+
+    def __str__(self):
+        return f"{self.band_id} reservó {self.room_id} de {self.start_time} a {self.end_time} (archivada)"
+
+
+class ArchivedGuest(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    reservation = models.ForeignKey(ArchivedReservation, on_delete=models.DO_NOTHING, db_constraint=False,
+                                    related_name='guests')
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+                             related_name='+')
+    name = models.CharField(max_length=100, blank=True, null=True)
+    ruf = models.CharField(max_length=12, blank=True, null=True)
+    ruf_normalized = models.CharField(max_length=12, null=True, blank=True)
+    email = models.EmailField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.user_id or self.name} invitado a {self.reservation_id} (archivado)"
+
+
+class ArchivedInvitation(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    reservation = models.ForeignKey(ArchivedReservation, on_delete=models.DO_NOTHING, db_constraint=False,
+                                    related_name='invitations')
+    invited_user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+                                     related_name='+')
+    invited_name = models.CharField(max_length=100, blank=True, null=True)
+    invited_ruf = models.CharField(max_length=12, blank=True, null=True)
+    invited_ruf_normalized = models.CharField(max_length=12, null=True, blank=True)
+    invited_email = models.EmailField(blank=True, null=True)
+    invited_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Invitación de {self.invited_user_id or self.invited_name} a {self.reservation_id} (archivada)"
+
+
+class Notification(models.Model):
+    """
+    Outbox de notificaciones: se escribe en la misma transacción que la invitación o
+    reserva que la origina y la envía después el comando send_notifications.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pendiente'
+        SENT = 'sent', 'Enviada'
+        FAILED = 'failed', 'Fallida'
+
+    kind = models.CharField(max_length=50)
+    dedup_key = models.CharField(
+        max_length=255,
+        unique=True,
+        help_text="Evita encolar dos veces el mismo aviso al mismo destinatario."
+    )
+    recipient = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Cola de pendientes del worker
+            models.Index(fields=['next_attempt_at'], name='notification_pending_idx',
+                         condition=models.Q(status='pending')),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} para {self.recipient} ({self.status})"
+
+
+class WaitlistEntry(models.Model):
+    """
+    Banda en espera de un horario ya reservado. Al eliminar o acortar una reserva,
+    application/waitlist.py promueve las entradas que caben en el horario liberado,
+    en la misma transacción.
+    """
+
+    class Status(models.TextChoices):
+        WAITING = 'waiting', 'En espera'
+        PROMOTED = 'promoted', 'Promovida'
+        CANCELLED = 'cancelled', 'Cancelada'
+        EXPIRED = 'expired', 'Expirada'
+
+    band = models.ForeignKey(Band, on_delete=models.CASCADE, related_name='waitlist_entries')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='waitlist_entries')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    priority = models.IntegerField(
+        default=0,
+        help_text="Se promueve primero la mayor prioridad; a igual prioridad, la entrada más antigua."
+    )
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.WAITING)
+    reservation = models.ForeignKey(Reservation, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Entradas en espera que se solapan con el horario liberado de una sala
+            models.Index(fields=['room', 'start_time'], name='waitlist_waiting_idx',
+                         condition=models.Q(status='waiting')),
+        ]
+        constraints = [
+            # Reintentar la misma solicitud no agrega otra entrada a la cola
+            models.UniqueConstraint(fields=['band', 'room', 'start_time', 'end_time'],
+                                    condition=models.Q(status='waiting'), name='waitlist_unique_waiting'),
+        ]
+
+    def __str__(self):
+        return f"{self.band.name} espera {self.room.name} de {self.start_time} a {self.end_time} ({self.status})"
+
+
+class AllocationRound(models.Model):
+    """
+    Asignación semanal por lotes de los horarios disputados (p. ej. las noches). Mientras
+    la ronda está abierta las bandas registran preferencias ordenadas y nadie puede reservar
+    directamente dentro de la franja; al cerrarla, application/allocation.py reparte las salas.
+    """
+
+    class Status(models.TextChoices):
+        OPEN = 'open', 'Abierta'
+        ALLOCATED = 'allocated', 'Asignada'
+
+    week = models.DateField(unique=True, help_text="Lunes de la semana que se asigna.")
+    hours_start = models.TimeField(default="18:00", help_text="Inicio de la franja que se asigna por lotes.")
+    hours_end = models.TimeField(default="22:00", help_text="Fin de la franja que se asigna por lotes.")
+    opens_at = models.DateTimeField(help_text="Desde cuándo se reciben preferencias.")
+    closes_at = models.DateTimeField(help_text="Hasta cuándo se reciben preferencias.")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.OPEN)
+    seed = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Semilla del sorteo de desempate; se guarda para poder reproducir la asignación."
+    )
+    allocated_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Asignación de la semana del {self.week} ({self.status})"
+
+    def is_accepting(self, now=None):
+        now = now or timezone.now()
+        return self.status == self.Status.OPEN and self.opens_at <= now < self.closes_at
+
+
+class SlotPreference(models.Model):
+    """
+    Horario solicitado por una banda en una ronda de asignación (rank 1 = el preferido).
+    """
+    allocation_round = models.ForeignKey(AllocationRound, on_delete=models.CASCADE, related_name='preferences')
+    band = models.ForeignKey(Band, on_delete=models.CASCADE, related_name='slot_preferences')
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='slot_preferences')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    rank = models.PositiveSmallIntegerField()
+    attendees = models.PositiveIntegerField(default=1, help_text="Personas que asistirán (se compara con la capacidad).")
+    reservation = models.ForeignKey(Reservation, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    reason = models.CharField(max_length=255, blank=True, help_text="Motivo por el que no se asignó.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['allocation_round', 'band', 'rank'], name='slot_preference_unique_rank'),
+            models.UniqueConstraint(fields=['allocation_round', 'band', 'room', 'start_time'],
+                                    name='slot_preference_unique_slot'),
+        ]
+
+    def __str__(self):
+        return f"{self.band.name} #{self.rank}: {self.room.name} de {self.start_time} a {self.end_time}"
@@ -0,0 +1,170 @@
+# application/notifications.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BandMember, Notification
+
+SUBJECT_PREFIX = '[Bandas UDP] '
+
+
+class EmailTransport:
+    """
+    Envía con el backend de correo de Django (EMAIL_BACKEND): SMTP en producción,
+    console en desarrollo y locmem en los tests.
+    """
+
+    def send(self, notification):
+        send_mail(
+            notification.subject,
+            notification.body,
+            settings.DEFAULT_FROM_EMAIL,
+            [notification.recipient],
+            fail_silently=False,
+        )
+
+
+def get_transport():
+    return import_string(settings.NOTIFICATION_TRANSPORT)()
+
+
+def enqueue(kind, key, recipients, subject, body):
+    """
+    Encola un aviso por destinatario. Debe llamarse dentro de la transacción que escribe
+    el cambio; las claves repetidas se ignoran (ON CONFLICT DO NOTHING).
+    """
+    recipients = sorted({email for email in recipients if email})
+    Notification.objects.bulk_create([
+        Notification(kind=kind, dedup_key=f"{key}:{email}", recipient=email,
+                     subject=SUBJECT_PREFIX + subject, body=body)
+        for email in recipients
+    ], ignore_conflicts=True)
+
+
+def band_emails(band_id):
+    return BandMember.objects.filter(band_id=band_id).exclude(user__email='').values_list('user__email', flat=True)
+
+
+def _format(value):
+    return timezone.localtime(value).strftime('%d/%m/%Y %H:%M')
+
+
+def notify_invitation(invitation):
+    reservation = invitation.reservation
+    recipient = invitation.invited_email or (invitation.invited_user.email if invitation.invited_user else None)
+    enqueue(
+        'invitation.created',
+        f"invitation:{invitation.pk}",
+        [recipient],
+        f"Invitación al ensayo de {reservation.band.name}",
+        f"Hola {invitation.invited_name or ''},\n\n"
+        f"La banda {reservation.band.name} te invitó a su ensayo en {reservation.room.name}, "
+        f"de {_format(reservation.start_time)} a {_format(reservation.end_time)}.\n",
+    )
+
+
+RESERVATION_SUBJECTS = {
+    'created': "Nueva reserva de sala",
+    'updated': "Reserva de sala modificada",
+    'deleted': "Reserva de sala cancelada",
+}
+
+
+def notify_reservation_changes(kind, changes):
+    """
+    Avisa a los miembros de la banda. `changes` son tuplas (id, band_id, start_time, end_time);
+    la clave incluye el horario para no repetir el aviso si la reserva se guarda sin cambios.
+    """
+    emails = {}
+    for reservation_id, band_id, start_time, end_time in changes:
+        if band_id not in emails:
+            emails[band_id] = list(band_emails(band_id))
+        enqueue(
+            f'reservation.{kind}',
+            f"reservation:{reservation_id}:{kind}:{start_time.isoformat()}:{end_time.isoformat()}",
+            emails[band_id],
+            RESERVATION_SUBJECTS[kind],
+            f"{RESERVATION_SUBJECTS[kind]}: de {_format(start_time)} a {_format(end_time)}.\n",
+        )
+
+
+def notify_waitlist_promoted(entry):
+    recipient = entry.requested_by.email if entry.requested_by_id else None
+    enqueue(
+        'waitlist.promoted',
+        f"waitlist:{entry.pk}:promoted",
+        [recipient],
+        "Se liberó el horario que esperabas",
+        f"La sala {entry.room.name} quedó reservada para {entry.band.name} "
+        f"de {_format(entry.start_time)} a {_format(entry.end_time)}.\n",
+    )
+
+
+def retry_delay(attempts):
+    """
+    Backoff exponencial: NOTIFICATION_RETRY_BASE_SECONDS * 2^(intentos - 1), con tope.
+    """
+    delay = settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.NOTIFICATION_RETRY_MAX_SECONDS))
+
+
+def claim_batch(batch_size):
+    """
+    Toma hasta `batch_size` avisos vencidos. Los bloqueados por otro worker se saltan y
+    los tomados se reprograman por NOTIFICATION_LEASE_SECONDS: si el worker muere a mitad
+    del envío, se reintentan al vencer ese plazo.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(status=Notification.Status.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        lease = now + timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS)
+        for notification in batch:
+            notification.attempts += 1
+            notification.next_attempt_at = lease
+        Notification.objects.bulk_update(batch, ['attempts', 'next_attempt_at'])
+    return batch
+
+
+def record_results(results):
+    """
+    `results` son pares (notification, error). Los fallidos se reintentan con backoff
+    hasta NOTIFICATION_MAX_ATTEMPTS.
+    """
+    now = timezone.now()
+    for notification, error in results:
+        if error is None:
+            notification.status = Notification.Status.SENT
+            notification.sent_at = now
+            notification.last_error = ''
+        elif notification.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            notification.status = Notification.Status.FAILED
+            notification.last_error = error
+        else:
+            notification.next_attempt_at = now + retry_delay(notification.attempts)
+            notification.last_error = error
+    Notification.objects.bulk_update(
+        [notification for notification, _ in results],
+        ['status', 'sent_at', 'next_attempt_at', 'last_error'],
+    )
+
+
+def send_batch(pool, transport, batch):
+    def deliver(notification):
+        try:
+            transport.send(notification)
+            return notification, None
+        except Exception as e:
+            return notification, f"{type(e).__name__}: {e}"
+
+    results = list(pool.map(deliver, batch))
+    record_results(results)
+    return sum(1 for _, error in results if error is None), sum(1 for _, error in results if error is not None)
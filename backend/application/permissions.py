@@ -1,6 +1,6 @@
 from rest_framework.permissions import BasePermission
 
-from application.models import BandMember
+from application.membership import is_band_member
 
 
 class IsUDPUser(BasePermission):
@@ -15,4 +15,6 @@ class IsBandMember(BasePermission):
     Permiso para permitir solo a miembros de la banda que están intentando acceder al objeto.
     """
     def has_object_permission(self, request, view, obj):
-        return BandMember.objects.filter(band=obj.band, user=request.user).exists()
\ No newline at end of file
+        # BandMember expone band_id; Guest e Invitation llegan a la banda a través de la reserva
+        band_id = obj.band_id if hasattr(obj, 'band_id') else obj.reservation.band_id
+        return is_band_member(request, band_id)
\ No newline at end of file
@@ -0,0 +1,85 @@
+# application/quota.py
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest, TruncWeek
+from django.utils import timezone
+
+from .models import BandWeekUsage, Reservation
+
+
+def week_of(value):
+    """
+    Lunes (fecha local) de la semana ISO que contiene `value`.
+    """
+    local_date = timezone.localtime(value).date()
+    return local_date - timedelta(days=local_date.weekday())
+
+
+def ensure_usage_rows(band_id, weeks):
+    # INSERT ... ON CONFLICT DO NOTHING: seguro aunque dos reservas creen la fila a la vez
+    BandWeekUsage.objects.bulk_create(
+        [BandWeekUsage(band_id=band_id, week=week) for week in weeks],
+        ignore_conflicts=True,
+    )
+
+
+def reserve_quota(band_id, week, limit, amount=1):
+    """
+    Reserva cupo con un único UPDATE condicional (used = used + amount WHERE used + amount <= limit).
+    Debe llamarse dentro de la transacción de la reserva. Devuelve False si no hay cupo.
+    """
+    ensure_usage_rows(band_id, [week])
+    return BandWeekUsage.objects.filter(
+        band_id=band_id, week=week, used__lte=limit - amount,
+    ).update(used=F('used') + amount) == 1
+
+
+def consume_quota(band_id, week, amount=1):
+    """
+    Registra uso sin comprobar el límite (reservas creadas fuera del flujo de reserva, p. ej. el admin).
+    """
+    ensure_usage_rows(band_id, [week])
+    BandWeekUsage.objects.filter(band_id=band_id, week=week).update(used=F('used') + amount)
+
+
+def release_quota(band_id, week, amount=1):
+    BandWeekUsage.objects.filter(band_id=band_id, week=week).update(
+        used=Greatest(F('used') - Value(amount), Value(0))
+    )
+
+
+def lock_usage(band_id, weeks):
+    """
+    Filas del libro de la banda para las semanas indicadas, bloqueadas hasta el fin de la transacción.
+    """
+    ensure_usage_rows(band_id, weeks)
+    return {
+        usage.week: usage
+        for usage in BandWeekUsage.objects.select_for_update().filter(band_id=band_id, week__in=weeks)
+    }
+
+
+def reconcile_usage(band_ids=None, batch_size=1000):
+    """
+    Reconstruye el libro a partir de Reservation. Devuelve el número de filas escritas.
+    """
+    reservations = Reservation.objects.all()
+    usage = BandWeekUsage.objects.all()
+    if band_ids:
+        reservations = reservations.filter(band_id__in=band_ids)
+        usage = usage.filter(band_id__in=band_ids)
+
+    rows = reservations.annotate(week=TruncWeek('start_time')).values('band_id', 'week').annotate(
+        total=Count('id')
+    ).order_by()
+    with transaction.atomic():
+        usage.delete()
+        created = BandWeekUsage.objects.bulk_create(
+            [BandWeekUsage(band_id=row['band_id'], week=timezone.localtime(row['week']).date(), used=row['total'])
+             for row in rows.iterator(chunk_size=batch_size)],
+            batch_size=batch_size,
+        )
+    return len(created)
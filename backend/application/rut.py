@@ -0,0 +1,32 @@
+# application/rut.py
+
+import re
+
+_NON_RUT_CHARS = re.compile(r'[^0-9kK]')
+
+
+def rut_check_digit(body):
+    """
+    Dígito verificador (módulo 11) del cuerpo numérico de un RUT.
+    """
+    total = sum(int(digit) * factor for digit, factor in zip(reversed(str(body)), (2, 3, 4, 5, 6, 7) * 3))
+    remainder = 11 - total % 11
+    return {11: '0', 10: 'K'}.get(remainder, str(remainder))
+
+
+def normalize_rut(value, validate=False):
+    """
+    Forma canónica de un RUT: sin puntos, con guion y dígito verificador en
+    mayúscula ('12.345.678-k' -> '12345678-K'). Devuelve None si no parece un RUT
+    o, con `validate`, si el dígito verificador no corresponde.
+    """
+    cleaned = _NON_RUT_CHARS.sub('', str(value or '')).upper()
+    if len(cleaned) < 2:
+        return None
+    body, check_digit = cleaned[:-1], cleaned[-1]
+    if not body.isdigit():
+        return None
+    body = int(body)
+    if validate and rut_check_digit(body) != check_digit:
+        return None
+    return f"{body}-{check_digit}"
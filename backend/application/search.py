@@ -0,0 +1,135 @@
+# application/search.py
+
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from backend.versioning import get_versions
+from .models import Band
+
+CATALOG_VERSION = 'catalog:bands'
+
+
+def normalize_term(value):
+    """
+    Minúsculas y sin tildes, para que "Cañon" y "canon" coincidan.
+    """
+    value = unicodedata.normalize('NFKD', str(value).casefold())
+    return ' '.join(''.join(c for c in value if not unicodedata.combining(c)).split())
+
+
+class PrefixIndex:
+    """
+    Índice en memoria de prefijos de palabras, para bases de datos sin pg_trgm
+    (p. ej. SQLite al correr tests). Guarda pares (palabra, id) ordenados y busca
+    por prefijo con bisect.
+    """
+
+    def __init__(self, rows):
+        self.names = {}
+        words = []
+        for band_id, name in rows:
+            normalized = normalize_term(name)
+            self.names[band_id] = (normalized, name)
+            words.extend((word, band_id) for word in set(normalized.split()))
+        words.sort()
+        self.words = words
+
+    def _ids_with_prefix(self, prefix):
+        ids = set()
+        position = bisect_left(self.words, (prefix,))
+        while position < len(self.words) and self.words[position][0].startswith(prefix):
+            ids.add(self.words[position][1])
+            position += 1
+        return ids
+
+    def search(self, term, limit):
+        tokens = normalize_term(term).split()
+        if not tokens:
+            return []
+        # Cada palabra buscada debe ser prefijo de alguna palabra del nombre
+        ids = self._ids_with_prefix(tokens[0])
+        for token in tokens[1:]:
+            ids &= self._ids_with_prefix(token)
+
+        phrase = ' '.join(tokens)
+
+        def rank(band_id):
+            normalized, name = self.names[band_id]
+            return (normalized != phrase, not normalized.startswith(phrase), len(normalized), name, band_id)
+
+        return sorted(ids, key=rank)[:limit]
+
+
+_index_lock = threading.Lock()
+_index_state = {
+    'version': None,
+    'index': None,
+}
+
+
+def prefix_index(version):
+    """
+    Índice de prefijos del proceso, reconstruido cuando cambia el sello del catálogo de bandas.
+    """
+    with _index_lock:
+        if _index_state['index'] is None or _index_state['version'] != version:
+            _index_state['index'] = PrefixIndex(Band.objects.values_list('id', 'name'))
+            _index_state['version'] = version
+        return _index_state['index']
+
+
+def trigram_search(term, limit):
+    """
+    Búsqueda con pg_trgm: ILIKE y similitud de palabras usan el índice GIN sobre `name`.
+    Primero las coincidencias exactas y por prefijo, luego por similitud.
+    """
+    return list(
+        Band.objects.filter(Q(name__icontains=term) | Q(name__trigram_word_similar=term))
+        .annotate(
+            exact=Case(When(name__iexact=term, then=Value(1)), default=Value(0), output_field=IntegerField()),
+            prefix=Case(When(name__istartswith=term, then=Value(1)), default=Value(0), output_field=IntegerField()),
+            similarity=TrigramWordSimilarity(term, 'name'),
+        )
+        .order_by('-exact', '-prefix', '-similarity', 'name', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+
+
+def search_cache_key(version, term):
+    return f"band-search:{version!r}:{term}"
+
+
+def search_band_ids(term):
+    """
+    IDs de bandas que coinciden con `term`, ordenados por relevancia y limitados a
+    BAND_SEARCH_MAX_RESULTS. Los términos cortos (los prefijos que se escriben primero
+    y que más se repiten) se cachean por versión del catálogo de bandas.
+    """
+    term = ' '.join(str(term).split())
+    if not term:
+        return []
+    limit = settings.BAND_SEARCH_MAX_RESULTS
+    version = get_versions([CATALOG_VERSION])[CATALOG_VERSION]
+
+    if connection.vendor != 'postgresql':
+        return prefix_index(version).search(term, limit)
+
+    cacheable = len(term) <= settings.BAND_SEARCH_CACHE_PREFIX_LENGTH
+    if cacheable:
+        # ILIKE y pg_trgm no distinguen mayúsculas, pero sí tildes
+        key = search_cache_key(version, term.casefold())
+        band_ids = cache.get(key)
+        if band_ids is not None:
+            return band_ids
+
+    band_ids = trigram_search(term, limit)
+    if cacheable:
+        cache.set(key, band_ids, settings.BAND_SEARCH_CACHE_TIMEOUT)
+    return band_ids
@@ -1,12 +1,53 @@
+from datetime import timedelta
+
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import Band, BandMember, Reservation, Guest, Invitation
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.functional import cached_property
+from collection.models import Room
+from .membership import is_band_member
+from .models import (
+    Band, BandMember, Reservation, Guest, Invitation, ArchivedReservation, WaitlistEntry, AllocationRound,
+    SlotPreference,
+)
+from .rut import normalize_rut
+from .waitlist import queue_position
 
 User = get_user_model()
 
 
+def canonical_rut(value):
+    """
+    Valida el dígito verificador y devuelve el RUT en forma canónica (vacío se mantiene).
+    """
+    if not value:
+        return value
+    rut = normalize_rut(value, validate=True)
+    if rut is None:
+        raise serializers.ValidationError("RUT inválido.")
+    return rut
+
+
+def user_for_rut(rut):
+    # Búsqueda exacta sobre el índice de User.ruf_normalized
+    return User.objects.filter(ruf_normalized=rut).first() if rut else None
+
+
+def current_band_queryset(user):
+    """
+    Bandas del usuario con sus miembros (y los usuarios de cada miembro) precargados.
+    """
+    return user.bands.prefetch_related(
+        Prefetch('bandmember_set', queryset=BandMember.objects.select_related('user'))
+    )
+
 
 class CurrentUserSerializer(serializers.ModelSerializer):
+    """
+    Si el contexto trae `current_band` (ya cargada con current_band_queryset) no se consulta la base de datos.
+    """
     current_band = serializers.SerializerMethodField()
 
     class Meta:
@@ -14,17 +55,17 @@ class CurrentUserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'is_udp', 'ruf', 'current_band']
 
     def get_current_band(self, obj):
-        try:
-            band = obj.bands.first()
-            if band :
-                return {
-                    'id' : band.id,
-                    'name' : band.name,
-                    'members' : BandMemberSerializer(band.bandmember_set.all(), many=True).data
-                }
-            return None
-        except Band.DoesNotExist:
-            return None
+        if 'current_band' in self.context:
+            band = self.context['current_band']
+        else:
+            band = current_band_queryset(obj).first()
+        if band :
+            return {
+                'id' : band.id,
+                'name' : band.name,
+                'members' : BandMemberSerializer(band.bandmember_set.all(), many=True).data
+            }
+        return None
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer) :
@@ -36,6 +77,12 @@ class UserRegistrationSerializer(serializers.ModelSerializer) :
         model = User
         fields = ('username', 'email', 'ruf', 'password', 'is_udp')
 
+    def validate_ruf(self, value) :
+        rut = canonical_rut(value)
+        if User.objects.filter(ruf_normalized=rut).exists() :
+            raise serializers.ValidationError("Ya existe un usuario con este RUT.")
+        return rut
+
     def create(self, validated_data) :
         is_udp = validated_data.pop('is_udp')
         password = validated_data.pop('password')
@@ -131,9 +178,14 @@ class BandMemberSerializer(serializers.ModelSerializer) :
         read_only_fields = ['id', 'joined_at']
 
 
+    @cached_property
+    def user_serializer(self):
+        # Un solo serializer reutilizado para todas las filas de la lista
+        return UserSerializer()
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation['user'] = UserSerializer(instance.user).data
+        representation['user'] = self.user_serializer.to_representation(instance.user)
         return representation
 
     def validate(self, attrs):
@@ -154,48 +206,275 @@ class BandMemberSerializer(serializers.ModelSerializer) :
 
 
 class ReservationSerializer(serializers.ModelSerializer) :
+    # La relación usa through=Guest, así que DRF la dejaría de sólo lectura: las vistas crean los Guest
+    guests = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), many=True, required=False)
+
     class Meta :
         model = Reservation
-        fields = ['id', 'band', 'room', 'start_time', 'end_time', 'guests', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'band', 'room', 'start_time', 'end_time', 'guests', 'guest_count', 'created_at']
+        read_only_fields = ['id', 'guest_count', 'created_at']
 
     def validate(self, attrs) :
         band = attrs.get('band')
-        user = self.context['request'].user
 
         # Verificar que el usuario pertenece a la banda
-        if not BandMember.objects.filter(band=band, user=user).exists() :
+        if not is_band_member(self.context['request'], band) :
             raise serializers.ValidationError("Solo los miembros de la banda pueden realizar reservas.")
 
+        # Un mismo usuario no ocupa dos cupos de invitado
+        if 'guests' in attrs :
+            attrs['guests'] = list(dict.fromkeys(attrs['guests']))
+
         # Validar horarios y número de reservas (se manejará en la lógica de negocio)
         return attrs
 
 
+class ArchivedReservationSerializer(serializers.ModelSerializer) :
+    guests = serializers.SerializerMethodField()
+
+    class Meta :
+        model = ArchivedReservation
+        fields = ['id', 'band', 'room', 'start_time', 'end_time', 'guests', 'created_at', 'archived_at']
+        read_only_fields = fields
+
+    def get_guests(self, obj) :
+        # Igual que ReservationSerializer: sólo los usuarios registrados (invitados precargados)
+        return [guest.user_id for guest in obj.guests.all() if guest.user_id]
+
+
+class ReservationIntervalSerializer(serializers.Serializer) :
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+
+
+class RecurrenceSerializer(serializers.Serializer) :
+    """
+    Regla de recurrencia: repite el intervalo inicial cada `interval` días o semanas,
+    `count` veces o hasta la fecha `until`.
+    """
+    FREQUENCIES = {
+        'daily' : timedelta(days=1),
+        'weekly' : timedelta(weeks=1),
+    }
+
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    frequency = serializers.ChoiceField(choices=list(FREQUENCIES), default='weekly')
+    interval = serializers.IntegerField(min_value=1, default=1)
+    count = serializers.IntegerField(min_value=1, required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs) :
+        if ('count' in attrs) == ('until' in attrs) :
+            raise serializers.ValidationError("Indica exactamente uno de 'count' o 'until'.")
+        return attrs
+
+    def expand(self, attrs, limit) :
+        step = self.FREQUENCIES[attrs['frequency']] * attrs['interval']
+        start_time, end_time = attrs['start_time'], attrs['end_time']
+        occurrences = []
+        while len(occurrences) <= limit :
+            if 'count' in attrs and len(occurrences) >= attrs['count'] :
+                break
+            if 'until' in attrs and start_time > attrs['until'] :
+                break
+            occurrences.append((start_time, end_time))
+            start_time, end_time = start_time + step, end_time + step
+        return occurrences
+
+
+class BulkReservationSerializer(serializers.Serializer) :
+    band = serializers.PrimaryKeyRelatedField(queryset=Band.objects.all())
+    room = serializers.PrimaryKeyRelatedField(queryset=Room.objects.all())
+    intervals = ReservationIntervalSerializer(many=True, required=False)
+    recurrence = RecurrenceSerializer(required=False)
+
+    def validate(self, attrs) :
+        if ('intervals' in attrs) == ('recurrence' in attrs) :
+            raise serializers.ValidationError("Indica 'intervals' o 'recurrence', pero no ambos.")
+
+        if not is_band_member(self.context['request'], attrs['band']) :
+            raise serializers.ValidationError("Solo los miembros de la banda pueden realizar reservas.")
+
+        limit = settings.BULK_RESERVATION_MAX_ITEMS
+        if 'recurrence' in attrs :
+            candidates = self.fields['recurrence'].expand(attrs['recurrence'], limit)
+        else :
+            candidates = [(item['start_time'], item['end_time']) for item in attrs['intervals']]
+        if not candidates :
+            raise serializers.ValidationError("No hay intervalos que reservar.")
+        if len(candidates) > limit :
+            raise serializers.ValidationError(f"No se pueden crear más de {limit} reservas por solicitud.")
+
+        attrs['candidates'] = candidates
+        return attrs
+
+
+class RejectedReservationSerializer(serializers.Serializer) :
+    index = serializers.IntegerField()
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+    reason = serializers.CharField()
+
+
+class AcceptedReservationSerializer(serializers.Serializer) :
+    index = serializers.IntegerField()
+    reservation = serializers.DictField()
+
+
+class BulkReservationResultSerializer(serializers.Serializer) :
+    accepted = AcceptedReservationSerializer(many=True)
+    rejected = RejectedReservationSerializer(many=True)
+
+
 class GuestSerializer(serializers.ModelSerializer) :
     class Meta :
         model = Guest
         fields = ['id', 'reservation', 'user', 'name', 'ruf', 'email']
         read_only_fields = ['id']
 
+    def validate_ruf(self, value) :
+        return canonical_rut(value)
+
     def validate(self, attrs) :
-        reservation = attrs.get('reservation')
-        user = attrs.get('user')
-        name = attrs.get('name')
+        # Asociar al usuario registrado con ese RUT
+        if not attrs.get('user') and attrs.get('ruf') :
+            attrs['user'] = user_for_rut(attrs['ruf'])
+
+        # La capacidad de la sala se comprueba al guardar, con un UPDATE condicional sobre guest_count
+        return attrs
+
+
+class GuestEntrySerializer(serializers.Serializer) :
+    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False, allow_null=True)
+    name = serializers.CharField(max_length=100, required=False, allow_blank=True, allow_null=True)
+    ruf = serializers.CharField(max_length=12, required=False, allow_blank=True, allow_null=True)
+    email = serializers.EmailField(required=False, allow_blank=True, allow_null=True)
+
+    def validate_ruf(self, value) :
+        return canonical_rut(value)
+
+    def validate(self, attrs) :
+        if not attrs.get('user') and not attrs.get('name') and not attrs.get('ruf') :
+            raise serializers.ValidationError("Indica el usuario, el nombre o el RUT del invitado.")
+        return attrs
+
 
-        # Verificar que la sala no exceda su capacidad
-        if reservation.room :
-            current_guests = Guest.objects.filter(reservation=reservation).count()
-            if current_guests >= reservation.room.capacity :
-                raise serializers.ValidationError("La sala ha alcanzado su capacidad máxima de personas.")
+class BulkGuestSerializer(serializers.Serializer) :
+    reservation = serializers.PrimaryKeyRelatedField(queryset=Reservation.objects.select_related('room'))
+    guests = GuestEntrySerializer(many=True, allow_empty=False)
+
+    def validate_guests(self, value) :
+        limit = settings.BULK_GUEST_MAX_ITEMS
+        if len(value) > limit :
+            raise serializers.ValidationError(f"No se pueden agregar más de {limit} invitados por solicitud.")
+        return value
 
+    def validate(self, attrs) :
+        if not is_band_member(self.context['request'], attrs['reservation'].band_id) :
+            raise serializers.ValidationError("Solo miembros de la banda pueden agregar invitados.")
+
+        # Una sola consulta sobre el índice de RUT para asociar a los usuarios registrados
+        ruts = {entry['ruf'] for entry in attrs['guests'] if entry.get('ruf') and not entry.get('user')}
+        users = {user.ruf_normalized : user for user in User.objects.filter(ruf_normalized__in=ruts)} if ruts else {}
+        for entry in attrs['guests'] :
+            if not entry.get('user') and entry.get('ruf') :
+                entry['user'] = users.get(entry['ruf'])
         return attrs
 
+
+class RejectedGuestSerializer(serializers.Serializer) :
+    index = serializers.IntegerField()
+    reason = serializers.CharField()
+
+
+class BulkGuestResultSerializer(serializers.Serializer) :
+    accepted = GuestSerializer(many=True)
+    rejected = RejectedGuestSerializer(many=True)
+
 class InvitationSerializer(serializers.ModelSerializer) :
     class Meta :
         model = Invitation
         fields = ['id', 'reservation', 'invited_user', 'invited_name', 'invited_ruf', 'invited_email', 'invited_at']
         read_only_fields = ['id', 'invited_at']
 
+    def validate_invited_ruf(self, value) :
+        return canonical_rut(value)
+
+    def validate(self, attrs) :
+        # Asociar al usuario registrado con ese RUT
+        if not attrs.get('invited_user') and attrs.get('invited_ruf') :
+            attrs['invited_user'] = user_for_rut(attrs['invited_ruf'])
+        return attrs
+
+class WaitlistEntrySerializer(serializers.ModelSerializer) :
+    position = serializers.SerializerMethodField()
+
+    class Meta :
+        model = WaitlistEntry
+        fields = ['id', 'band', 'room', 'start_time', 'end_time', 'priority', 'status', 'position',
+                  'reservation', 'last_error', 'created_at', 'resolved_at']
+        # La prioridad la asigna el staff desde el admin
+        read_only_fields = ['id', 'priority', 'status', 'position', 'reservation', 'last_error',
+                            'created_at', 'resolved_at']
+        # Repetir la solicitud es válido: join_waitlist devuelve la entrada existente y la
+        # restricción waitlist_unique_waiting cubre las carreras
+        validators = []
+
+    def get_position(self, obj) :
+        # Las listas llegan anotadas con with_queue_position()
+        if hasattr(obj, 'queue_position') :
+            return obj.queue_position
+        return queue_position(obj)
+
+    def validate(self, attrs) :
+        if not is_band_member(self.context['request'], attrs['band']) :
+            raise serializers.ValidationError("Solo los miembros de la banda pueden unirse a la lista de espera.")
+        if attrs['end_time'] <= attrs['start_time'] :
+            raise serializers.ValidationError("La hora de término debe ser posterior a la hora de inicio.")
+        return attrs
+
+
+class AllocationRoundSerializer(serializers.ModelSerializer) :
+    class Meta :
+        model = AllocationRound
+        fields = ['id', 'week', 'hours_start', 'hours_end', 'opens_at', 'closes_at', 'status', 'allocated_at']
+        read_only_fields = fields
+
+
+class SlotPreferenceSerializer(serializers.ModelSerializer) :
+    class Meta :
+        model = SlotPreference
+        fields = ['id', 'allocation_round', 'band', 'room', 'start_time', 'end_time', 'rank', 'attendees',
+                  'reservation', 'reason', 'created_at']
+        read_only_fields = ['id', 'reservation', 'reason', 'created_at']
+
+    def validate(self, attrs) :
+        allocation_round = attrs['allocation_round']
+        band = attrs['band']
+        if not is_band_member(self.context['request'], band) :
+            raise serializers.ValidationError("Solo los miembros de la banda pueden registrar preferencias.")
+        if not allocation_round.is_accepting() :
+            raise serializers.ValidationError("La ronda no está recibiendo preferencias.")
+        if attrs['end_time'] <= attrs['start_time'] :
+            raise serializers.ValidationError("La hora de término debe ser posterior a la hora de inicio.")
+
+        # Sólo se asignan por lotes los horarios completos dentro de la franja de la ronda
+        start = timezone.localtime(attrs['start_time'])
+        end = timezone.localtime(attrs['end_time'])
+        in_week = allocation_round.week <= start.date() < allocation_round.week + timedelta(days=7)
+        if not in_week or end.date() != start.date() or \
+                start.time() < allocation_round.hours_start or end.time() > allocation_round.hours_end :
+            raise serializers.ValidationError("El horario debe estar dentro de la franja y la semana de la ronda.")
+
+        if SlotPreference.objects.filter(
+                allocation_round=allocation_round, band=band).count() >= settings.ALLOCATION_MAX_PREFERENCES :
+            raise serializers.ValidationError(
+                f"Se permiten a lo más {settings.ALLOCATION_MAX_PREFERENCES} preferencias por ronda."
+            )
+        return attrs
+
+
 class DashboardStatsSerializer(serializers.Serializer):
     totalReservations = serializers.IntegerField()
     upcomingReservations = serializers.IntegerField()
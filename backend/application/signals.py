@@ -0,0 +1,299 @@
+# application/signals.py
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from backend.versioning import bump_versions
+from collection.models import Room
+from collection.occupancy import day_masks, mark_occupied, rebuild_days
+from .booking import reservations_changed
+from .events import publish_reservation_events, reservation_event
+from .guests import add_guest_slots, release_guest_slots
+from .membership import invalidate_user_bands
+from .models import Band, BandMember, BandStats, Guest, Invitation, Reservation, User
+from .notifications import notify_invitation, notify_reservation_changes
+from .quota import consume_quota, release_quota, week_of
+from .stats import apply_membership_delta, apply_reservation_delta, is_upcoming, remove_band_stats
+from .tokens import invalidate_cached_user, revoke_user_tokens
+from .waitlist import promote_waitlist
+
+
+@receiver(pre_save, sender=Reservation)
+def remember_previous_state(sender, instance, **kwargs):
+    # Guardar el estado anterior para invalidar los días que deja libres y ajustar contadores
+    instance._previous_state = None
+    if instance.pk:
+        instance._previous_state = Reservation.objects.filter(pk=instance.pk).values_list(
+            'room_id', 'start_time', 'end_time', 'band_id'
+        ).first()
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_saved(sender, instance, created, **kwargs):
+    changes = [(instance.room_id, instance.band_id, instance.start_time, instance.end_time)]
+    previous = getattr(instance, '_previous_state', None)
+    if previous:
+        room_id, start_time, end_time, band_id = previous
+        changes.append((room_id, band_id, start_time, end_time))
+    reservations_changed(changes)
+    publish_reservation_events([reservation_event(
+        'created' if created else 'updated',
+        instance.pk, instance.room_id, instance.band_id, instance.start_time, instance.end_time,
+    )])
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    reservations_changed([(instance.room_id, instance.band_id, instance.start_time, instance.end_time)])
+    publish_reservation_events([reservation_event(
+        'deleted', instance.pk, instance.room_id, instance.band_id, instance.start_time, instance.end_time,
+    )])
+
+
+@receiver(post_save, sender=Reservation)
+def enqueue_reservation_notification(sender, instance, created, **kwargs):
+    # Outbox: el aviso se guarda en la misma transacción que la reserva
+    notify_reservation_changes('created' if created else 'updated', [
+        (instance.pk, instance.band_id, instance.start_time, instance.end_time),
+    ])
+
+
+@receiver(post_delete, sender=Reservation)
+def enqueue_reservation_deleted_notification(sender, instance, **kwargs):
+    notify_reservation_changes('deleted', [
+        (instance.pk, instance.band_id, instance.start_time, instance.end_time),
+    ])
+
+
+@receiver(post_save, sender=Invitation)
+def enqueue_invitation_notification(sender, instance, created, **kwargs):
+    if created:
+        notify_invitation(instance)
+
+
+@receiver(post_save, sender=Reservation)
+def update_occupancy_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if previous:
+        room_id, start_time, end_time, _ = previous
+        if (room_id, start_time, end_time) == (instance.room_id, instance.start_time, instance.end_time):
+            return
+        # Los bloques que deja libres se recalculan; los nuevos se encienden
+        rebuild_days(room_id, day_masks(start_time, end_time))
+    mark_occupied(instance.room_id, [(instance.start_time, instance.end_time)])
+
+
+def _deleted_with(origin, model):
+    # Indica si el borrado en cascada empezó en `model` (una instancia o un queryset)
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+@receiver(post_delete, sender=Reservation)
+def update_occupancy_on_delete(sender, instance, origin=None, **kwargs):
+    # Al borrar una sala, sus reservas se borran en cascada: no hay bitmap que mantener
+    if _deleted_with(origin, Room):
+        return
+    rebuild_days(instance.room_id, day_masks(instance.start_time, instance.end_time), create_missing=False)
+
+
+@receiver(post_save, sender=Reservation)
+def update_stats_on_save(sender, instance, created, **kwargs):
+    if created:
+        apply_reservation_delta(instance.band_id, 1, int(is_upcoming(instance.start_time)))
+        return
+
+    previous = getattr(instance, '_previous_state', None)
+    if not previous:
+        return
+    _, previous_start, _, previous_band_id = previous
+    if previous_band_id == instance.band_id and \
+            is_upcoming(previous_start) == is_upcoming(instance.start_time):
+        return
+    apply_reservation_delta(previous_band_id, -1, -int(is_upcoming(previous_start)))
+    apply_reservation_delta(instance.band_id, 1, int(is_upcoming(instance.start_time)))
+
+
+@receiver(post_save, sender=Reservation)
+def update_quota_on_save(sender, instance, created, **kwargs):
+    if created:
+        # El flujo de reserva ya descontó la cuota con el UPDATE condicional
+        if not getattr(instance, '_quota_reserved', False):
+            consume_quota(instance.band_id, week_of(instance.start_time))
+        return
+
+    previous = getattr(instance, '_previous_state', None)
+    if not previous:
+        return
+    _, previous_start, _, previous_band_id = previous
+    if previous_band_id == instance.band_id and week_of(previous_start) == week_of(instance.start_time):
+        return
+    release_quota(previous_band_id, week_of(previous_start))
+    consume_quota(instance.band_id, week_of(instance.start_time))
+
+
+@receiver(post_delete, sender=Reservation)
+def release_quota_on_delete(sender, instance, **kwargs):
+    release_quota(instance.band_id, week_of(instance.start_time))
+
+
+@receiver(post_save, sender=Reservation)
+def promote_waitlist_on_change(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_state', None)
+    if created or not previous:
+        return
+    room_id, start_time, end_time, _ = previous
+    if (room_id, start_time, end_time) == (instance.room_id, instance.start_time, instance.end_time):
+        return
+    # Se revisa todo el horario anterior: lo que la reserva sigue ocupando no pasa el chequeo de solape
+    promote_waitlist(room_id, start_time, end_time)
+
+
+@receiver(post_delete, sender=Reservation)
+def promote_waitlist_on_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_with(origin, Room):
+        return
+    # Después de liberar la cuota: la misma banda puede estar esperando otro horario de esa semana.
+    # Si se está borrando la banda, sus propias entradas no se promueven.
+    exclude_band_id = instance.band_id if _deleted_with(origin, Band) else None
+    promote_waitlist(instance.room_id, instance.start_time, instance.end_time, exclude_band_id)
+
+
+@receiver(pre_save, sender=Guest)
+def remember_previous_guest_reservation(sender, instance, **kwargs):
+    instance._previous_reservation_id = None
+    if instance.pk:
+        instance._previous_reservation_id = Guest.objects.filter(pk=instance.pk).values_list(
+            'reservation_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Guest)
+def update_guest_count_on_save(sender, instance, created, **kwargs):
+    if created:
+        # GuestViewSet ya sumó el invitado con el UPDATE condicional
+        if not getattr(instance, '_slot_reserved', False):
+            add_guest_slots(instance.reservation_id)
+        return
+
+    previous = getattr(instance, '_previous_reservation_id', None)
+    if previous and previous != instance.reservation_id:
+        release_guest_slots(previous)
+        # GuestViewSet ya sumó el invitado a la nueva reserva con el UPDATE condicional
+        if not getattr(instance, '_slot_reserved', False):
+            add_guest_slots(instance.reservation_id)
+
+
+@receiver(post_delete, sender=Guest)
+def update_guest_count_on_delete(sender, instance, **kwargs):
+    release_guest_slots(instance.reservation_id)
+
+
+@receiver(m2m_changed, sender=Reservation.guests.through)
+def update_guest_count_on_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    # reservation.guests.add()/set() crean las filas Guest con bulk_create, sin post_save.
+    # remove() y clear() borran con un queryset, que sí emite post_delete por cada Guest.
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        for reservation_id in pk_set:
+            add_guest_slots(reservation_id)
+    # ReservationViewSet ya sumó los invitados con el UPDATE condicional
+    elif not getattr(instance, '_slot_reserved', False):
+        add_guest_slots(instance.pk, len(pk_set))
+
+
+@receiver(post_delete, sender=Reservation)
+def update_stats_on_delete(sender, instance, origin=None, **kwargs):
+    # Al borrar la banda, remove_band_stats ya descontó sus reservas a los miembros
+    if _deleted_with(origin, Band):
+        return
+    apply_reservation_delta(instance.band_id, -1, -int(is_upcoming(instance.start_time)))
+
+
+@receiver(post_save, sender=Band)
+def create_band_stats(sender, instance, created, **kwargs):
+    if created:
+        BandStats.objects.get_or_create(band=instance)
+
+
+@receiver(pre_delete, sender=Band)
+def remove_stats_on_band_deleted(sender, instance, **kwargs):
+    # Antes de la cascada: después BandStats y BandMember ya no existen
+    remove_band_stats(instance.pk)
+
+
+@receiver(post_save, sender=BandMember)
+def update_stats_on_member_added(sender, instance, created, **kwargs):
+    if created:
+        apply_membership_delta(instance.user_id, instance.band_id, 1)
+
+
+@receiver(post_delete, sender=BandMember)
+def update_stats_on_member_removed(sender, instance, origin=None, **kwargs):
+    if _deleted_with(origin, Band):
+        return
+    apply_membership_delta(instance.user_id, instance.band_id, -1)
+
+
+@receiver(post_save, sender=BandMember)
+@receiver(post_delete, sender=BandMember)
+def invalidate_membership(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user_bands(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_token_user(sender, instance, **kwargs):
+    # El usuario cacheado por la autenticación con token debe reflejar el cambio
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_credentials(sender, instance, update_fields=None, **kwargs):
+    # Guardar la contraseña y el estado anteriores para revocar los tokens si cambian.
+    # El login sólo guarda last_login y no necesita la consulta.
+    instance._previous_credentials = None
+    if instance.pk and (update_fields is None or {'password', 'is_active'} & set(update_fields)):
+        instance._previous_credentials = User.objects.filter(pk=instance.pk).values_list(
+            'password', 'is_active'
+        ).first()
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_credentials_change(sender, instance, created, **kwargs):
+    # Cambiar la contraseña o desactivar la cuenta invalida las sesiones con token abiertas
+    previous = getattr(instance, '_previous_credentials', None)
+    if previous and previous != (instance.password, instance.is_active):
+        user_id = instance.pk
+        transaction.on_commit(lambda: revoke_user_tokens(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_versions(sender, instance, **kwargs):
+    # Los datos del usuario aparecen en /current-user/ de todos los miembros de sus bandas
+    names = [f'user:{instance.pk}'] + [
+        f'band:{band_id}'
+        for band_id in BandMember.objects.filter(user_id=instance.pk).values_list('band_id', flat=True)
+    ]
+    transaction.on_commit(lambda: bump_versions(*names))
+
+
+@receiver(post_save, sender=Band)
+@receiver(post_delete, sender=Band)
+def bump_band_versions(sender, instance, **kwargs):
+    names = [f'band:{instance.pk}', 'catalog:bands']
+    transaction.on_commit(lambda: bump_versions(*names))
+
+
+@receiver(post_save, sender=BandMember)
+@receiver(post_delete, sender=BandMember)
+def bump_membership_versions(sender, instance, **kwargs):
+    names = [f'band:{instance.band_id}', f'user:{instance.user_id}', 'catalog:bands']
+    transaction.on_commit(lambda: bump_versions(*names))
@@ -0,0 +1,134 @@
+# application/stats.py
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import ArchivedReservation, Band, BandStats, Reservation, User, UserStats
+
+
+def is_upcoming(start_time, now=None):
+    return start_time >= (now or timezone.now())
+
+
+def _increment(field, delta):
+    # Nunca dejar un contador en negativo si se desincroniza; el rebuild lo corrige
+    return Greatest(F(field) + Value(delta), Value(0))
+
+
+def apply_reservation_delta(band_id, total, upcoming):
+    """
+    Suma (o resta) reservas a los contadores de la banda y de todos sus miembros.
+    """
+    if not total and not upcoming:
+        return
+    changes = {
+        'total_reservations': _increment('total_reservations', total),
+        'upcoming_reservations': _increment('upcoming_reservations', upcoming),
+    }
+    BandStats.objects.filter(band_id=band_id).update(**changes)
+    UserStats.objects.filter(user__bandmember__band_id=band_id).update(**changes)
+
+
+def apply_membership_delta(user_id, band_id, sign):
+    """
+    Agrega (sign=1) o quita (sign=-1) una banda y sus reservas a los contadores del usuario.
+    """
+    band_stats = BandStats.objects.filter(band_id=band_id).values(
+        'total_reservations', 'upcoming_reservations'
+    ).first() or {'total_reservations': 0, 'upcoming_reservations': 0}
+
+    if sign > 0:
+        UserStats.objects.get_or_create(user_id=user_id)
+    UserStats.objects.filter(user_id=user_id).update(
+        band_count=_increment('band_count', sign),
+        total_reservations=_increment('total_reservations', sign * band_stats['total_reservations']),
+        upcoming_reservations=_increment('upcoming_reservations', sign * band_stats['upcoming_reservations']),
+    )
+
+
+def remove_band_stats(band_id):
+    """
+    Quita la banda y sus reservas de los contadores de todos sus miembros. Se llama antes
+    de borrar la banda, mientras BandStats y BandMember todavía existen.
+    """
+    band_stats = BandStats.objects.filter(band_id=band_id).values(
+        'total_reservations', 'upcoming_reservations'
+    ).first() or {'total_reservations': 0, 'upcoming_reservations': 0}
+    UserStats.objects.filter(user__bandmember__band_id=band_id).update(
+        band_count=_increment('band_count', -1),
+        total_reservations=_increment('total_reservations', -band_stats['total_reservations']),
+        upcoming_reservations=_increment('upcoming_reservations', -band_stats['upcoming_reservations']),
+    )
+
+
+def _upcoming_count(now, **filters):
+    return Coalesce(Subquery(
+        Reservation.objects.filter(start_time__gte=now, **filters)
+        .order_by()
+        .values(*filters.keys())
+        .annotate(total=Count('id'))
+        .values('total')
+    ), 0)
+
+
+def _archived_count(**filters):
+    # Las reservas archivadas siguen contando en los totales
+    return Coalesce(Subquery(
+        ArchivedReservation.objects.filter(**filters)
+        .order_by()
+        .values(*filters.keys())
+        .annotate(total=Count('id'))
+        .values('total')
+    ), 0)
+
+
+def rollover_upcoming():
+    """
+    Recalcula los contadores de reservas próximas; las reservas que ya empezaron dejan de contar.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        bands = BandStats.objects.update(
+            upcoming_reservations=_upcoming_count(now, band=OuterRef('band'))
+        )
+        users = UserStats.objects.update(
+            upcoming_reservations=_upcoming_count(now, band__bandmember__user=OuterRef('user'))
+        )
+    return bands, users
+
+
+def rebuild_stats(batch_size=1000):
+    """
+    Reconstruye desde cero las tablas de estadísticas a partir de Reservation (más el
+    archivo) y BandMember.
+    """
+    now = timezone.now()
+    upcoming = Q(reservations__start_time__gte=now)
+    with transaction.atomic():
+        BandStats.objects.all().delete()
+        UserStats.objects.all().delete()
+
+        bands = Band.objects.annotate(
+            total=Count('reservations') + _archived_count(band=OuterRef('pk')),
+            upcoming=Count('reservations', filter=upcoming),
+        ).values_list('id', 'total', 'upcoming')
+        BandStats.objects.bulk_create(
+            (BandStats(band_id=band_id, total_reservations=total, upcoming_reservations=upcoming_count)
+             for band_id, total, upcoming_count in bands.iterator(chunk_size=batch_size)),
+            batch_size=batch_size,
+        )
+
+        users = User.objects.filter(bands__isnull=False).annotate(
+            band_count=Count('bands', distinct=True),
+            total=Count('bands__reservations') + _archived_count(band__bandmember__user=OuterRef('pk')),
+            upcoming=Count('bands__reservations', filter=Q(bands__reservations__start_time__gte=now)),
+        ).values_list('id', 'band_count', 'total', 'upcoming')
+        UserStats.objects.bulk_create(
+            (UserStats(user_id=user_id, band_count=band_count, total_reservations=total,
+                       upcoming_reservations=upcoming_count)
+             for user_id, band_count, total, upcoming_count in users.iterator(chunk_size=batch_size)),
+            batch_size=batch_size,
+        )
+    return BandStats.objects.count(), UserStats.objects.count()
@@ -1,3 +1,984 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import random
+import tempfile
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.checks import check_events_broker, check_shared_cache
+from collection.models import Room
+from composer.cache import invalidate_global_settings
+from composer.models import GlobalSettings
+from .models import (
+    User, Band, BandMember, BandWeekUsage, Reservation, Guest, Invitation, Notification, WaitlistEntry,
+    AllocationRound, ArchivedReservation, SlotPreference, UserStats,
+)
+from .allocation import draft_order, solve
+from .archive import archive_chunk
+from .events import CacheBroker, get_broker, reservation_event
+from .ical import rotate_feed_key
+from .quota import week_of
+from .rut import normalize_rut, rut_check_digit
+from .search import PrefixIndex
+from .waitlist import queue_position
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Los endpoints de lectura deben ejecutar el mismo número de consultas sin importar
+    cuántas filas devuelvan.
+    """
+    BUDGETS = {
+        'user-list': 1,
+        'band-list': 2,
+        'bandmember-list': 1,
+        'reservation-list': 2,
+        'guest-list': 1,
+        'invitation-list': 1,
+        'current-user': 3,
+        'dashboard-stats': 1,
+        'waitlistentry-list': 2,
+    }
+
+    def setUp(self):
+        self.room = Room.objects.create(name='Sala 1', capacity=10)
+        self.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9', is_udp=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.seeded = 0
+
+    def seed(self, count):
+        base = timezone.now().replace(hour=8, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        for i in range(self.seeded, self.seeded + count):
+            band = Band.objects.create(name=f'Banda {i}', is_approved=True)
+            member = User.objects.create_user(username=f'user{i}', password='secret123', ruf=f'{i}-K')
+            BandMember.objects.create(band=band, user=self.user)
+            BandMember.objects.create(band=band, user=member)
+            reservation = Reservation.objects.create(
+                band=band,
+                room=self.room,
+                start_time=base + timedelta(hours=i),
+                end_time=base + timedelta(hours=i, minutes=30),
+            )
+            Guest.objects.create(reservation=reservation, user=member)
+            Invitation.objects.create(reservation=reservation, invited_user=member)
+            # Todas esperan el primer horario: la posición depende de las demás entradas
+            WaitlistEntry.objects.create(band=band, room=self.room, requested_by=member,
+                                         start_time=base, end_time=base + timedelta(minutes=30))
+        self.seeded += count
+
+    def count_queries(self):
+        counts = {}
+        for name in self.BUDGETS:
+            # Partir siempre del cache vacío: los caches no deben ocultar consultas en la medición
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200, name)
+            counts[name] = len(context)
+        return counts
+
+    def test_query_budget_does_not_grow_with_rows(self):
+        self.seed(2)
+        small = self.count_queries()
+        self.seed(10)
+        large = self.count_queries()
+
+        for name, budget in self.BUDGETS.items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(small[name], large[name])
+                self.assertLessEqual(large[name], budget)
+
+
+class QueryPlanTests(TestCase):
+    """
+    Las consultas más frecuentes deben resolverse con índices. Con enable_seqscan
+    desactivado el planificador sólo elige un Seq Scan cuando no hay índice que sirva.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.rooms = [Room.objects.create(name=f'Sala {i}', capacity=10) for i in range(3)]
+        cls.bands = [Band.objects.create(name=f'Banda {i}', is_approved=True) for i in range(5)]
+        cls.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9')
+        BandMember.objects.bulk_create([BandMember(band=band, user=cls.user) for band in cls.bands])
+        cls.base = timezone.now().replace(hour=8, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        reservations = []
+        for day in range(20):
+            for i, room in enumerate(cls.rooms):
+                start_time = cls.base + timedelta(days=day, hours=i)
+                end_time = start_time + timedelta(hours=1)
+                reservations.append(Reservation(
+                    band=cls.bands[(day + i) % len(cls.bands)],
+                    room=room,
+                    start_time=start_time,
+                    end_time=end_time,
+                    period=Reservation.build_period(start_time, end_time),
+                ))
+        Reservation.objects.bulk_create(reservations)
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            # SET LOCAL dura hasta el fin de la transacción del test
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def queries(self):
+        room, band = self.rooms[0], self.bands[0]
+        start_time = self.base + timedelta(days=3)
+        end_time = start_time + timedelta(hours=2)
+        return {
+            'overlap-check': Reservation.objects.filter(room=room, start_time__lt=end_time, end_time__gt=start_time),
+            'room-availability': Reservation.objects.filter(
+                room=room, period__overlap=DateTimeTZRange(start_time, end_time, '[)'),
+            ).values_list('start_time', 'end_time'),
+            'band-upcoming': Reservation.objects.filter(band=band, start_time__gte=timezone.now()),
+            'reservation-page': Reservation.objects.order_by('start_time', 'id')[:50],
+            'user-bands': BandMember.objects.filter(user=self.user).values_list('band_id', flat=True),
+            'band-member': BandMember.objects.filter(band=band, user=self.user),
+            'week-usage': BandWeekUsage.objects.filter(band=band, week=week_of(start_time)),
+        }
+
+    def test_hot_queries_use_indexes(self):
+        for name, queryset in self.queries().items():
+            with self.subTest(query=name):
+                plan = queryset.explain()
+                self.assertNotIn('Seq Scan', plan, f"{name}:\n{plan}")
+
+
+class PrefixIndexTests(SimpleTestCase):
+    """
+    Respaldo de la búsqueda de bandas sin pg_trgm.
+    """
+
+    def setUp(self):
+        self.index = PrefixIndex([
+            (1, 'Los Cañones'),
+            (2, 'Cañon'),
+            (3, 'Canon Rock'),
+            (4, 'Jazz Quartet'),
+        ])
+
+    def test_matches_word_prefixes_ignoring_case_and_accents(self):
+        self.assertEqual(self.index.search('CAN', 10), [2, 3, 1])
+        self.assertEqual(self.index.search('quar', 10), [4])
+
+    def test_every_token_must_match(self):
+        self.assertEqual(self.index.search('canon ro', 10), [3])
+        self.assertEqual(self.index.search('canon jazz', 10), [])
+
+    def test_result_size_is_capped(self):
+        self.assertEqual(len(self.index.search('c', 2)), 2)
+
+
+class NormalizeRutTests(SimpleTestCase):
+
+    def test_canonical_form(self):
+        self.assertEqual(normalize_rut('12.345.678-5'), '12345678-5')
+        self.assertEqual(normalize_rut(' 7654321k '), '7654321-K')
+        self.assertIsNone(normalize_rut('abc'))
+
+    def test_check_digit_validation(self):
+        self.assertEqual(normalize_rut('12.345.678-5', validate=True), '12345678-5')
+        self.assertIsNone(normalize_rut('12.345.678-4', validate=True))
+        self.assertEqual(normalize_rut('7.654.321-6', validate=True), '7654321-6')
+
+
+class BearerTokenTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='owner', password='secret123', ruf='1-9')
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/api/application/login/', {'username': 'owner', 'password': 'secret123'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # Descartar la cookie de sesión: sólo debe autenticar el token
+        self.client.cookies.clear()
+        return response.data['token']
+
+    def test_token_authenticates_until_revoked(self):
+        token = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get(reverse('current-user')).status_code, 200)
+
+        self.assertEqual(self.client.post('/api/application/logout/').status_code, 200)
+        self.assertEqual(self.client.get(reverse('current-user')).status_code, 401)
+
+    def test_password_change_revokes_tokens(self):
+        token = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.get(reverse('current-user')).status_code, 200)
+
+        user = User.objects.get(username='owner')
+        user.last_name = 'Nuevo'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(self.client.get(reverse('current-user')).status_code, 200)
+
+        user.set_password('another123')
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertEqual(self.client.get(reverse('current-user')).status_code, 401)
+
+    def test_tampered_token_is_rejected(self):
+        token = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}x')
+        self.assertEqual(self.client.get(reverse('current-user')).status_code, 401)
+
+
+class GuestCapacityTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        room = Room.objects.create(name='Sala 1', capacity=2)
+        self.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9', is_udp=True)
+        band = Band.objects.create(name='Banda', is_approved=True)
+        BandMember.objects.create(band=band, user=self.user)
+        start_time = timezone.now() + timedelta(days=1)
+        self.reservation = Reservation.objects.create(band=band, room=room, start_time=start_time,
+                                                      end_time=start_time + timedelta(hours=1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_add_rejects_the_overflow(self):
+        response = self.client.post(reverse('guest-bulk'), {
+            'reservation': self.reservation.pk,
+            'guests': [{'name': 'Ana'}, {'name': 'Beto'}, {'name': 'Carla'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['accepted']), 2)
+        self.assertEqual([item['index'] for item in response.data['rejected']], [2])
+
+        self.reservation.refresh_from_db()
+        self.assertEqual(self.reservation.guest_count, 2)
+
+        response = self.client.post(reverse('guest-list'), {'reservation': self.reservation.pk, 'name': 'Dani'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_deleting_a_guest_frees_a_place(self):
+        guest = Guest.objects.create(reservation=self.reservation, name='Ana')
+        Guest.objects.create(reservation=self.reservation, name='Beto')
+        guest.delete()
+        self.reservation.refresh_from_db()
+        self.assertEqual(self.reservation.guest_count, 1)
+
+    def test_moving_a_guest_respects_the_new_reservation_capacity(self):
+        start_time = self.reservation.end_time
+        full = Reservation.objects.create(band=self.reservation.band, room=self.reservation.room,
+                                          start_time=start_time, end_time=start_time + timedelta(hours=1))
+        Guest.objects.create(reservation=full, name='Ana')
+        Guest.objects.create(reservation=full, name='Beto')
+        guest = Guest.objects.create(reservation=self.reservation, name='Carla')
+
+        url = reverse('guest-detail', args=[guest.pk])
+        response = self.client.patch(url, {'reservation': full.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        Guest.objects.filter(reservation=full, name='Beto').delete()
+        response = self.client.patch(url, {'reservation': full.pk}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.reservation.refresh_from_db()
+        full.refresh_from_db()
+        self.assertEqual((self.reservation.guest_count, full.guest_count), (0, 2))
+
+
+class FailingTransport:
+    def send(self, notification):
+        raise ConnectionError("SMTP no disponible")
+
+
+class NotificationOutboxTests(TestCase):
+
+    def setUp(self):
+        room = Room.objects.create(name='Sala 1', capacity=10)
+        band = Band.objects.create(name='Banda', is_approved=True)
+        start_time = timezone.now() + timedelta(days=1)
+        self.reservation = Reservation.objects.create(band=band, room=room, start_time=start_time,
+                                                      end_time=start_time + timedelta(hours=1))
+
+    def invite(self):
+        return Invitation.objects.create(reservation=self.reservation, invited_name='Ana',
+                                         invited_email='ana@example.com')
+
+    def test_invitation_is_queued_and_sent_by_the_worker(self):
+        invitation = self.invite()
+        self.assertEqual(len(mail.outbox), 0)
+        # Guardar de nuevo no vuelve a encolar el aviso
+        invitation.save()
+        self.assertEqual(Notification.objects.filter(kind='invitation.created').count(), 1)
+
+        call_command('send_notifications', '--once', stdout=StringIO())
+
+        self.assertEqual([message.to for message in mail.outbox], [['ana@example.com']])
+        self.assertEqual(Notification.objects.get(kind='invitation.created').status, Notification.Status.SENT)
+
+    @override_settings(NOTIFICATION_TRANSPORT='application.tests.FailingTransport')
+    def test_failures_are_retried_with_backoff(self):
+        self.invite()
+        call_command('send_notifications', '--once', stdout=StringIO())
+
+        notification = Notification.objects.get(kind='invitation.created')
+        self.assertEqual(notification.status, Notification.Status.PENDING)
+        self.assertEqual(notification.attempts, 1)
+        self.assertGreater(notification.next_attempt_at, timezone.now())
+        self.assertIn('SMTP no disponible', notification.last_error)
+
+
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9', is_udp=True)
+        self.band = Band.objects.create(name='Banda Uno', is_approved=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_matching_etag_returns_304_without_queries(self):
+        url = reverse('band-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+        # El 304 se decide con el cache: no se ejecutan ni la consulta ni los serializers
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_invalidate_list_and_detail(self):
+        list_url = reverse('band-list')
+        detail_url = reverse('band-detail', args=[self.band.pk])
+        list_etag = self.client.get(list_url)['ETag']
+        detail_etag = self.client.get(detail_url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Band.objects.create(name='Banda Dos', is_approved=True)
+        self.assertEqual(self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BandMember.objects.create(band=self.band, user=self.user)
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['members']), 1)
+
+
+class CalendarFeedTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.room = Room.objects.create(name='Sala 1', capacity=10)
+        self.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9', is_udp=True)
+        self.band = Band.objects.create(name='Banda, Uno', is_approved=True)
+        BandMember.objects.create(band=self.band, user=self.user)
+        start_time = timezone.now() + timedelta(days=1)
+        self.upcoming = Reservation.objects.create(band=self.band, room=self.room, start_time=start_time,
+                                                   end_time=start_time + timedelta(hours=1))
+        start_time = timezone.now() - timedelta(days=30)
+        self.past = Reservation.objects.create(band=self.band, room=self.room, start_time=start_time,
+                                               end_time=start_time + timedelta(hours=1))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.url = client.get(reverse('calendar-feed')).data['feeds'][0]['url']
+        # Los clientes de calendario no tienen sesión ni encabezado Authorization
+        self.client = APIClient()
+
+    def fetch(self, **headers):
+        response = self.client.get(self.url, **headers)
+        content = b''.join(response.streaming_content).decode() if response.status_code == 200 else ''
+        return response, content
+
+    def test_feed_lists_the_band_reservations_in_the_window(self):
+        response, content = self.fetch()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertTrue(content.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn(f'UID:reservation-{self.upcoming.pk}@bandas-udp', content)
+        self.assertIn(f'UID:reservation-{self.past.pk}@bandas-udp', content)
+        self.assertIn('SUMMARY:Banda\\, Uno - Sala 1', content)
+
+        with override_settings(ICAL_HISTORY_DAYS=7):
+            _, content = self.fetch()
+        self.assertNotIn(f'UID:reservation-{self.past.pk}@bandas-udp', content)
+
+    def test_rotating_the_key_revokes_previous_links(self):
+        self.assertEqual(self.fetch()[0].status_code, 200)
+        self.user.refresh_from_db()
+        rotate_feed_key(self.user)
+        self.assertEqual(self.fetch()[0].status_code, 403)
+
+    def test_conditional_get_follows_writes_and_the_window(self):
+        response, _ = self.fetch()
+        etag = response['ETag']
+        self.assertEqual(self.fetch(HTTP_IF_NONE_MATCH=etag)[0].status_code, 304)
+
+        # El sello no cambia, pero la ventana de días sí
+        with override_settings(ICAL_HISTORY_DAYS=7):
+            self.assertEqual(self.fetch(HTTP_IF_NONE_MATCH=etag)[0].status_code, 200)
+
+        start_time = self.upcoming.end_time + timedelta(hours=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Reservation.objects.create(band=self.band, room=self.room, start_time=start_time,
+                                       end_time=start_time + timedelta(hours=1))
+        self.assertEqual(self.fetch(HTTP_IF_NONE_MATCH=etag)[0].status_code, 200)
+
+
+def valid_rut(body):
+    return f'{body}-{rut_check_digit(body)}'
+
+
+class ImportRosterTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'roster.csv'
+        self.existing = User.objects.create_user(username='ana.login', password='secret123',
+                                                 ruf=valid_rut(11111111), email='ana@old.cl')
+
+    def run_import(self, rows):
+        with open(self.path, 'w', newline='') as handle:
+            writer = csv.DictWriter(handle, fieldnames=['ruf', 'username', 'email', 'password'])
+            writer.writeheader()
+            writer.writerows(rows)
+        out, err = StringIO(), StringIO()
+        call_command('import_roster', str(self.path), stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_creates_new_users_and_updates_existing_ones(self):
+        out, _ = self.run_import([
+            {'ruf': '11.111.111-1', 'email': 'ana@new.cl'},
+            {'ruf': valid_rut(22222222), 'username': 'beto', 'email': 'beto@udp.cl', 'password': 'clave-beto'},
+        ])
+
+        self.assertIn('1 creados, 1 actualizados, 0 omitidos', out)
+        self.existing.refresh_from_db()
+        # Sin columna username se conserva el login del usuario existente
+        self.assertEqual((self.existing.username, self.existing.email), ('ana.login', 'ana@new.cl'))
+        self.assertTrue(self.existing.check_password('secret123'))
+        beto = User.objects.get(ruf_normalized=valid_rut(22222222))
+        self.assertEqual(beto.username, 'beto')
+        self.assertTrue(beto.check_password('clave-beto'))
+        self.assertTrue(beto.is_udp)
+
+    def test_rerunning_the_same_file_creates_nothing(self):
+        rows = [{'ruf': valid_rut(22222222), 'email': 'beto@udp.cl'}]
+        self.run_import(rows)
+        out, _ = self.run_import(rows)
+
+        self.assertIn('0 creados, 1 actualizados', out)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(User.objects.get(ruf_normalized=valid_rut(22222222)).username, valid_rut(22222222))
+
+    def test_bad_rows_are_skipped_with_a_reason(self):
+        out, err = self.run_import([
+            {'ruf': '12345678-0', 'username': 'rut-malo'},
+            {'ruf': valid_rut(33333333), 'username': 'ana.login'},
+            {'ruf': valid_rut(44444444), 'username': 'repetido'},
+            {'ruf': valid_rut(55555555), 'username': 'repetido'},
+        ])
+
+        self.assertIn('1 creados, 0 actualizados, 3 omitidos', out)
+        self.assertIn('RUT inválido', err)
+        self.assertIn("el username 'ana.login' ya está en uso", err)
+        self.assertIn("el username 'repetido' está repetido en el archivo", err)
+        self.assertEqual(User.objects.get(username='repetido').ruf_normalized, valid_rut(44444444))
+
+
+class WaitlistTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        GlobalSettings.objects.create(max_reservations_per_band_week=2)
+        invalidate_global_settings()
+        self.room = Room.objects.create(name='Sala 1', capacity=10)
+        self.start = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=2)
+        self.holder = Band.objects.create(name='Titular', is_approved=True)
+        self.reservation = Reservation.objects.create(band=self.holder, room=self.room, start_time=self.start,
+                                                      end_time=self.start + timedelta(hours=1))
+        self.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9', is_udp=True)
+        self.band = Band.objects.create(name='En espera', is_approved=True)
+        BandMember.objects.create(band=self.band, user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def wait(self, band, start_time, end_time, priority=0):
+        return WaitlistEntry.objects.create(band=band, room=self.room, start_time=start_time,
+                                            end_time=end_time, priority=priority)
+
+    def test_retries_share_one_entry_that_is_promoted_on_delete(self):
+        payload = {'band': self.band.pk, 'room': self.room.pk, 'start_time': self.start.isoformat(),
+                   'end_time': (self.start + timedelta(hours=1)).isoformat()}
+        self.assertEqual(self.client.post(reverse('waitlistentry-list'), payload).status_code, 201)
+        response = self.client.post(reverse('waitlistentry-list'), payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['position'], 1)
+        self.assertEqual(WaitlistEntry.objects.count(), 1)
+
+        self.reservation.delete()
+
+        entry = WaitlistEntry.objects.get()
+        self.assertEqual(entry.status, WaitlistEntry.Status.PROMOTED)
+        self.assertEqual(entry.reservation.band, self.band)
+        self.assertEqual(BandWeekUsage.objects.get(band=self.band).used, 1)
+
+    def test_higher_priority_is_promoted_first(self):
+        end_time = self.start + timedelta(hours=1)
+        first = self.wait(self.band, self.start, end_time)
+        other = Band.objects.create(name='Prioritaria', is_approved=True)
+        priority = self.wait(other, self.start, end_time, priority=5)
+
+        self.reservation.delete()
+
+        first.refresh_from_db()
+        priority.refresh_from_db()
+        self.assertEqual(priority.status, WaitlistEntry.Status.PROMOTED)
+        self.assertEqual(first.status, WaitlistEntry.Status.WAITING)
+
+    def test_list_positions_match_queue_position(self):
+        end_time = self.start + timedelta(hours=1)
+        first = self.wait(self.band, self.start, end_time)
+        other = Band.objects.create(name='Prioritaria', is_approved=True)
+        BandMember.objects.create(band=other, user=self.user)
+        priority = self.wait(other, self.start + timedelta(minutes=30), end_time, priority=5)
+
+        response = self.client.get(reverse('waitlistentry-list'))
+
+        positions = {item['id']: item['position'] for item in response.data['results']}
+        self.assertEqual(positions, {priority.pk: 1, first.pk: 2})
+        self.assertEqual(positions[first.pk], queue_position(first))
+
+    def test_shortening_a_reservation_promotes_into_the_freed_part(self):
+        entry = self.wait(self.band, self.start + timedelta(minutes=30), self.start + timedelta(hours=1))
+
+        self.reservation.end_time = self.start + timedelta(minutes=30)
+        self.reservation.save()
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, WaitlistEntry.Status.PROMOTED)
+
+
+class AllocationSolverTests(SimpleTestCase):
+
+    def test_less_used_band_wins_and_the_other_gets_its_next_choice(self):
+        requests = {1: [('sala', 20, 21), ('sala', 21, 22)], 2: [('sala', 20, 21)]}
+        order = draft_order([1, 2], {1: 5, 2: 0}, random.Random(1))
+        assigned = solve(requests, defaultdict(list), defaultdict(list), {1: 2, 2: 2}, order)
+        self.assertEqual(dict(assigned), {2: [0], 1: [1]})
+
+    def test_quota_and_own_overlaps_are_respected(self):
+        requests = {1: [('a', 20, 21), ('b', 20, 21), ('a', 21, 22), ('a', 18, 19)]}
+        assigned = solve(requests, defaultdict(list), defaultdict(list), {1: 2}, [1])
+        # La sala "b" a la misma hora se salta: la banda no puede estar en dos salas a la vez
+        self.assertEqual(assigned[1], [0, 2])
+
+
+class AllocationRoundTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        GlobalSettings.objects.create(max_reservations_per_band_week=1)
+        invalidate_global_settings()
+        self.room = Room.objects.create(name='Sala 1', capacity=10)
+        today = timezone.localdate()
+        self.week = today + timedelta(days=7 - today.weekday())
+        now = timezone.now()
+        self.round = AllocationRound.objects.create(week=self.week, opens_at=now - timedelta(days=1),
+                                                    closes_at=now + timedelta(days=1))
+        self.evening = timezone.make_aware(datetime.combine(self.week, time(20)))
+        self.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9', is_udp=True)
+        self.band = Band.objects.create(name='Banda', is_approved=True)
+        BandMember.objects.create(band=self.band, user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def prefer(self, band, start_time, rank):
+        return SlotPreference.objects.create(allocation_round=self.round, band=band, room=self.room,
+                                             start_time=start_time, end_time=start_time + timedelta(hours=1),
+                                             rank=rank)
+
+    def test_direct_booking_in_the_window_is_rejected_while_open(self):
+        response = self.client.post(reverse('reservation-list'), {
+            'band': self.band.pk, 'room': self.room.pk, 'start_time': self.evening.isoformat(),
+            'end_time': (self.evening + timedelta(hours=1)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Reservation.objects.exists())
+
+    def test_reservations_cannot_move_or_be_promoted_into_the_window(self):
+        morning = self.evening.replace(hour=10)
+        holder = Reservation.objects.create(band=self.band, room=self.room, start_time=morning,
+                                            end_time=morning + timedelta(hours=1))
+        response = self.client.patch(reverse('reservation-detail', args=[holder.pk]), {
+            'band': self.band.pk,
+            'start_time': self.evening.isoformat(),
+            'end_time': (self.evening + timedelta(hours=1)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('lotes', str(response.data))
+        holder.delete()
+
+        # Una entrada anotada antes de abrir la ronda sigue esperando mientras esté abierta
+        other = Band.objects.create(name='Otra', is_approved=True)
+        blocker = Reservation.objects.create(band=other, room=self.room, start_time=self.evening,
+                                             end_time=self.evening + timedelta(hours=1))
+        entry = WaitlistEntry.objects.create(band=self.band, room=self.room, start_time=self.evening,
+                                             end_time=self.evening + timedelta(hours=1))
+        blocker.delete()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, WaitlistEntry.Status.WAITING)
+        self.assertIn('lotes', entry.last_error)
+        self.assertFalse(Reservation.objects.filter(start_time=self.evening).exists())
+
+    def test_command_assigns_all_rounds_in_one_pass(self):
+        other = Band.objects.create(name='Otra', is_approved=True)
+        first = self.prefer(self.band, self.evening, 1)
+        second = self.prefer(self.band, self.evening + timedelta(hours=1), 2)
+        contested = self.prefer(other, self.evening, 1)
+        # La banda que más usó las salas elige después
+        BandWeekUsage.objects.create(band=self.band, week=self.week - timedelta(weeks=1), used=3)
+
+        call_command('allocate_slots', '--force', '--seed', '7', stdout=StringIO())
+
+        for preference in (first, second, contested):
+            preference.refresh_from_db()
+        self.assertIsNotNone(contested.reservation)
+        self.assertIsNone(first.reservation)
+        self.assertIsNotNone(second.reservation)
+        self.assertEqual(Reservation.objects.count(), 2)
+        self.assertEqual(BandWeekUsage.objects.get(band=self.band, week=self.week).used, 1)
+        self.round.refresh_from_db()
+        self.assertEqual((self.round.status, self.round.seed), (AllocationRound.Status.ALLOCATED, 7))
+
+
+class ReservationConflictTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        GlobalSettings.objects.create(max_reservations_per_band_week=3)
+        invalidate_global_settings()
+        self.room = Room.objects.create(name='Sala 1', capacity=10)
+        self.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9', is_udp=True)
+        self.band = Band.objects.create(name='Banda', is_approved=True)
+        BandMember.objects.create(band=self.band, user=self.user)
+        self.start = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_overlap_caught_by_the_exclusion_constraint_returns_409(self):
+        # bulk_create no marca el bitmap: sólo la restricción de exclusión detecta el choque
+        other = Band.objects.create(name='Otra', is_approved=True)
+        end_time = self.start + timedelta(hours=1)
+        Reservation.objects.bulk_create([Reservation(band=other, room=self.room, start_time=self.start,
+                                                     end_time=end_time,
+                                                     period=Reservation.build_period(self.start, end_time))])
+
+        response = self.client.post(reverse('reservation-list'), {
+            'band': self.band.pk,
+            'room': self.room.pk,
+            'start_time': (self.start + timedelta(minutes=30)).isoformat(),
+            'end_time': (end_time + timedelta(minutes=30)).isoformat(),
+        }, format='json')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['detail'].code, 'reservation_conflict')
+        # El descuento de la cuota se revierte junto con el INSERT
+        self.assertFalse(BandWeekUsage.objects.filter(band=self.band, used__gt=0).exists())
+        self.assertEqual(Reservation.objects.filter(band=self.band).count(), 0)
+
+    def test_writes_that_skip_save_cannot_leave_a_stale_period(self):
+        reservation = Reservation.objects.create(band=self.band, room=self.room, start_time=self.start,
+                                                 end_time=self.start + timedelta(hours=1))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Reservation.objects.filter(pk=reservation.pk).update(end_time=self.start + timedelta(hours=2))
+
+
+class BulkReservationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        GlobalSettings.objects.create(max_reservations_per_band_week=1)
+        invalidate_global_settings()
+        self.room = Room.objects.create(name='Sala 1', capacity=10)
+        self.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9', is_udp=True)
+        self.band = Band.objects.create(name='Banda', is_approved=True)
+        BandMember.objects.create(band=self.band, user=self.user)
+        self.start = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def interval(self, hours):
+        start_time = self.start + timedelta(hours=hours)
+        return {'start_time': start_time.isoformat(), 'end_time': (start_time + timedelta(hours=1)).isoformat()}
+
+    def test_accepts_what_fits_and_rejects_the_rest_with_a_reason(self):
+        other = Band.objects.create(name='Otra', is_approved=True)
+        Reservation.objects.create(band=other, room=self.room, start_time=self.start,
+                                   end_time=self.start + timedelta(hours=1))
+
+        response = self.client.post(reverse('reservation-bulk'), {
+            'band': self.band.pk,
+            'room': self.room.pk,
+            'intervals': [self.interval(0), self.interval(2), self.interval(4)],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['index'] for item in response.data['accepted']], [1])
+        reasons = {item['index']: item['reason'] for item in response.data['rejected']}
+        self.assertEqual(reasons[0], "La sala ya está reservada en el horario seleccionado.")
+        self.assertIn(2, reasons)
+        self.assertEqual(BandWeekUsage.objects.get(band=self.band, week=week_of(self.start)).used, 1)
+        self.assertEqual(Reservation.objects.filter(band=self.band).count(), 1)
+
+    def test_nothing_accepted_returns_400(self):
+        response = self.client.post(reverse('reservation-bulk'), {
+            'band': self.band.pk,
+            'room': self.room.pk,
+            'intervals': [{'start_time': self.interval(0)['start_time'],
+                           'end_time': (self.start + timedelta(hours=3)).isoformat()}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['accepted'], [])
+        self.assertEqual(Reservation.objects.count(), 0)
+
+
+class ReservationQuotaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        GlobalSettings.objects.create(max_reservations_per_band_week=1)
+        invalidate_global_settings()
+        self.room = Room.objects.create(name='Sala 1', capacity=10)
+        self.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9', is_udp=True)
+        self.guest = User.objects.create_user(username='guest', password='secret123', ruf='2-7')
+        self.band = Band.objects.create(name='Banda', is_approved=True)
+        BandMember.objects.create(band=self.band, user=self.user)
+        self.start = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def book(self, start_time):
+        # Mismo cuerpo que envía el formulario de reservas del frontend
+        return self.client.post(reverse('reservation-list'), {
+            'band': self.band.pk,
+            'room': self.room.pk,
+            'start_time': start_time.isoformat(),
+            'end_time': (start_time + timedelta(hours=1)).isoformat(),
+            'guests': [self.guest.pk],
+        }, format='json')
+
+    def test_booking_with_guests_consumes_the_weekly_quota(self):
+        response = self.book(self.start)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['guests'], [self.guest.pk])
+        self.assertEqual(response.data['guest_count'], 1)
+        self.assertTrue(Guest.objects.filter(reservation_id=response.data['id'], user=self.guest).exists())
+        self.assertEqual(BandWeekUsage.objects.get(band=self.band, week=week_of(self.start)).used, 1)
+
+        response = self.book(self.start + timedelta(hours=2))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_guests_over_capacity_reject_the_whole_booking(self):
+        self.room.capacity = 1
+        self.room.save()
+        other = User.objects.create_user(username='other', password='secret123', ruf='3-5')
+
+        response = self.client.post(reverse('reservation-list'), {
+            'band': self.band.pk,
+            'room': self.room.pk,
+            'start_time': self.start.isoformat(),
+            'end_time': (self.start + timedelta(hours=1)).isoformat(),
+            'guests': [self.guest.pk, other.pk],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Reservation.objects.count(), 0)
+        self.assertFalse(BandWeekUsage.objects.filter(band=self.band, used__gt=0).exists())
+
+    def test_deleting_the_reservation_releases_the_quota(self):
+        reservation_id = self.book(self.start).data['id']
+        self.client.delete(reverse('reservation-detail', args=[reservation_id]))
+        self.assertEqual(BandWeekUsage.objects.get(band=self.band, week=week_of(self.start)).used, 0)
+        self.assertEqual(self.book(self.start).status_code, 201)
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        room = Room.objects.create(name='Sala 1', capacity=10)
+        self.band = Band.objects.create(name='Banda', is_approved=True)
+        start_time = timezone.now() - timedelta(days=30)
+        self.reservation = Reservation.objects.create(band=self.band, room=room, start_time=start_time,
+                                                      end_time=start_time + timedelta(hours=1))
+        Guest.objects.create(reservation=self.reservation, name='Ana')
+
+    def archive(self):
+        moved = archive_chunk(timezone.now(), 100)
+        # Las claves foráneas son diferidas: comprobarlas como lo haría el commit
+        connection.check_constraints()
+        return moved
+
+    def test_finished_reservations_move_with_their_guests(self):
+        start_time = timezone.now() + timedelta(days=1)
+        upcoming = Reservation.objects.create(band=self.band, room=self.reservation.room, start_time=start_time,
+                                              end_time=start_time + timedelta(hours=1))
+
+        self.assertEqual(self.archive(), 1)
+
+        self.assertEqual(list(Reservation.objects.values_list('id', flat=True)), [upcoming.pk])
+        archived = ArchivedReservation.objects.get(pk=self.reservation.pk)
+        self.assertEqual((archived.band_id, archived.start_time), (self.band.pk, self.reservation.start_time))
+        self.assertEqual(list(archived.guests.values_list('name', flat=True)), ['Ana'])
+        self.assertFalse(Guest.objects.filter(reservation_id=self.reservation.pk).exists())
+        self.assertEqual(self.archive(), 0)
+
+    def test_each_chunk_moves_at_most_chunk_size_reservations(self):
+        start_time = self.reservation.start_time - timedelta(days=1)
+        Reservation.objects.create(band=self.band, room=self.reservation.room, start_time=start_time,
+                                   end_time=start_time + timedelta(hours=1))
+
+        self.assertEqual(archive_chunk(timezone.now(), 1), 1)
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(archive_chunk(timezone.now(), 1), 1)
+        self.assertEqual(ArchivedReservation.objects.count(), 2)
+
+    def test_promoted_waitlist_entries_are_unlinked(self):
+        entry = WaitlistEntry.objects.create(band=self.band, room=self.reservation.room,
+                                             start_time=self.reservation.start_time,
+                                             end_time=self.reservation.end_time,
+                                             status=WaitlistEntry.Status.PROMOTED, reservation=self.reservation)
+        self.assertEqual(self.archive(), 1)
+        entry.refresh_from_db()
+        self.assertIsNone(entry.reservation_id)
+
+    def test_allocated_preferences_are_unlinked(self):
+        start_time = self.reservation.start_time
+        allocation_round = AllocationRound.objects.create(
+            week=week_of(start_time), opens_at=start_time - timedelta(days=7), closes_at=start_time - timedelta(days=1),
+            status=AllocationRound.Status.ALLOCATED,
+        )
+        preference = SlotPreference.objects.create(allocation_round=allocation_round, band=self.band,
+                                                   room=self.reservation.room, start_time=start_time,
+                                                   end_time=self.reservation.end_time, rank=1,
+                                                   reservation=self.reservation)
+        self.assertEqual(self.archive(), 1)
+        preference.refresh_from_db()
+        self.assertIsNone(preference.reservation_id)
+
+
+class DashboardStatsTests(TestCase):
+
+    def setUp(self):
+        room = Room.objects.create(name='Sala 1', capacity=10)
+        self.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9', is_udp=True)
+        start_time = timezone.now() + timedelta(days=1)
+        self.bands = []
+        for name, offset in (('Banda', 0), ('Otra', 2)):
+            band = Band.objects.create(name=name, is_approved=True)
+            BandMember.objects.create(band=band, user=self.user)
+            Reservation.objects.create(band=band, room=room, start_time=start_time + timedelta(hours=offset),
+                                       end_time=start_time + timedelta(hours=offset + 1))
+            self.bands.append(band)
+
+    def test_deleting_a_band_removes_its_reservations_from_members(self):
+        self.bands[0].delete()
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual((stats.band_count, stats.total_reservations, stats.upcoming_reservations), (1, 1, 1))
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                         'LOCATION': 'redis://localhost:6379'}}
+
+    def test_local_cache_is_rejected_with_several_workers(self):
+        with self.settings(CACHES=self.LOCMEM, WEB_CONCURRENCY=4):
+            self.assertEqual([error.id for error in check_shared_cache()], ['backend.E001'])
+        with self.settings(CACHES=self.LOCMEM, WEB_CONCURRENCY=1):
+            self.assertEqual(check_shared_cache(), [])
+        with self.settings(CACHES=self.REDIS, WEB_CONCURRENCY=4):
+            self.assertEqual(check_shared_cache(), [])
+
+    def test_in_process_broker_is_rejected_with_several_workers(self):
+        in_process, shared = 'application.events.InProcessBroker', 'application.events.CacheBroker'
+        with self.settings(EVENTS_BROKER=in_process, WEB_CONCURRENCY=4):
+            self.assertEqual([error.id for error in check_events_broker()], ['backend.E002'])
+        with self.settings(EVENTS_BROKER=in_process, WEB_CONCURRENCY=1):
+            self.assertEqual(check_events_broker(), [])
+        with self.settings(EVENTS_BROKER=shared, WEB_CONCURRENCY=4):
+            self.assertEqual(check_events_broker(), [])
+
+
+class CacheBrokerTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.broker = CacheBroker()
+
+    def test_reader_waits_for_an_event_that_is_still_being_published(self):
+        self.broker.publish({'id': 1})
+        # Otro worker ya tomó el número 2 pero todavía no escribe el evento
+        cache.incr(CacheBroker.SEQ_KEY)
+        events, last_seq, gap = self.broker.read_since(0)
+        self.assertEqual((events, last_seq, gap), ([{'id': 1}], 1, 2))
+
+        cache.set(self.broker.event_key(2), {'id': 2})
+        self.assertEqual(self.broker.read_since(last_seq, gap), ([{'id': 2}], 2, None))
+
+    def test_an_event_missing_twice_is_skipped(self):
+        cache.add(CacheBroker.SEQ_KEY, 0, None)
+        cache.incr(CacheBroker.SEQ_KEY)
+        self.broker.publish({'id': 2})
+        events, last_seq, gap = self.broker.read_since(0)
+        self.assertEqual(events, [])
+        self.assertEqual(self.broker.read_since(last_seq, gap), ([{'id': 2}], 2, None))
+
+
+class ReservationEventsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='secret123', ruf='1-9')
+        self.start = timezone.now() + timedelta(days=1)
+
+    def event(self, room_id):
+        return reservation_event('created', 1, room_id, 2, self.start, self.start + timedelta(hours=1))
+
+    async def test_stream_sends_only_the_requested_rooms(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('reservation-events'), {'room': '1'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+            get_broker().publish(self.event(room_id=5))
+            get_broker().publish(self.event(room_id=1))
+            chunk = (await asyncio.wait_for(anext(stream), timeout=2)).decode()
+        finally:
+            await stream.aclose()
+
+        name, data = chunk.strip().split('\n')
+        self.assertEqual(name, 'event: reservation.created')
+        self.assertEqual(json.loads(data.removeprefix('data: ')), self.event(room_id=1))
+
+    async def test_anonymous_requests_are_rejected(self):
+        response = await self.async_client.get(reverse('reservation-events'))
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,79 @@
+# application/tokens.py
+
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+
+from .membership import membership_cache_key
+from .models import AuthToken
+
+SALT = 'application.tokens'
+
+
+def token_cache_key(jti):
+    return f"auth:token:{jti}"
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def issue_token(user):
+    """
+    Crea un token firmado que expira en AUTH_TOKEN_TTL segundos. Devuelve (token, expires_at).
+    """
+    expires_at = timezone.now() + timedelta(seconds=settings.AUTH_TOKEN_TTL)
+    token = AuthToken.objects.create(jti=secrets.token_hex(16), user=user, expires_at=expires_at)
+    return signing.dumps({'uid': user.pk, 'jti': token.jti}, salt=SALT), expires_at
+
+
+def resolve_token(raw):
+    """
+    Devuelve (user, jti, band_ids) para un token válido o None.
+
+    La firma y la expiración se comprueban sin tocar la base de datos. La validez del
+    token, el usuario y sus bandas se leen del cache con un solo get_many; sólo si
+    falta alguno de los dos primeros se consulta AuthToken junto con el usuario.
+    `band_ids` es None cuando las bandas no están en el cache.
+    """
+    try:
+        payload = signing.loads(raw, salt=SALT, max_age=settings.AUTH_TOKEN_TTL)
+    except signing.BadSignature:
+        return None
+    user_id, jti = payload.get('uid'), payload.get('jti')
+
+    keys = [token_cache_key(jti), user_cache_key(user_id), membership_cache_key(user_id)]
+    cached = cache.get_many(keys)
+    user = cached.get(keys[1])
+    if keys[0] not in cached or user is None:
+        token = AuthToken.objects.select_related('user').filter(
+            jti=jti, user_id=user_id, revoked_at__isnull=True, expires_at__gt=timezone.now(),
+        ).first()
+        if token is None:
+            return None
+        user = token.user
+        cache.set_many({keys[0]: True, keys[1]: user}, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+
+    if not user.is_active:
+        return None
+    return user, jti, cached.get(keys[2])
+
+
+def revoke_token(jti):
+    AuthToken.objects.filter(jti=jti, revoked_at__isnull=True).update(revoked_at=timezone.now())
+    cache.delete(token_cache_key(jti))
+
+
+def revoke_user_tokens(user_id):
+    tokens = AuthToken.objects.filter(user_id=user_id, revoked_at__isnull=True, expires_at__gt=timezone.now())
+    jtis = list(tokens.values_list('jti', flat=True))
+    tokens.update(revoked_at=timezone.now())
+    cache.delete_many([token_cache_key(jti) for jti in jtis])
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
@@ -2,17 +2,23 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import (
     UserViewSet,
     UserRegistrationView,
     BandViewSet,
     BandMemberViewSet,
     ReservationViewSet,
+    ArchivedReservationViewSet,
     GuestViewSet,
     InvitationViewSet,
+    WaitlistEntryViewSet,
+    AllocationRoundViewSet,
+    SlotPreferenceViewSet,
     UserLoginView,
     DashboardStatsView,
     CurrentUserView, UserLogoutView,
+    CalendarFeedView,
 )
 
 router = DefaultRouter()
@@ -20,8 +26,12 @@ router.register(r'users', UserViewSet, basename='user')
 router.register(r'bands', BandViewSet, basename='band')
 router.register(r'band-members', BandMemberViewSet, basename='bandmember')
 router.register(r'reservations', ReservationViewSet, basename='reservation')
+router.register(r'archived-reservations', ArchivedReservationViewSet, basename='archivedreservation')
 router.register(r'guests', GuestViewSet, basename='guest')
 router.register(r'invitations', InvitationViewSet, basename='invitation')
+router.register(r'waitlist', WaitlistEntryViewSet, basename='waitlistentry')
+router.register(r'allocation-rounds', AllocationRoundViewSet, basename='allocationround')
+router.register(r'slot-preferences', SlotPreferenceViewSet, basename='slotpreference')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -31,4 +41,11 @@ urlpatterns = [
     path('logout/', UserLogoutView.as_view(), name='user-login'),
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
     path('current-user/', CurrentUserView.as_view(), name='current-user'),
+    path('calendar-feed/', CalendarFeedView.as_view(), name='calendar-feed'),
+
+    # Lecturas asíncronas (servir con un servidor ASGI)
+    path('async/dashboard/', async_views.dashboard, name='async-dashboard'),
+    path('async/dashboard/stats/', async_views.dashboard_stats, name='async-dashboard-stats'),
+    path('async/current-user/', async_views.current_user, name='async-current-user'),
+    path('events/', async_views.reservation_events, name='reservation-events'),
 ]
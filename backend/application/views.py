@@ -1,8 +1,11 @@
 # application/views.py
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import generics, status, viewsets, filters
+from rest_framework import generics, mixins, status, viewsets
 from django.contrib.auth import get_user_model
-from .models import Band, BandMember, Reservation, Guest, Invitation
+from .models import (
+    Band, BandMember, Reservation, Guest, Invitation, UserStats, ArchivedReservation, WaitlistEntry, AllocationRound,
+    SlotPreference,
+)
 from .serializers import (
     UserSerializer,
     BandSerializer,
@@ -10,14 +13,35 @@ from .serializers import (
     ReservationSerializer,
     GuestSerializer,
     InvitationSerializer, UserRegistrationSerializer, UserLoginSerializer, DashboardStatsSerializer,
-    CurrentUserSerializer
+    CurrentUserSerializer, BulkReservationSerializer, BulkReservationResultSerializer,
+    ArchivedReservationSerializer, BulkGuestSerializer, BulkGuestResultSerializer, WaitlistEntrySerializer,
+    AllocationRoundSerializer, SlotPreferenceSerializer
 )
 from rest_framework.permissions import  IsAuthenticated, AllowAny
 from rest_framework import permissions
 from .permissions import IsUDPUser, IsBandMember
+from .authentication import CALENDAR_AUTHENTICATION, BearerTokenAuthentication
+from .tokens import issue_token, revoke_token
+from .ical import calendar_response, feed_token, rotate_feed_key, window_start
+from .membership import is_band_member, user_band_ids
+from .exceptions import ReservationConflict, is_exclusion_violation
+from .filters import UserFilter
+from backend.pagination import ReservationCursorPagination
+from backend.versioning import ConditionalGetMixin, conditional_get
+from .allocation import window_error
+from .booking import book_many, quota_exceeded_message, validate_schedule
+from .guests import capacity_exceeded_message, guest_limit, reserve_guest_slots
+from .quota import reserve_quota, week_of
+from .rut import normalize_rut
+from .search import search_band_ids
+from .waitlist import join_waitlist, with_queue_position
+from collection.occupancy import is_room_free
+from composer.cache import get_global_settings
 
 from rest_framework.exceptions import ValidationError
-from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F, prefetch_related_objects
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework.views import APIView
 from django.contrib.auth.forms import AuthenticationForm
@@ -33,31 +57,51 @@ class CurrentUserView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        serializer = CurrentUserSerializer(request.user)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        user = request.user
+        # La respuesta incluye al usuario y los miembros de sus bandas
+        version_names = [f'user:{user.pk}'] + [f'band:{band_id}' for band_id in sorted(user_band_ids(request))]
 
-class DashboardStatsView(APIView):
+        def build():
+            serializer = CurrentUserSerializer(user)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        return conditional_get(request, version_names, build)
+
+class CalendarFeedView(APIView):
+    """
+    Token para suscribirse a los calendarios .ics desde Google, Apple u Outlook, con los
+    enlaces de las bandas del usuario. POST genera uno nuevo y revoca los anteriores.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
+        token = feed_token(request.user)
+        feeds = [
+            {
+                'band' : band_id,
+                'url' : request.build_absolute_uri(f"{reverse('band-calendar', args=[band_id])}?token={token}"),
+            }
+            for band_id in sorted(user_band_ids(request))
+        ]
+        return Response({'token' : token, 'feeds' : feeds}, status=status.HTTP_200_OK)
 
-        # Obtener las bandas a las que pertenece el usuario
-        user_bands = Band.objects.filter(members=user)
-
-        band_count = user_bands.count()
+    def post(self, request):
+        rotate_feed_key(request.user)
+        return self.get(request)
 
-        # Obtener todas las reservas de las bandas del usuario
-        total_reservations = Reservation.objects.filter(band__in=user_bands).count()
+class DashboardStatsView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        # Obtener las reservas próximas (start_time >= ahora)
-        now = timezone.now()
-        upcoming_reservations = Reservation.objects.filter(band__in=user_bands, start_time__gte=now).count()
+    def get(self, request):
+        # Contadores precalculados: una sola búsqueda por clave primaria
+        stats = UserStats.objects.filter(user=request.user).values(
+            'band_count', 'total_reservations', 'upcoming_reservations'
+        ).first() or {'band_count': 0, 'total_reservations': 0, 'upcoming_reservations': 0}
 
         stats = {
-            'totalReservations': total_reservations,
-            'upcomingReservations': upcoming_reservations,
-            'bandCount': band_count
+            'totalReservations': stats['total_reservations'],
+            'upcomingReservations': stats['upcoming_reservations'],
+            'bandCount': stats['band_count']
         }
 
         serializer = DashboardStatsSerializer(stats)
@@ -68,19 +112,50 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['ruf']
+    filterset_class = UserFilter
 
 
-class BandViewSet(viewsets.ModelViewSet):
+class BandViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar bandas. Solo Usuarios UDP pueden crear y editar bandas a las que pertenecen.
     """
-    queryset = Band.objects.all()
+    queryset = Band.objects.prefetch_related('members')
     serializer_class = BandSerializer
     permission_classes = [IsAuthenticated]
 
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['name']
+    def list(self, request, *args, **kwargs):
+        term = request.query_params.get('search', '').strip()
+        if not term:
+            return super().list(request, *args, **kwargs)
+        return conditional_get(request, ['catalog:bands'], lambda: self.search(term))
+
+    def search(self, term):
+        """
+        Resultados ordenados por relevancia (pg_trgm con índice GIN), sin paginar y
+        limitados a BAND_SEARCH_MAX_RESULTS. Conserva el formato de la lista paginada.
+        """
+        band_ids = search_band_ids(term)
+        bands = self.get_queryset().in_bulk(band_ids)
+        serializer = self.get_serializer([bands[band_id] for band_id in band_ids if band_id in bands], many=True)
+        return Response({'next': None, 'previous': None, 'results': serializer.data})
+
+    def get_version_names(self):
+        if self.action == 'retrieve':
+            return [f'band:{self.kwargs[self.lookup_field]}']
+        return ['catalog:bands']
+
+    @action(detail=True, methods=['get'], url_path='calendar.ics', authentication_classes=CALENDAR_AUTHENTICATION)
+    def calendar(self, request, pk=None):
+        """
+        Calendario iCalendar con las reservas de la banda. Los clientes de calendario se
+        suscriben con `?token=` (ver CalendarFeedView).
+        """
+        def build():
+            band = self.get_object()
+            return calendar_response({'band': band}, f"Reservas de {band.name}", f"banda-{band.pk}.ics")
+
+        return conditional_get(request, [f'calendar:band:{pk}', f'band:{pk}', 'catalog:rooms'], build,
+                               extra=window_start().isoformat())
 
     # def get_queryset(self):
     #     if self.action == 'list':
@@ -111,7 +186,7 @@ class BandMemberViewSet(viewsets.ModelViewSet) :
     """
     ViewSet para gestionar miembros de bandas. Solo miembros UDP de la banda pueden modificarla.
     """
-    queryset = BandMember.objects.all()
+    queryset = BandMember.objects.select_related('user')
     serializer_class = BandMemberSerializer
     permission_classes = [IsAuthenticated, IsBandMember]
     filter_backends = [DjangoFilterBackend]
@@ -119,19 +194,17 @@ class BandMemberViewSet(viewsets.ModelViewSet) :
 
     def perform_create(self, serializer) :
         band = serializer.validated_data['band']
-        user = self.request.user
         # Verificar que el usuario es miembro UDP de la banda
-        if not BandMember.objects.filter(band=band, user=user).exists() :
+        if not is_band_member(self.request, band) :
             raise ValidationError("Solo miembros UDP de la banda pueden agregar o remover integrantes.")
 
         serializer.save()
 
     def perform_destroy(self, instance) :
-        band = instance.band
-        user = self.request.user
+        band = instance.band_id
 
         # Verificar que el usuario es miembro UDP de la banda
-        if not BandMember.objects.filter(band=band, user=user).exists() :
+        if not is_band_member(self.request, band) :
             raise ValidationError("Solo miembros UDP de la banda pueden eliminar integrantes.")
 
         instance.delete()
@@ -143,102 +216,330 @@ class ReservationViewSet(viewsets.ModelViewSet) :
     """
     ViewSet para gestionar reservas. Solo miembros de la banda pueden crear reservas.
     """
-    queryset = Reservation.objects.all()
+    queryset = Reservation.objects.prefetch_related('guests')
     serializer_class = ReservationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = ReservationCursorPagination
 
     def perform_create(self, serializer) :
         band = serializer.validated_data['band']
-        user = self.request.user
 
         # Verificar que el usuario es miembro de la banda
-        if not BandMember.objects.filter(band=band, user=user).exists() :
+        if not is_band_member(self.request, band) :
             raise ValidationError("Solo los miembros de la banda pueden realizar reservas.")
 
-        # Obtener configuraciones globales
-        from composer.models import GlobalSettings
-        settings = GlobalSettings.objects.first()
+        # Obtener configuraciones globales (cacheadas por proceso)
+        settings = get_global_settings()
         if not settings :
             raise ValidationError("Configuraciones globales no definidas.")
 
-        # Calcular la semana actual
-        now = timezone.now()
-        start_of_week = now - timedelta(days=now.weekday())  # Lunes
-        end_of_week = start_of_week + timedelta(days=7)
-
-        # Contar las reservas de la banda en la semana actual
-        current_week_reservations = Reservation.objects.filter(
-            band=band,
-            start_time__gte=start_of_week,
-            start_time__lt=end_of_week
-        ).count()
-
-        if current_week_reservations >= settings.max_reservations_per_band_week :
-            raise ValidationError(
-                f"Has alcanzado el número máximo de reservas ({settings.max_reservations_per_band_week}) para esta semana.")
-
-        # Validar horarios disponibles
-        if not (settings.available_hours_start <= serializer.validated_data[
-            'start_time'].time() <= settings.available_hours_end and
-                settings.available_hours_start <= serializer.validated_data[
-                    'end_time'].time() <= settings.available_hours_end) :
-            raise ValidationError("Las reservas deben estar dentro de los horarios disponibles.")
-
-        # Validar duración máxima
-        reservation_duration = serializer.validated_data['end_time'] - serializer.validated_data['start_time']
-        if reservation_duration > settings.max_reservation_duration :
-            raise ValidationError(
-                f"La duración máxima de la reserva es {settings.max_reservation_duration}.")
-
-        # Verificar disponibilidad de la sala
+        start_time = serializer.validated_data['start_time']
+        end_time = serializer.validated_data['end_time']
+
+        # Validar horarios disponibles, duración máxima y franjas que se asignan por lotes
+        error = validate_schedule(settings, start_time, end_time) or window_error(start_time, end_time)
+        if error :
+            raise ValidationError(error)
+
+        # Verificar disponibilidad de la sala con el bitmap de ocupación
         room = serializer.validated_data['room']
-        overlapping_reservations = Reservation.objects.filter(
-            room=room,
-            start_time__lt=serializer.validated_data['end_time'],
-            end_time__gt=serializer.validated_data['start_time']
-        )
-        if overlapping_reservations.exists() :
-            raise ValidationError("La sala ya está reservada en el horario seleccionado.")
+        if not is_room_free(room.pk, start_time, end_time) :
+            raise ReservationConflict()
+
+        # La restricción de exclusión de la base de datos resuelve las carreras entre workers
+        try :
+            with transaction.atomic() :
+                # Descontar la cuota semanal con un UPDATE condicional dentro de la misma transacción
+                if not reserve_quota(band.pk, week_of(start_time), settings.max_reservations_per_band_week) :
+                    raise ValidationError(quota_exceeded_message(settings))
+                data = dict(serializer.validated_data)
+                guests = data.pop('guests', [])
+                reservation = Reservation(**data)
+                reservation._quota_reserved = True
+                reservation.save()
+                # `guests` es la relación many-to-many (through=Guest): se asigna después de guardar
+                if guests :
+                    limit = guest_limit(room, settings)
+                    if not reserve_guest_slots(reservation.pk, limit, len(guests)) :
+                        raise ValidationError(capacity_exceeded_message(limit))
+                    reservation._slot_reserved = True
+                    reservation.guests.set(guests)
+                    reservation.guest_count = len(guests)
+                serializer.instance = reservation
+        except IntegrityError as e :
+            if is_exclusion_violation(e) :
+                raise ReservationConflict()
+            raise
+
+    def perform_update(self, serializer) :
+        instance = serializer.instance
+        data = serializer.validated_data
+        start_time = data.get('start_time', instance.start_time)
+        end_time = data.get('end_time', instance.end_time)
+        # Mover la reserva a una franja que se asigna por lotes tampoco está permitido
+        if (data.get('room', instance.room), start_time, end_time) != (instance.room, instance.start_time, instance.end_time) :
+            error = window_error(start_time, end_time)
+            if error :
+                raise ValidationError(error)
+        try :
+            with transaction.atomic() :
+                # Los invitados nuevos ocupan cupo con el mismo UPDATE condicional que al crear;
+                # los quitados los libera el post_delete de Guest
+                if 'guests' in data :
+                    current = set(instance.guests.values_list('pk', flat=True))
+                    wanted = {user.pk for user in data['guests']}
+                    added, removed = wanted - current, current - wanted
+                    if added :
+                        limit = guest_limit(data.get('room', instance.room), get_global_settings())
+                        # Los quitados todavía cuentan en guest_count: se descuentan del límite
+                        if not reserve_guest_slots(instance.pk, limit + len(removed), len(added)) :
+                            raise ValidationError(capacity_exceeded_message(limit))
+                        instance._slot_reserved = True
+                serializer.save()
+                if 'guests' in data :
+                    instance.refresh_from_db(fields=['guest_count'])
+        except IntegrityError as e :
+            if is_exclusion_violation(e) :
+                raise ReservationConflict()
+            raise
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request) :
+        """
+        Crea varias reservas (lista de intervalos o regla de recurrencia) en una sola solicitud.
+        """
+        serializer = BulkReservationSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+
+        settings = get_global_settings()
+        if not settings :
+            raise ValidationError("Configuraciones globales no definidas.")
 
-        serializer.save()
+        try :
+            accepted, rejected = book_many(
+                serializer.validated_data['band'],
+                serializer.validated_data['room'],
+                serializer.validated_data['candidates'],
+                settings,
+            )
+        except IntegrityError as e :
+            if is_exclusion_violation(e) :
+                raise ReservationConflict()
+            raise
+
+        # Una sola consulta para los invitados de todas las reservas creadas
+        prefetch_related_objects([reservation for _, reservation in accepted], 'guests')
+        data = {
+            'accepted' : [
+                {'index' : index, 'reservation' : ReservationSerializer(reservation).data}
+                for index, reservation in accepted
+            ],
+            'rejected' : rejected,
+        }
+        response_status = status.HTTP_201_CREATED if accepted else status.HTTP_400_BAD_REQUEST
+        return Response(BulkReservationResultSerializer(data).data, status=response_status)
+
+
+class ArchivedReservationViewSet(viewsets.ReadOnlyModelViewSet) :
+    """
+    Reservas de temporadas pasadas (sólo lectura). Los usuarios ven las de sus bandas y el
+    staff todas. Filtrar por `start_time__gte`/`start_time__lt` limita la consulta a las
+    particiones de esos semestres.
+    """
+    serializer_class = ArchivedReservationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ReservationCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {
+        'band' : ['exact'],
+        'room' : ['exact'],
+        'start_time' : ['gte', 'lt'],
+    }
+
+    def get_queryset(self) :
+        queryset = ArchivedReservation.objects.prefetch_related('guests')
+        if not self.request.user.is_staff :
+            queryset = queryset.filter(band_id__in=user_band_ids(self.request))
+        return queryset
+
+
+class WaitlistEntryViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin, viewsets.GenericViewSet) :
+    """
+    Lista de espera de horarios ocupados. Cuando la reserva responde 409, la banda se
+    anota aquí una vez en lugar de reintentar; al liberarse el horario se promueve sola.
+    """
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['band', 'room', 'status']
+
+    def get_queryset(self) :
+        queryset = with_queue_position(WaitlistEntry.objects.order_by('-created_at', '-id'))
+        if not self.request.user.is_staff :
+            queryset = queryset.filter(band_id__in=user_band_ids(self.request))
+        return queryset
+
+    def create(self, request, *args, **kwargs) :
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        settings = get_global_settings()
+        if not settings :
+            raise ValidationError("Configuraciones globales no definidas.")
+        error = validate_schedule(settings, data['start_time'], data['end_time']) or \
+            window_error(data['start_time'], data['end_time'])
+        if error :
+            raise ValidationError(error)
+        if data['start_time'] <= timezone.now() :
+            raise ValidationError("El horario ya comenzó.")
+        if is_room_free(data['room'].pk, data['start_time'], data['end_time']) :
+            raise ValidationError("La sala está disponible en ese horario: realiza la reserva directamente.")
+
+        # Repetir la solicitud devuelve la misma entrada en lugar de agregar otra
+        entry, created = join_waitlist(data['band'], data['room'], data['start_time'], data['end_time'], request.user)
+        return Response(self.get_serializer(entry).data,
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def perform_destroy(self, instance) :
+        # Se conserva como cancelada para el historial
+        if instance.status == WaitlistEntry.Status.WAITING :
+            instance.status = WaitlistEntry.Status.CANCELLED
+            instance.resolved_at = timezone.now()
+            instance.save(update_fields=['status', 'resolved_at'])
+
+
+class AllocationRoundViewSet(viewsets.ReadOnlyModelViewSet) :
+    """
+    Rondas de asignación semanal por lotes (sólo lectura; el staff las crea desde el admin).
+    """
+    queryset = AllocationRound.objects.order_by('-week')
+    serializer_class = AllocationRoundSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['status', 'week']
+
+
+class SlotPreferenceViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                            mixins.DestroyModelMixin, viewsets.GenericViewSet) :
+    """
+    Preferencias ordenadas de una banda para una ronda. Se registran durante la ventana de
+    la ronda; el comando allocate_slots las resuelve todas juntas al cerrarla.
+    """
+    serializer_class = SlotPreferenceSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['allocation_round', 'band']
+
+    def get_queryset(self) :
+        queryset = SlotPreference.objects.order_by('allocation_round', 'band', 'rank')
+        if not self.request.user.is_staff :
+            queryset = queryset.filter(band_id__in=user_band_ids(self.request))
+        return queryset
+
+    def perform_destroy(self, instance) :
+        if not instance.allocation_round.is_accepting() :
+            raise ValidationError("La ronda ya no está recibiendo preferencias.")
+        instance.delete()
 
 
 class GuestViewSet(viewsets.ModelViewSet) :
     """
     ViewSet para gestionar invitados. Solo miembros de la banda pueden agregar invitados.
     """
-    queryset = Guest.objects.all()
+    queryset = Guest.objects.select_related('reservation')
     serializer_class = GuestSerializer
     permission_classes = [IsAuthenticated, IsBandMember]
 
     def perform_create(self, serializer) :
         reservation = serializer.validated_data['reservation']
-        user = self.request.user
 
         # Verificar que el usuario es miembro de la banda asociada a la reserva
-        if not BandMember.objects.filter(band=reservation.band, user=user).exists() :
+        if not is_band_member(self.request, reservation.band_id) :
             raise ValidationError("Solo miembros de la banda pueden agregar invitados.")
 
-        serializer.save()
+        limit = guest_limit(reservation.room, get_global_settings())
+        with transaction.atomic() :
+            # El UPDATE condicional sobre guest_count evita que dos altas simultáneas excedan la capacidad
+            if not reserve_guest_slots(reservation.pk, limit) :
+                raise ValidationError(capacity_exceeded_message(limit))
+            guest = Guest(**serializer.validated_data)
+            guest._slot_reserved = True
+            guest.save()
+            serializer.instance = guest
+
+    def perform_update(self, serializer) :
+        reservation = serializer.validated_data.get('reservation')
+        if reservation is None or reservation.pk == serializer.instance.reservation_id :
+            serializer.save()
+            return
+
+        # Mover al invitado a otra reserva ocupa un cupo de esa reserva: mismo UPDATE condicional que al crear
+        if not is_band_member(self.request, reservation.band_id) :
+            raise ValidationError("Solo miembros de la banda pueden agregar invitados.")
+        limit = guest_limit(reservation.room, get_global_settings())
+        with transaction.atomic() :
+            if not reserve_guest_slots(reservation.pk, limit) :
+                raise ValidationError(capacity_exceeded_message(limit))
+            serializer.instance._slot_reserved = True
+            serializer.save()
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request) :
+        """
+        Agrega una lista de invitados a una reserva en una sola transacción. Se aceptan
+        en orden mientras quepan en la sala; el resto se rechaza.
+        """
+        serializer = BulkGuestSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        reservation = serializer.validated_data['reservation']
+        entries = serializer.validated_data['guests']
+        limit = guest_limit(reservation.room, get_global_settings())
+
+        with transaction.atomic() :
+            guest_count = Reservation.objects.select_for_update().values_list(
+                'guest_count', flat=True
+            ).get(pk=reservation.pk)
+            available = max(limit - guest_count, 0)
+            guests = [
+                # bulk_create no llama a save(): el RUT normalizado se asigna aquí
+                Guest(reservation=reservation, ruf_normalized=normalize_rut(entry.get('ruf')), **entry)
+                for entry in entries[:available]
+            ]
+            if guests :
+                Guest.objects.bulk_create(guests)
+                Reservation.objects.filter(pk=reservation.pk).update(guest_count=F('guest_count') + len(guests))
+
+        data = {
+            'accepted' : guests,
+            'rejected' : [
+                {'index' : index, 'reason' : capacity_exceeded_message(limit)}
+                for index in range(len(guests), len(entries))
+            ],
+        }
+        response_status = status.HTTP_201_CREATED if guests else status.HTTP_400_BAD_REQUEST
+        return Response(BulkGuestResultSerializer(data).data, status=response_status)
 
 
 class InvitationViewSet(viewsets.ModelViewSet) :
     """
     ViewSet para gestionar invitaciones. Solo miembros de la banda pueden crear invitaciones.
     """
-    queryset = Invitation.objects.all()
+    queryset = Invitation.objects.select_related('reservation')
     serializer_class = InvitationSerializer
     permission_classes = [IsAuthenticated, IsBandMember]
 
     def perform_create(self, serializer) :
         reservation = serializer.validated_data['reservation']
-        user = self.request.user
 
         # Verificar que el usuario es miembro de la banda asociada a la reserva
-        if not BandMember.objects.filter(band=reservation.band, user=user).exists() :
+        if not is_band_member(self.request, reservation.band_id) :
             raise ValidationError("Solo miembros de la banda pueden crear invitaciones.")
 
-        serializer.save()
+        # La invitación y su aviso en el outbox se guardan juntos; el correo lo envía send_notifications
+        with transaction.atomic() :
+            serializer.save()
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -250,6 +551,8 @@ class UserRegistrationView(generics.CreateAPIView):
 class UserLogoutView(APIView):
 
     def post(self, request):
+        if isinstance(request.successful_authenticator, BearerTokenAuthentication):
+            revoke_token(request.auth)
         logout(request)
         return Response({"message": "Successfully logged out"}, status=status.HTTP_200_OK)
 class UserLoginView(APIView):
@@ -258,7 +561,13 @@ class UserLoginView(APIView):
         if form.is_valid():
             user = form.get_user()
             login(request, user)  # Inicia sesión y crea una sesión de Django
-            return Response({"message": "Inicio de sesión exitoso"}, status=status.HTTP_200_OK)
+            # Token para los clientes que prefieren `Authorization: Bearer` a la cookie de sesión
+            token, expires_at = issue_token(user)
+            return Response({
+                "message": "Inicio de sesión exitoso",
+                "token": token,
+                "expires_at": expires_at,
+            }, status=status.HTTP_200_OK)
         return Response({"errors": form.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -0,0 +1,168 @@
+# application/waitlist.py
+
+from bisect import insort
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Func, IntegerField, OuterRef, Q, Subquery, When
+from django.utils import timezone
+
+from composer.cache import get_global_settings
+from .allocation import open_rounds, window_error
+from .booking import overlaps, quota_exceeded_message, room_busy_intervals, validate_schedule
+from .exceptions import is_exclusion_violation
+from .models import Reservation, WaitlistEntry
+from .notifications import notify_waitlist_promoted
+from .quota import reserve_quota, week_of
+
+# Orden de promoción: mayor prioridad primero y, a igual prioridad, por orden de llegada
+PROMOTION_ORDER = ('-priority', 'created_at', 'id')
+
+
+def join_waitlist(band, room, start_time, end_time, user):
+    """
+    Pone a la banda en espera del horario. Si ya esperaba exactamente ese horario se
+    devuelve la misma entrada. Devuelve (entrada, creada).
+    """
+    return WaitlistEntry.objects.get_or_create(
+        band=band,
+        room=room,
+        start_time=start_time,
+        end_time=end_time,
+        status=WaitlistEntry.Status.WAITING,
+        defaults={'requested_by': user},
+    )
+
+
+def queue_position(entry):
+    """
+    Posición de la entrada entre las que esperan un horario que se solapa con el suyo (1 = la siguiente).
+    """
+    if entry.status != WaitlistEntry.Status.WAITING:
+        return None
+    ahead = (
+        Q(priority__gt=entry.priority) |
+        Q(priority=entry.priority, created_at__lt=entry.created_at) |
+        Q(priority=entry.priority, created_at=entry.created_at, id__lt=entry.pk)
+    )
+    return WaitlistEntry.objects.filter(
+        ahead,
+        room_id=entry.room_id,
+        status=WaitlistEntry.Status.WAITING,
+        start_time__lt=entry.end_time,
+        end_time__gt=entry.start_time,
+    ).count() + 1
+
+
+def with_queue_position(queryset):
+    """
+    Anota `queue_position` (la misma posición que queue_position()) con una subconsulta
+    correlacionada, para listar entradas sin una consulta por fila. Los horarios que se
+    solapan no forman grupos fijos, así que no sirve una función de ventana por partición.
+    """
+    ahead = WaitlistEntry.objects.filter(
+        Q(priority__gt=OuterRef('priority')) |
+        Q(priority=OuterRef('priority'), created_at__lt=OuterRef('created_at')) |
+        Q(priority=OuterRef('priority'), created_at=OuterRef('created_at'), id__lt=OuterRef('pk')),
+        room_id=OuterRef('room_id'),
+        status=WaitlistEntry.Status.WAITING,
+        start_time__lt=OuterRef('end_time'),
+        end_time__gt=OuterRef('start_time'),
+    ).order_by().annotate(total=Func(F('id'), function='COUNT')).values('total')
+    return queryset.annotate(queue_position=Case(
+        When(status=WaitlistEntry.Status.WAITING, then=Subquery(ahead, output_field=IntegerField()) + 1),
+        default=None,
+        output_field=IntegerField(),
+    ))
+
+
+def _resolve(entry, status, now, reason='', reservation=None):
+    entry.status = status
+    entry.resolved_at = now
+    entry.last_error = reason
+    entry.reservation = reservation
+    entry.save(update_fields=['status', 'resolved_at', 'last_error', 'reservation'])
+
+
+def _book(entry, global_settings):
+    """
+    Crea la reserva de la entrada descontando la cuota con el UPDATE condicional.
+    Devuelve (reserva, motivo); la reserva es None si no se pudo crear.
+    """
+    try:
+        # Savepoint: si la reserva choca con otra, también se revierte el descuento de la cuota
+        with transaction.atomic():
+            if not reserve_quota(entry.band_id, week_of(entry.start_time),
+                                 global_settings.max_reservations_per_band_week):
+                return None, quota_exceeded_message(global_settings)
+            reservation = Reservation(band_id=entry.band_id, room_id=entry.room_id,
+                                      start_time=entry.start_time, end_time=entry.end_time)
+            reservation._quota_reserved = True
+            reservation.save()
+            return reservation, ''
+    except IntegrityError as e:
+        if not is_exclusion_violation(e):
+            raise
+        return None, "La sala ya está reservada en el horario seleccionado."
+
+
+def promote_waitlist(room_id, start_time, end_time, exclude_band_id=None):
+    """
+    Promueve las entradas en espera que se solapan con el horario liberado [start_time, end_time)
+    de la sala, en orden de prioridad, mientras quepan. Debe llamarse dentro de la transacción
+    que libera el horario. Devuelve las reservas creadas. `exclude_band_id` deja fuera a
+    una banda que se está borrando.
+
+    Las reglas de horario y la cuota semanal se vuelven a comprobar: una entrada que ya
+    comenzó o que no cumple el horario vigente expira; una sin cupo, o dentro de la franja
+    de una ronda de asignación abierta, sigue esperando.
+    """
+    global_settings = get_global_settings()
+    if not global_settings:
+        return []
+
+    now = timezone.now()
+    promoted = []
+    with transaction.atomic():
+        # Las entradas tomadas por otra transacción que libera el mismo horario se saltan
+        entries = list(
+            WaitlistEntry.objects.select_related('band', 'room', 'requested_by')
+            .select_for_update(skip_locked=True, of=('self',)).filter(
+                room_id=room_id,
+                status=WaitlistEntry.Status.WAITING,
+                start_time__lt=end_time,
+                end_time__gt=start_time,
+            ).exclude(band_id=exclude_band_id).order_by(*PROMOTION_ORDER)
+        )
+        if not entries:
+            return []
+        taken = room_busy_intervals(room_id, min(entry.start_time for entry in entries),
+                                    max(entry.end_time for entry in entries))
+        rounds = open_rounds(week_of(value) for entry in entries for value in (entry.start_time, entry.end_time))
+
+        for entry in entries:
+            if entry.start_time <= now:
+                _resolve(entry, WaitlistEntry.Status.EXPIRED, now, "El horario ya comenzó.")
+                continue
+            error = validate_schedule(global_settings, entry.start_time, entry.end_time)
+            if error:
+                _resolve(entry, WaitlistEntry.Status.EXPIRED, now, error)
+                continue
+            if overlaps(taken, entry.start_time, entry.end_time):
+                continue
+            # Las franjas de una ronda abierta se reparten por lotes: la entrada sigue esperando
+            error = window_error(entry.start_time, entry.end_time, rounds)
+            if error:
+                entry.last_error = error
+                entry.save(update_fields=['last_error'])
+                continue
+
+            reservation, reason = _book(entry, global_settings)
+            if reservation is None:
+                entry.last_error = reason
+                entry.save(update_fields=['last_error'])
+                continue
+            insort(taken, (entry.start_time, entry.end_time))
+            _resolve(entry, WaitlistEntry.Status.PROMOTED, now, reservation=reservation)
+            notify_waitlist_promoted(entry)
+            promoted.append(reservation)
+    return promoted
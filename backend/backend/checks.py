@@ -0,0 +1,55 @@
+# backend/checks.py
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+from django.core.exceptions import ImproperlyConfigured
+
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+}
+PROCESS_LOCAL_BROKERS = {
+    'application.events.InProcessBroker',
+}
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs=None, **kwargs):
+    """
+    Los sellos de versión (ETag / 304) y la versión de GlobalSettings viven en el cache:
+    con varios workers el cache debe ser compartido, o un worker seguiría respondiendo
+    304 o usando una configuración que otro ya cambió.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.WEB_CONCURRENCY > 1 and backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            f"CACHES['default'] usa {backend}, que es local a cada proceso, con WEB_CONCURRENCY="
+            f"{settings.WEB_CONCURRENCY} workers: las invalidaciones de un worker no llegan a los demás.",
+            hint="Configura CACHE_BACKEND/CACHE_LOCATION con un cache compartido (p. ej. Redis).",
+            id='backend.E001',
+        )]
+    return []
+
+
+@register()
+def check_events_broker(app_configs=None, **kwargs):
+    """
+    InProcessBroker sólo entrega los eventos a los clientes SSE del worker que los publicó:
+    con varios workers, los conectados a otro no se enteran de nada y nada falla.
+    """
+    if settings.WEB_CONCURRENCY > 1 and settings.EVENTS_BROKER in PROCESS_LOCAL_BROKERS:
+        return [Error(
+            f"EVENTS_BROKER es {settings.EVENTS_BROKER}, que es local a cada proceso, con WEB_CONCURRENCY="
+            f"{settings.WEB_CONCURRENCY} workers: los clientes de /events/ no reciben los eventos de otros workers.",
+            hint="Usa EVENTS_BROKER=application.events.CacheBroker con un cache compartido.",
+            id='backend.E002',
+        )]
+    return []
+
+
+def ensure_worker_settings():
+    """
+    Igual que los checks, pero al iniciar cada worker: los servidores ASGI/WSGI no corren los checks.
+    """
+    errors = check_shared_cache() + check_events_broker()
+    if errors:
+        raise ImproperlyConfigured(f"{errors[0].msg} {errors[0].hint}")
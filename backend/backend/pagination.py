@@ -0,0 +1,17 @@
+# backend/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class DefaultCursorPagination(CursorPagination):
+    """
+    Paginación por cursor sobre columnas indexadas: cada página cuesta lo mismo
+    sin importar su posición y no se ejecuta ningún COUNT(*).
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class ReservationCursorPagination(DefaultCursorPagination):
+    ordering = ('start_time', 'id')
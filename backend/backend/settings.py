@@ -37,10 +37,12 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'application',
     'collection',
     'composer',
+    'benchmarks',
     'drf_spectacular',
     'corsheaders',
 ]
@@ -48,11 +50,14 @@ INSTALLED_APPS = [
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES' : [
+        'application.authentication.BearerTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES' : [
         'rest_framework.permissions.AllowAny',
     ],
+    'DEFAULT_PAGINATION_CLASS' : 'backend.pagination.DefaultCursorPagination',
+    'PAGE_SIZE' : int(os.getenv('API_PAGE_SIZE', 50)),
 }
 
 CSRF_TRUSTED_ORIGINS = [
@@ -110,6 +115,22 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# En producción debe apuntar a un cache compartido (p. ej. Redis) para que las
+# invalidaciones lleguen a todos los workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'bandas-udp'),
+    }
+}
+
+# Workers del servidor (uvicorn y gunicorn leen WEB_CONCURRENCY). Con más de uno, el cache
+# por proceso (LocMemCache) no está permitido: ver backend/checks.py.
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -157,6 +178,62 @@ CSRF_COOKIE_SECURE = os.getenv('CSRF_COOKIE_SECURE', 'False') == 'True'
 
 AUTH_USER_MODEL = 'application.User'
 
+# Segundos máximos que un worker puede usar su copia de GlobalSettings sin revalidarla.
+# Sólo acota el desfase entre workers si el cache es compartido (backend.E001 lo exige).
+GLOBAL_SETTINGS_MAX_STALENESS = int(os.getenv('GLOBAL_SETTINGS_MAX_STALENESS', 5))
+
+# Segundos que se cachean las bandas de cada usuario para permisos y validaciones
+MEMBERSHIP_CACHE_TIMEOUT = int(os.getenv('MEMBERSHIP_CACHE_TIMEOUT', 60))
+
+# Tokens de acceso: vigencia y segundos que se cachean el token y su usuario
+AUTH_TOKEN_TTL = int(os.getenv('AUTH_TOKEN_TTL', 12 * 60 * 60))
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+
+# Disponibilidad de salas
+AVAILABILITY_CACHE_TIMEOUT = int(os.getenv('AVAILABILITY_CACHE_TIMEOUT', 60 * 60))
+AVAILABILITY_MAX_DAYS = 31
+
+# Bitmap de ocupación por sala y día: minutos por bloque (mínimo 24, cabe en un bigint)
+OCCUPANCY_SLOT_MINUTES = int(os.getenv('OCCUPANCY_SLOT_MINUTES', 30))
+
+# Calendarios iCalendar: días de historial incluidos y filas leídas por bloque
+ICAL_HISTORY_DAYS = int(os.getenv('ICAL_HISTORY_DAYS', 90))
+ICAL_CHUNK_SIZE = 500
+
+# Eventos de reservas (SSE). CacheBroker reparte eventos entre workers a través del cache compartido;
+# con WEB_CONCURRENCY > 1 es obligatorio (backend.E002).
+EVENTS_BROKER = os.getenv('EVENTS_BROKER', 'application.events.InProcessBroker')
+EVENTS_QUEUE_SIZE = 100
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_POLL_INTERVAL = 0.5
+EVENTS_RETENTION = 60
+
+# Semestres que se mantienen en la tabla de reservas (incluido el actual); el resto va al archivo
+RESERVATION_HOT_SEMESTERS = int(os.getenv('RESERVATION_HOT_SEMESTERS', 2))
+
+# Correo y outbox de notificaciones (ver application/notifications.py)
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'Bandas UDP <no-reply@bandas-udp.cl>')
+NOTIFICATION_TRANSPORT = os.getenv('NOTIFICATION_TRANSPORT', 'application.notifications.EmailTransport')
+NOTIFICATION_MAX_ATTEMPTS = 6
+NOTIFICATION_RETRY_BASE_SECONDS = 30
+NOTIFICATION_RETRY_MAX_SECONDS = 60 * 60
+NOTIFICATION_LEASE_SECONDS = 5 * 60
+
+# Asignación semanal por lotes: semanas de historial para priorizar a quien menos usó las salas
+# y preferencias máximas por banda en cada ronda
+ALLOCATION_FAIRNESS_WEEKS = int(os.getenv('ALLOCATION_FAIRNESS_WEEKS', 4))
+ALLOCATION_MAX_PREFERENCES = int(os.getenv('ALLOCATION_MAX_PREFERENCES', 10))
+
+# Reservas masivas / recurrentes
+BULK_RESERVATION_MAX_ITEMS = int(os.getenv('BULK_RESERVATION_MAX_ITEMS', 30))
+BULK_GUEST_MAX_ITEMS = int(os.getenv('BULK_GUEST_MAX_ITEMS', 50))
+
+# Búsqueda de bandas: resultados máximos y cache de los prefijos cortos (los más repetidos)
+BAND_SEARCH_MAX_RESULTS = int(os.getenv('BAND_SEARCH_MAX_RESULTS', 20))
+BAND_SEARCH_CACHE_PREFIX_LENGTH = 4
+BAND_SEARCH_CACHE_TIMEOUT = int(os.getenv('BAND_SEARCH_CACHE_TIMEOUT', 5 * 60))
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Sistema de Gestión de Salas de Ensayo UDP API',
     'DESCRIPTION': 'API para gestionar usuarios, bandas, reservas y más en la Universidad Diego Portales.',
@@ -0,0 +1,96 @@
+# backend/versioning.py
+
+import hashlib
+import time
+from abc import ABC, abstractmethod
+
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def version_key(name):
+    return f"version:{name}"
+
+
+def get_versions(names):
+    """
+    Sellos de versión (timestamps) guardados en el cache. Los que no existen se
+    inicializan con la hora actual, lo que sólo provoca una recarga en los clientes.
+    Con varios workers el cache debe ser compartido (ver backend/checks.py).
+    """
+    keys = {version_key(name): name for name in names}
+    found = cache.get_many(keys.keys())
+    now = time.time()
+    versions = {}
+    for key, name in keys.items():
+        if key not in found:
+            cache.add(key, now, None)
+            found[key] = cache.get(key, now)
+        versions[name] = found[key]
+    return versions
+
+
+def bump_versions(*names):
+    now = time.time()
+    cache.set_many({version_key(name): now for name in names}, None)
+
+
+def build_etag(request, versions, extra=''):
+    """
+    El ETag depende de los sellos, de la URL completa (filtros, cursor, búsqueda) y de
+    `extra`, para lo que cambia el contenido sin cambiar un sello (p. ej. una ventana de fechas).
+    """
+    payload = request.get_full_path() + '|' + '|'.join(
+        f"{name}={versions[name]!r}" for name in sorted(versions)
+    ) + '|' + extra
+    return '"%s"' % hashlib.md5(payload.encode(), usedforsecurity=False).hexdigest()
+
+
+def conditional_get(request, version_names, handler, extra=''):
+    """
+    Responde 304 sin ejecutar `handler` (ORM ni serializers) cuando el cliente ya
+    tiene la versión vigente; si no, ejecuta `handler` y agrega el ETag.
+
+    No se envía Last-Modified: tiene resolución de un segundo, así que un cambio en el
+    mismo segundo que la respuesta anterior daría un 304 con datos viejos.
+    """
+    versions = get_versions(version_names)
+    etag = build_etag(request, versions, extra)
+
+    if_none_match = request.headers.get('If-None-Match')
+    not_modified = bool(if_none_match) and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*')
+
+    if not_modified:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = handler()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+
+    response['ETag'] = etag
+    # Las respuestas dependen del usuario autenticado
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class ConditionalGetMixin(ABC):
+    """
+    Agrega GET condicional a `list` y `retrieve` de un ViewSet. Las subclases
+    indican qué sellos de versión describen los datos con `get_version_names()`.
+    """
+
+    @abstractmethod
+    def get_version_names(self):
+        """
+        Nombres de los sellos de versión de la acción en curso.
+        """
+
+    def list(self, request, *args, **kwargs):
+        return conditional_get(request, self.get_version_names(),
+                               lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_get(request, self.get_version_names(),
+                               lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
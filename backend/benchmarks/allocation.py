@@ -0,0 +1,98 @@
+# benchmarks/allocation.py
+
+import random
+import statistics
+import time as clock
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from application.allocation import draft_order, solve
+
+
+def generate_instance(bands, rooms, days=7, hours=(18, 22), preferences=5, seed=1):
+    """
+    Instancia sintética de una ronda: cada banda pide `preferences` horarios de una hora,
+    con la demanda concentrada en las horas más tarde y en algunas salas (como en la
+    apertura real de reservas). Devuelve (requests, past_usage, slots).
+    """
+    rng = random.Random(seed)
+    monday = timezone.localdate() + timedelta(days=7 - timezone.localdate().weekday())
+    slots = []
+    weights = []
+    for day in range(days):
+        for hour in range(*hours):
+            start = timezone.make_aware(datetime.combine(monday + timedelta(days=day), time(hour)))
+            for room in range(rooms):
+                slots.append((room, start, start + timedelta(hours=1)))
+                # Más demanda a última hora y en las primeras salas
+                weights.append((hour - hours[0] + 1) * (2 if room < max(rooms // 4, 1) else 1))
+
+    requests = {}
+    for band in range(bands):
+        chosen = set()
+        while len(chosen) < min(preferences, len(slots)):
+            chosen.add(rng.choices(range(len(slots)), weights)[0])
+        ranked = list(chosen)
+        rng.shuffle(ranked)
+        requests[band] = [slots[index] for index in ranked]
+    past_usage = {band: rng.randint(0, 8) for band in range(bands)}
+    return requests, past_usage, slots
+
+
+def _solve_draft(requests, past_usage, quota, seed):
+    order = draft_order(list(requests), past_usage, random.Random(seed))
+    return solve(requests, defaultdict(list), defaultdict(list), dict.fromkeys(requests, quota), order)
+
+
+def _solve_first_come(requests, past_usage, quota, seed):
+    # Referencia: el cliente más rápido toma todo su cupo antes que el siguiente
+    order = list(requests)
+    random.Random(seed).shuffle(order)
+    taken, band_taken = defaultdict(list), defaultdict(list)
+    assigned = {}
+    for band in order:
+        assigned.update(solve({band: requests[band]}, taken, band_taken, {band: quota}, [band]))
+    return assigned
+
+
+STRATEGIES = {
+    'draft': _solve_draft,
+    'first-come': _solve_first_come,
+}
+
+
+def measure(strategy, requests, past_usage, quota, slots, repeat=3, seed=1):
+    """
+    Tiempo del solver (mediana de `repeat` ejecuciones) y métricas de calidad del reparto.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = clock.perf_counter()
+        assigned = STRATEGIES[strategy](requests, past_usage, quota, seed)
+        timings.append(clock.perf_counter() - started)
+
+    counts = [len(assigned.get(band, ())) for band in requests]
+    ranks = [index + 1 for indexes in assigned.values() for index in indexes]
+    total = sum(counts)
+    return {
+        'solve_ms': statistics.median(timings) * 1000,
+        'preferences': sum(len(items) for items in requests.values()),
+        'assigned': total,
+        'utilization': total / len(slots) if slots else 0.0,
+        'bands_served': sum(1 for count in counts if count) / len(counts) if counts else 0.0,
+        'first_choice': sum(1 for indexes in assigned.values() if 0 in indexes) / len(counts) if counts else 0.0,
+        'mean_rank': statistics.mean(ranks) if ranks else 0.0,
+        # Índice de Jain sobre reservas por banda: 1.0 es un reparto perfectamente parejo
+        'jain': total ** 2 / (len(counts) * sum(count ** 2 for count in counts)) if total else 0.0,
+    }
+
+
+def format_result(label, result):
+    return (
+        f"{label:<28} {result['solve_ms']:>9.1f}ms {result['preferences']:>7} pref "
+        f"{result['assigned']:>6} asignadas ({result['utilization']:>5.1%} de los horarios) "
+        f"bandas con sala {result['bands_served']:>5.1%}  1ª opción {result['first_choice']:>5.1%} "
+        f"rango medio {result['mean_rank']:>4.2f}  Jain {result['jain']:.3f}"
+    )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.allocation import STRATEGIES, format_result, generate_instance, measure
+
+
+class Command(BaseCommand):
+    help = ("Mide el solver de asignación semanal por lotes con instancias sintéticas de miles "
+            "de bandas y horarios, y lo compara con el reparto por orden de llegada. "
+            "No usa la base de datos.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bands', type=int, action='append',
+                            help="Bandas por instancia (repetible). Por defecto 1000, 5000 y 10000.")
+        parser.add_argument('--rooms', type=int, default=20)
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--preferences', type=int, default=5, help="Preferencias por banda.")
+        parser.add_argument('--quota', type=int, default=2, help="Reservas por banda y semana.")
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        for bands in options['bands'] or [1000, 5000, 10000]:
+            requests, past_usage, slots = generate_instance(
+                bands, options['rooms'], days=options['days'],
+                preferences=options['preferences'], seed=options['seed'],
+            )
+            self.stdout.write(f"== {bands} bandas, {len(slots)} horarios")
+            for strategy in STRATEGIES:
+                result = measure(strategy, requests, past_usage, options['quota'], slots,
+                                 repeat=options['repeat'], seed=options['seed'])
+                self.stdout.write(format_result(strategy, result))
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from benchmarks.report import compare, format_summary, load_baseline, save_baseline, summarize
+from benchmarks.runner import run_scenario
+from benchmarks.seed import seed
+from benchmarks.workloads import SCENARIOS, BenchmarkContext
+from collection.models import Room
+
+DEFAULT_BASELINE_DIR = Path(__file__).resolve().parents[2] / 'baselines'
+
+
+class Command(BaseCommand):
+    help = ("Siembra una base de datos de prueba y mide la API de reservas con workers "
+            "concurrentes: throughput, latencias p50/p95/p99 y consultas SQL por request.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                            help="Escenario a ejecutar (repetible). Por defecto, todos.")
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200, help="Requests por worker.")
+        parser.add_argument('--users', type=int, default=600)
+        parser.add_argument('--bands', type=int, default=200)
+        parser.add_argument('--rooms', type=int, default=8)
+        parser.add_argument('--weeks', type=int, default=8, help="Semanas de historial a sembrar.")
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Reutiliza la base de datos de prueba (y sus datos) entre ejecuciones.")
+        parser.add_argument('--baseline-dir', default=str(DEFAULT_BASELINE_DIR))
+        parser.add_argument('--save-baseline', action='store_true',
+                            help="Guarda los resultados como nueva línea base.")
+        parser.add_argument('--tolerance', type=float, default=0.20)
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        scenarios = options['scenario'] or sorted(SCENARIOS)
+
+        # Nunca se mide contra la base de datos configurada: se usa la base de prueba de Django
+        setup_test_environment()
+        old_config = setup_databases(verbosity=1, interactive=False, keepdb=options['keepdb'])
+        regressions = []
+        try:
+            if not Room.objects.filter(name__startswith='bench-sala-').exists():
+                counts = seed(
+                    users=options['users'],
+                    bands=options['bands'],
+                    rooms=options['rooms'],
+                    weeks=options['weeks'],
+                )
+                self.stdout.write(f"Datos sembrados: {counts}")
+            context = BenchmarkContext()
+
+            for name in scenarios:
+                samples, wall_time = run_scenario(
+                    SCENARIOS[name], context,
+                    workers=options['workers'],
+                    requests_per_worker=options['requests'],
+                )
+                summary = summarize(samples, wall_time)
+                self.stdout.write(format_summary(name, summary))
+
+                baseline = load_baseline(options['baseline_dir'], name)
+                if baseline:
+                    found = compare(baseline, summary, tolerance=options['tolerance'])
+                    for regression in found:
+                        self.stdout.write(self.style.WARNING(f"  regresión: {regression}"))
+                    regressions.extend(f"{name}: {regression}" for regression in found)
+                if options['save_baseline']:
+                    path = save_baseline(options['baseline_dir'], name, summary)
+                    self.stdout.write(f"  línea base guardada en {path}")
+        finally:
+            teardown_databases(old_config, verbosity=1, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} regresiones respecto de la línea base.")
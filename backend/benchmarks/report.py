@@ -0,0 +1,91 @@
+# benchmarks/report.py
+
+import json
+import math
+from collections import Counter, defaultdict
+from pathlib import Path
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = max(0, math.ceil(fraction * len(values)) - 1)
+    return values[index]
+
+
+def _summary(samples, wall_time):
+    latencies = [elapsed * 1000 for _, elapsed, _, _ in samples]
+    return {
+        'requests': len(samples),
+        'throughput': len(samples) / wall_time if wall_time else 0.0,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'queries_per_request': sum(queries for _, _, _, queries in samples) / len(samples) if samples else 0.0,
+        'status': dict(Counter(str(status) for _, _, status, _ in samples)),
+    }
+
+
+def summarize(samples, wall_time):
+    """
+    Resumen global y por tipo de request.
+    """
+    by_label = defaultdict(list)
+    for sample in samples:
+        by_label[sample[0]].append(sample)
+    return {
+        'total': _summary(samples, wall_time),
+        'endpoints': {label: _summary(items, wall_time) for label, items in sorted(by_label.items())},
+    }
+
+
+def format_summary(name, summary):
+    lines = [f"== {name}"]
+    rows = [('TOTAL', summary['total'])] + list(summary['endpoints'].items())
+    for label, data in rows:
+        status = ' '.join(f"{code}:{count}" for code, count in sorted(data['status'].items()))
+        lines.append(
+            f"{label:<20} {data['requests']:>6} req {data['throughput']:>9.1f} req/s "
+            f"p50 {data['p50_ms']:>7.1f}ms p95 {data['p95_ms']:>7.1f}ms p99 {data['p99_ms']:>7.1f}ms "
+            f"{data['queries_per_request']:>5.1f} q/req  [{status}]"
+        )
+    return '\n'.join(lines)
+
+
+def load_baseline(directory, name):
+    path = Path(directory) / f'{name}.json'
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_baseline(directory, name, summary):
+    path = Path(directory) / f'{name}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2, sort_keys=True))
+    return path
+
+
+def compare(baseline, summary, tolerance=0.20):
+    """
+    Lista de regresiones respecto de la línea base: menos throughput, más latencia
+    o más consultas por request, más allá de la tolerancia indicada.
+    """
+    regressions = []
+    rows = [('TOTAL', baseline['total'], summary['total'])] + [
+        (label, baseline['endpoints'][label], data)
+        for label, data in summary['endpoints'].items()
+        if label in baseline['endpoints']
+    ]
+    for label, before, after in rows:
+        if after['throughput'] < before['throughput'] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {before['throughput']:.1f} -> {after['throughput']:.1f} req/s")
+        for metric in ('p95_ms', 'p99_ms'):
+            if after[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{label}: {metric} {before[metric]:.1f} -> {after[metric]:.1f}")
+        if after['queries_per_request'] > before['queries_per_request'] + 0.5:
+            regressions.append(
+                f"{label}: consultas/request {before['queries_per_request']:.1f} -> {after['queries_per_request']:.1f}"
+            )
+    return regressions
@@ -0,0 +1,83 @@
+# benchmarks/runner.py
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import Client
+
+from application.models import User
+
+# Segundos máximos de espera para que todos los workers estén listos
+START_TIMEOUT = 120
+
+
+class QueryCounter:
+    """
+    execute_wrapper que cuenta las consultas SQL de la conexión del hilo actual.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _worker(scenario, context, requests, seed_value, start_barrier):
+    rng = random.Random(seed_value)
+    samples = []
+    counter = QueryCounter()
+    try:
+        user_id, band_id = rng.choice(context.memberships)
+        client = Client()
+        client.force_login(User.objects.get(pk=user_id))
+        etags = {}
+        start_barrier.wait(timeout=START_TIMEOUT)
+
+        with connection.execute_wrapper(counter):
+            for _ in range(requests):
+                label, method, url, payload = scenario(rng, context, band_id)
+                headers = {}
+                # Los clientes que sondean reenvían el ETag recibido
+                if method == 'get' and url in etags:
+                    headers['HTTP_IF_NONE_MATCH'] = etags[url]
+
+                counter.count = 0
+                started = time.perf_counter()
+                if method == 'get':
+                    response = client.get(url, **headers)
+                else:
+                    response = client.post(url, data=payload, content_type='application/json')
+                elapsed = time.perf_counter() - started
+
+                if response.has_header('ETag'):
+                    etags[url] = response['ETag']
+                samples.append((label, elapsed, response.status_code, counter.count))
+    except BaseException:
+        start_barrier.abort()
+        raise
+    finally:
+        connection.close()
+    return samples
+
+
+def run_scenario(scenario, context, workers=8, requests_per_worker=200, seed_value=1):
+    """
+    Ejecuta el escenario con `workers` hilos concurrentes, cada uno con su propio
+    cliente y conexión a la base de datos. Devuelve (muestras, segundos totales).
+    """
+    start_barrier = threading.Barrier(workers + 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_worker, scenario, context, requests_per_worker, seed_value + i, start_barrier)
+            for i in range(workers)
+        ]
+        start_barrier.wait(timeout=START_TIMEOUT)
+        started = time.perf_counter()
+        samples = [sample for future in futures for sample in future.result()]
+        wall_time = time.perf_counter() - started
+    return samples, wall_time
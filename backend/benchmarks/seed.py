@@ -0,0 +1,109 @@
+# benchmarks/seed.py
+
+import random
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from application.models import Band, BandMember, Guest, Reservation, User
+from application.quota import reconcile_usage
+from application.rut import normalize_rut, rut_check_digit
+from application.stats import rebuild_stats
+from collection.availability import days_between
+from collection.models import Instrument, Room
+from collection.occupancy import rebuild_days
+from composer.models import GlobalSettings
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def seed(users=600, bands=200, rooms=8, weeks=8, occupancy=0.6, seed_value=1):
+    """
+    Puebla la base de datos con volúmenes realistas. Usa bulk_create, que no llama a
+    save() ni emite señales: los campos derivados (ruf_normalized, guest_count) se asignan
+    aquí y al final se reconstruyen el bitmap de ocupación, el libro de cuota y las estadísticas.
+    """
+    rng = random.Random(seed_value)
+    password = make_password(BENCHMARK_PASSWORD)
+
+    with transaction.atomic():
+        settings = GlobalSettings.objects.first() or GlobalSettings.objects.create(
+            max_reservations_per_band_week=3,
+        )
+
+        instruments = Instrument.objects.bulk_create(
+            [Instrument(name=f'bench-instrumento-{i}') for i in range(20)]
+        )
+        room_objs = Room.objects.bulk_create(
+            [Room(name=f'bench-sala-{i}', capacity=rng.randint(4, 12)) for i in range(rooms)]
+        )
+        Room.instruments.through.objects.bulk_create([
+            Room.instruments.through(room_id=room.id, instrument_id=instrument.id)
+            for room in room_objs
+            for instrument in rng.sample(instruments, 5)
+        ])
+
+        rufs = [f'{10_000_000 + i}-{rut_check_digit(10_000_000 + i)}' for i in range(users)]
+        user_objs = User.objects.bulk_create([
+            User(username=f'bench-user-{i}', ruf=ruf, ruf_normalized=normalize_rut(ruf),
+                 password=password, is_udp=i % 3 != 0)
+            for i, ruf in enumerate(rufs)
+        ], batch_size=1000)
+        band_objs = Band.objects.bulk_create(
+            [Band(name=f'bench-banda-{i}', is_approved=True) for i in range(bands)]
+        )
+
+        # Cada usuario pertenece a una banda; los usuarios se reparten por igual entre las bandas
+        members = []
+        for i, user in enumerate(user_objs):
+            members.append(BandMember(band=band_objs[i % bands], user=user))
+        BandMember.objects.bulk_create(members, batch_size=1000)
+
+        # Reservas por hora en el horario disponible, desde `weeks` semanas atrás hasta 2 semanas adelante
+        today = timezone.localdate()
+        first_day = today - timedelta(weeks=weeks)
+        last_day = today + timedelta(days=settings.reservation_advance_limit)
+        opening = settings.available_hours_start.hour
+        closing = settings.available_hours_end.hour
+        reservations = []
+        day = first_day
+        while day <= last_day:
+            for room in room_objs:
+                for hour in range(opening, closing):
+                    if rng.random() > occupancy:
+                        continue
+                    start = timezone.make_aware(datetime.combine(day, time(hour)))
+                    end = start + timedelta(hours=1)
+                    reservations.append(Reservation(
+                        band=rng.choice(band_objs),
+                        room=room,
+                        start_time=start,
+                        end_time=end,
+                        period=Reservation.build_period(start, end),
+                    ))
+            day += timedelta(days=1)
+        # Un invitado en una de cada cuatro reservas; sin señales, guest_count se fija a mano
+        with_guest = rng.sample(reservations, len(reservations) // 4)
+        for reservation in with_guest:
+            reservation.guest_count = 1
+        Reservation.objects.bulk_create(reservations, batch_size=2000)
+
+        Guest.objects.bulk_create([
+            Guest(reservation=reservation, user=rng.choice(user_objs))
+            for reservation in with_guest
+        ], batch_size=2000)
+
+        days = list(days_between(first_day, last_day))
+        for room in room_objs:
+            rebuild_days(room.id, days)
+        reconcile_usage(band_ids=[band.id for band in band_objs])
+
+    rebuild_stats()
+    return {
+        'users': len(user_objs),
+        'bands': len(band_objs),
+        'rooms': len(room_objs),
+        'reservations': len(reservations),
+    }
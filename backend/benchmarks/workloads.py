@@ -0,0 +1,89 @@
+# benchmarks/workloads.py
+
+import json
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from application.models import BandMember
+from collection.models import Room
+from composer.models import GlobalSettings
+
+
+class BenchmarkContext:
+    """
+    Datos sembrados que los workers necesitan para construir requests.
+    """
+
+    def __init__(self):
+        self.memberships = list(
+            BandMember.objects.filter(user__username__startswith='bench-user-').values_list('user_id', 'band_id')
+        )
+        self.room_ids = list(Room.objects.filter(name__startswith='bench-sala-').values_list('id', flat=True))
+        self.settings = GlobalSettings.objects.first()
+        if not self.memberships or not self.room_ids or not self.settings:
+            raise RuntimeError("No hay datos de benchmark: ejecuta primero la siembra.")
+
+
+def _random_slot(rng, context, days_ahead=None, hour=None):
+    settings = context.settings
+    if days_ahead is None:
+        days_ahead = rng.randint(1, settings.reservation_advance_limit)
+    if hour is None:
+        hour = rng.randint(settings.available_hours_start.hour, settings.available_hours_end.hour - 1)
+    day = timezone.localdate() + timedelta(days=days_ahead)
+    start = timezone.make_aware(datetime.combine(day, time(hour)))
+    return start, start + timedelta(hours=1)
+
+
+def _booking(rng, context, band_id, room_id, start, end):
+    payload = json.dumps({
+        'band': band_id,
+        'room': room_id,
+        'start_time': start.isoformat(),
+        'end_time': end.isoformat(),
+    })
+    return 'booking', 'post', '/api/application/reservations/', payload
+
+
+def mixed(rng, context, band_id):
+    """
+    Lecturas y reservas mezcladas, similar al tráfico de un día normal.
+    """
+    choice = rng.random()
+    if choice < 0.30:
+        return 'reservations-list', 'get', '/api/application/reservations/', None
+    if choice < 0.45:
+        return 'rooms-list', 'get', '/api/collection/rooms/', None
+    if choice < 0.65:
+        day = timezone.localdate() + timedelta(days=rng.randint(0, 7))
+        room_id = rng.choice(context.room_ids)
+        return 'availability', 'get', f'/api/collection/rooms/{room_id}/availability/?from={day}&to={day}', None
+    if choice < 0.80:
+        return 'current-user', 'get', '/api/application/current-user/', None
+    start, end = _random_slot(rng, context)
+    return _booking(rng, context, band_id, rng.choice(context.room_ids), start, end)
+
+
+def contention(rng, context, band_id):
+    """
+    Todos los workers pelean por las mismas horas punta de una misma sala.
+    """
+    start, end = _random_slot(rng, context, days_ahead=rng.randint(1, 3), hour=20)
+    return _booking(rng, context, band_id, context.room_ids[0], start, end)
+
+
+def dashboard(rng, context, band_id):
+    """
+    Sondeo constante del dashboard, como lo hace el frontend.
+    """
+    if rng.random() < 0.5:
+        return 'dashboard-stats', 'get', '/api/application/dashboard/stats/', None
+    return 'current-user', 'get', '/api/application/current-user/', None
+
+
+SCENARIOS = {
+    'mixed': mixed,
+    'contention': contention,
+    'dashboard': dashboard,
+}
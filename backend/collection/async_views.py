@@ -0,0 +1,57 @@
+# collection/async_views.py
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import ValidationError
+
+from application.async_views import NOT_AUTHENTICATED, authenticated_user
+from composer.cache import get_global_settings
+from .availability import parse_availability_range, parse_room_ids, room_availability
+from .models import Room
+from .serializers import RoomAvailabilitySerializer, RoomSerializer
+
+
+async def room_list(request):
+    """
+    Versión asíncrona del listado de salas con sus instrumentos.
+    """
+    if await authenticated_user(request) is None:
+        return JsonResponse(NOT_AUTHENTICATED, status=403)
+    rooms = [room async for room in Room.objects.prefetch_related('instruments').order_by('id')]
+    return JsonResponse({'results': RoomSerializer(rooms, many=True).data})
+
+
+def _availability(room_ids, date_from, date_to, global_settings):
+    return [room_availability(room_id, date_from, date_to, global_settings) for room_id in room_ids]
+
+
+async def room_availability_list(request, pk=None):
+    """
+    Disponibilidad asíncrona de una sala (`pk`) o de varias (`rooms=1,2,3`).
+
+    El ORM síncrono corre en el único hilo de sync_to_async (thread_sensitive): lanzar
+    varias llamadas con asyncio.gather no las paraleliza, así que todas las salas se
+    calculan en una sola llamada y el loop queda libre mientras tanto.
+    """
+    if await authenticated_user(request) is None:
+        return JsonResponse(NOT_AUTHENTICATED, status=403)
+    try:
+        date_from, date_to = parse_availability_range(request.GET)
+        room_ids = [pk] if pk is not None else parse_room_ids(request.GET)
+    except ValidationError as error:
+        return JsonResponse({'detail': error.detail}, status=400)
+
+    rooms = Room.objects.order_by('id')
+    if room_ids is not None:
+        rooms = rooms.filter(id__in=room_ids)
+    room_ids = await sync_to_async(list)(rooms.values_list('id', flat=True))
+    global_settings = await sync_to_async(get_global_settings)()
+    if pk is not None and not room_ids:
+        return JsonResponse({'detail': "No encontrado."}, status=404)
+    if not global_settings:
+        return JsonResponse({'detail': "Configuraciones globales no definidas."}, status=400)
+
+    data = await sync_to_async(_availability)(room_ids, date_from, date_to, global_settings)
+    if pk is not None:
+        return JsonResponse(RoomAvailabilitySerializer(data[0]).data)
+    return JsonResponse(RoomAvailabilitySerializer(data, many=True).data, safe=False)
@@ -0,0 +1,159 @@
+# collection/availability.py
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+
+def parse_availability_range(params):
+    """
+    Lee los parámetros `from` y `to` (YYYY-MM-DD). Por defecto, el día de hoy.
+    """
+    today = timezone.localdate()
+    date_from = params.get('from')
+    date_to = params.get('to')
+    try:
+        date_from = parse_date(date_from) if date_from else today
+        date_to = parse_date(date_to) if date_to else date_from
+    except ValueError:
+        # Formato correcto pero fecha inexistente, p. ej. 2026-02-30
+        date_from = date_to = None
+    if date_from is None or date_to is None:
+        raise ValidationError("Los parámetros 'from' y 'to' deben ser fechas válidas con el formato YYYY-MM-DD.")
+    if date_to < date_from:
+        raise ValidationError("'to' no puede ser anterior a 'from'.")
+    if date_to - date_from >= timedelta(days=settings.AVAILABILITY_MAX_DAYS):
+        raise ValidationError(f"El rango máximo de consulta es de {settings.AVAILABILITY_MAX_DAYS} días.")
+    return date_from, date_to
+
+
+def parse_room_ids(params):
+    """
+    Lista de IDs del parámetro `rooms=1,2,3`, o None si no se indicó.
+    """
+    room_ids = params.get('rooms')
+    if not room_ids:
+        return None
+    try:
+        return [int(room_id) for room_id in room_ids.split(',')]
+    except ValueError:
+        raise ValidationError("El parámetro 'rooms' debe ser una lista de IDs separados por comas.")
+
+
+def room_day_cache_key(room_id, day):
+    return f"availability:room:{room_id}:{day.isoformat()}"
+
+
+def day_bounds(day):
+    """
+    Inicio y fin (aware) de un día calendario en la zona horaria actual.
+    """
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return start, start + timedelta(days=1)
+
+
+def days_between(date_from, date_to):
+    day = date_from
+    while day <= date_to:
+        yield day
+        day += timedelta(days=1)
+
+
+def free_intervals(busy, window_start, window_end):
+    """
+    Barrido sobre intervalos ordenados: devuelve los huecos libres de
+    [window_start, window_end) que no cubre ningún intervalo ocupado.
+    """
+    free = []
+    cursor = window_start
+    for start, end in sorted(busy):
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            free.append((cursor, start))
+        cursor = max(cursor, end)
+        if cursor >= window_end:
+            break
+    if cursor < window_end:
+        free.append((cursor, window_end))
+    return free
+
+
+def busy_intervals(room_id, date_from, date_to):
+    """
+    Intervalos ocupados de una sala agrupados por día, usando el cache por sala-día.
+    Los días que no están en cache se resuelven con una sola consulta de rango.
+    """
+    from application.models import Reservation
+
+    days = list(days_between(date_from, date_to))
+    keys = {room_day_cache_key(room_id, day): day for day in days}
+    cached = cache.get_many(keys.keys())
+    result = {keys[key]: value for key, value in cached.items()}
+
+    missing = [day for day in days if day not in result]
+    if missing:
+        range_start = day_bounds(missing[0])[0]
+        range_end = day_bounds(missing[-1])[1]
+        # Usa el índice GiST de la restricción de exclusión (room, period)
+        rows = Reservation.objects.filter(
+            room_id=room_id,
+            period__overlap=DateTimeTZRange(range_start, range_end, '[)'),
+        ).values_list('start_time', 'end_time')
+
+        fetched = {day: [] for day in missing}
+        for start, end in rows:
+            first_day = max(timezone.localtime(start).date(), missing[0])
+            last_day = min(timezone.localtime(end).date(), missing[-1])
+            for day in days_between(first_day, last_day):
+                if day not in fetched:
+                    continue
+                day_start, day_end = day_bounds(day)
+                if start < day_end and end > day_start:
+                    fetched[day].append((max(start, day_start), min(end, day_end)))
+
+        cache.set_many(
+            {room_day_cache_key(room_id, day): intervals for day, intervals in fetched.items()},
+            settings.AVAILABILITY_CACHE_TIMEOUT,
+        )
+        result.update(fetched)
+
+    return result
+
+
+def room_availability(room_id, date_from, date_to, global_settings):
+    """
+    Intervalos libres de una sala por día, limitados al horario de GlobalSettings.
+    """
+    busy = busy_intervals(room_id, date_from, date_to)
+    days = []
+    for day in days_between(date_from, date_to):
+        opening = timezone.make_aware(datetime.combine(day, global_settings.available_hours_start))
+        closing = timezone.make_aware(datetime.combine(day, global_settings.available_hours_end))
+        days.append({
+            'date': day,
+            'free': [
+                {'start': start, 'end': end}
+                for start, end in free_intervals(busy[day], opening, closing)
+            ],
+        })
+    return {'room': room_id, 'days': days}
+
+
+def invalidate_room_days(room_id, start_time, end_time):
+    """
+    Elimina del cache los días de la sala que toca el intervalo indicado.
+    """
+    if start_time is None or end_time is None:
+        return
+    current_tz = timezone.get_current_timezone()
+    first_day = timezone.localtime(start_time, current_tz).date()
+    last_day = timezone.localtime(end_time, current_tz).date()
+    cache.delete_many([room_day_cache_key(room_id, day) for day in days_between(first_day, last_day)])
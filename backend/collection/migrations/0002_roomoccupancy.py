@@ -0,0 +1,103 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:00
+
+from datetime import datetime, timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Copia de collection.occupancy al momento de esta migración: el módulo puede cambiar
+# después y la migración debe seguir produciendo las mismas máscaras. Sólo el largo
+# del bloque se lee de la configuración, porque tiene que coincidir con el del servidor.
+
+def day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return start, start + timedelta(days=1)
+
+
+def days_between(date_from, date_to):
+    day = date_from
+    while day <= date_to:
+        yield day
+        day += timedelta(days=1)
+
+
+def _ceil_div(delta, slot):
+    return -(-delta // slot)
+
+
+def _bit_range(first, stop):
+    if stop <= first:
+        return 0
+    return ((1 << stop) - 1) ^ ((1 << first) - 1)
+
+
+def day_masks(start_time, end_time, slot):
+    current_tz = timezone.get_current_timezone()
+    first_day = timezone.localtime(start_time, current_tz).date()
+    last_day = timezone.localtime(end_time, current_tz).date()
+    masks = {}
+    for day in days_between(first_day, last_day):
+        day_start, day_end = day_bounds(day)
+        start, end = max(start_time, day_start), min(end_time, day_end)
+        if start >= end:
+            continue
+        touched = _bit_range((start - day_start) // slot, _ceil_div(end - day_start, slot))
+        full = _bit_range(_ceil_div(start - day_start, slot), (end - day_start) // slot)
+        masks[day] = (full, touched)
+    return masks
+
+
+def merge_masks(intervals, slot):
+    merged = {}
+    for start_time, end_time in intervals:
+        for day, (full, touched) in day_masks(start_time, end_time, slot).items():
+            current_full, current_touched = merged.get(day, (0, 0))
+            merged[day] = (current_full | full, current_touched | touched)
+    return merged
+
+
+def populate_occupancy(apps, schema_editor):
+    # Sólo hacen falta los días desde hoy (los bitmaps se usan para reservar), pero
+    # completos: se incluyen las reservas que terminaron o siguen en curso hoy
+    Reservation = apps.get_model('application', 'Reservation')
+    RoomOccupancy = apps.get_model('collection', 'RoomOccupancy')
+    slot = timedelta(minutes=settings.OCCUPANCY_SLOT_MINUTES)
+    today_start = day_bounds(timezone.localdate())[0]
+    intervals = {}
+    rows = Reservation.objects.filter(end_time__gt=today_start).values_list('room_id', 'start_time', 'end_time')
+    for room_id, start_time, end_time in rows.iterator(chunk_size=1000):
+        intervals.setdefault(room_id, []).append((start_time, end_time))
+    RoomOccupancy.objects.bulk_create([
+        RoomOccupancy(room_id=room_id, day=day, full=full, touched=touched)
+        for room_id, room_intervals in intervals.items()
+        for day, (full, touched) in merge_masks(room_intervals, slot).items()
+        if day >= today_start.date()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('application', '0012_archived_reservations'),
+        ('collection', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('full', models.BigIntegerField(default=0)),
+                ('touched', models.BigIntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='collection.room')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room', 'day'), name='room_occupancy_unique')],
+            },
+        ),
+        migrations.RunPython(populate_occupancy, migrations.RunPython.noop),
+    ]
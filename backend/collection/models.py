@@ -22,3 +22,23 @@ class Room(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class RoomOccupancy(models.Model):
+    """
+    Bitmap de ocupación de una sala en un día (hora local), en bloques de
+    OCCUPANCY_SLOT_MINUTES: `touched` marca los bloques que toca alguna reserva y
+    `full` los que alguna reserva cubre por completo. Se deriva de Reservation.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='occupancy')
+    day = models.DateField()
+    full = models.BigIntegerField(default=0)
+    touched = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'day'], name='room_occupancy_unique'),
+        ]
+
+    def __str__(self):
+        return f"Ocupación de {self.room_id} el {self.day}"
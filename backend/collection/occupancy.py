@@ -0,0 +1,252 @@
+# collection/occupancy.py
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import F, Value
+from django.utils import timezone
+
+from .availability import day_bounds, days_between
+
+# Las máscaras se guardan en un bigint: a lo más 63 bloques por día (25 horas en un cambio de horario)
+MAX_SLOTS_PER_DAY = 63
+
+
+def slot_length():
+    slot = timedelta(minutes=settings.OCCUPANCY_SLOT_MINUTES)
+    if timedelta(hours=25) // slot > MAX_SLOTS_PER_DAY:
+        raise ImproperlyConfigured("OCCUPANCY_SLOT_MINUTES debe ser de al menos 24 minutos.")
+    return slot
+
+
+def _ceil_div(delta, slot):
+    return -(-delta // slot)
+
+
+def _bit_range(first, stop):
+    # Bits first..stop-1 encendidos
+    if stop <= first:
+        return 0
+    return ((1 << stop) - 1) ^ ((1 << first) - 1)
+
+
+def day_masks(start_time, end_time, slot=None):
+    """
+    Máscaras por día (hora local) de un intervalo: `touched` marca los bloques que el
+    intervalo toca y `full` los que cubre por completo.
+    """
+    slot = slot or slot_length()
+    current_tz = timezone.get_current_timezone()
+    first_day = timezone.localtime(start_time, current_tz).date()
+    last_day = timezone.localtime(end_time, current_tz).date()
+    masks = {}
+    for day in days_between(first_day, last_day):
+        day_start, day_end = day_bounds(day)
+        start, end = max(start_time, day_start), min(end_time, day_end)
+        if start >= end:
+            continue
+        touched = _bit_range((start - day_start) // slot, _ceil_div(end - day_start, slot))
+        full = _bit_range(_ceil_div(start - day_start, slot), (end - day_start) // slot)
+        masks[day] = (full, touched)
+    return masks
+
+
+def merge_masks(intervals, slot=None):
+    """
+    Une (OR) las máscaras de varios intervalos: {día: (full, touched)}.
+    """
+    merged = {}
+    for start_time, end_time in intervals:
+        for day, (full, touched) in day_masks(start_time, end_time, slot).items():
+            current_full, current_touched = merged.get(day, (0, 0))
+            merged[day] = (current_full | full, current_touched | touched)
+    return merged
+
+
+def _ensure_rows(room_id, days):
+    from .models import RoomOccupancy
+
+    # INSERT ... ON CONFLICT DO NOTHING: seguro aunque dos reservas creen la fila a la vez
+    RoomOccupancy.objects.bulk_create(
+        [RoomOccupancy(room_id=room_id, day=day) for day in days],
+        ignore_conflicts=True,
+    )
+
+
+def mark_occupied(room_id, intervals):
+    """
+    Enciende los bloques de los intervalos con un UPDATE (full | m, touched | m) por día.
+    Debe llamarse dentro de la transacción que crea las reservas.
+    """
+    from .models import RoomOccupancy
+
+    merged = merge_masks(intervals)
+    if not merged:
+        return
+    _ensure_rows(room_id, merged)
+    for day, (full, touched) in merged.items():
+        RoomOccupancy.objects.filter(room_id=room_id, day=day).update(
+            full=F('full').bitor(Value(full)),
+            touched=F('touched').bitor(Value(touched)),
+        )
+
+
+def compute_days(room_id, days):
+    """
+    Máscaras de los días indicados calculadas desde Reservation (la fuente de verdad).
+    """
+    from application.models import Reservation
+
+    days = sorted(days)
+    if not days:
+        return {}
+    range_start, range_end = day_bounds(days[0])[0], day_bounds(days[-1])[1]
+    intervals = Reservation.objects.filter(
+        room_id=room_id,
+        period__overlap=DateTimeTZRange(range_start, range_end, '[)'),
+    ).values_list('start_time', 'end_time')
+    merged = merge_masks(intervals)
+    return {day: merged.get(day, (0, 0)) for day in days}
+
+
+def rebuild_days(room_id, days, create_missing=True):
+    """
+    Recalcula los días indicados. Una reserva eliminada no se puede "apagar" con una
+    operación de bits (otro intervalo puede compartir el bloque), así que se recalcula.
+    Las filas se bloquean antes de leer las reservas para no pisar un mark_occupied concurrente.
+
+    Al borrar sólo se apagan bits: con `create_missing=False` se actualizan únicamente
+    las filas que ya existen.
+    """
+    from .models import RoomOccupancy
+
+    days = set(days)
+    if not days:
+        return
+    if create_missing:
+        _ensure_rows(room_id, days)
+    rows = list(RoomOccupancy.objects.select_for_update().filter(room_id=room_id, day__in=days))
+    computed = compute_days(room_id, days)
+    for row in rows:
+        row.full, row.touched = computed[row.day]
+    RoomOccupancy.objects.bulk_update(rows, ['full', 'touched'])
+
+
+def check_slot(room_id, start_time, end_time):
+    """
+    True si la sala está libre, False si está ocupada y None si sólo la reserva decide
+    (el intervalo cae en bloques ocupados parcialmente).
+    """
+    from .models import RoomOccupancy
+
+    masks = day_masks(start_time, end_time)
+    rows = {
+        day: (full, touched)
+        for day, full, touched in RoomOccupancy.objects.filter(
+            room_id=room_id, day__in=masks,
+        ).values_list('day', 'full', 'touched')
+    }
+    free = True
+    for day, (_, requested) in masks.items():
+        full, touched = rows.get(day, (0, 0))
+        if full & requested:
+            return False
+        if touched & requested:
+            free = None
+    return free
+
+
+def is_room_free(room_id, start_time, end_time):
+    """
+    Comprobación de disponibilidad con el bitmap; sólo consulta Reservation en el caso dudoso.
+    """
+    from application.models import Reservation
+
+    free = check_slot(room_id, start_time, end_time)
+    if free is None:
+        free = not Reservation.objects.filter(
+            room_id=room_id,
+            period__overlap=DateTimeTZRange(start_time, end_time, '[)'),
+        ).exists()
+    return free
+
+
+def _window_mask(day, opening, closing, slot):
+    # Bloques completos dentro del horario disponible
+    day_start = day_bounds(day)[0]
+    opening = timezone.make_aware(datetime.combine(day, opening))
+    closing = timezone.make_aware(datetime.combine(day, closing))
+    return _bit_range(_ceil_div(opening - day_start, slot), (closing - day_start) // slot)
+
+
+def free_slots(day, touched, global_settings, slot=None):
+    """
+    Tramos libres del día (bloques consecutivos sin ocupar dentro del horario).
+    """
+    slot = slot or slot_length()
+    day_start = day_bounds(day)[0]
+    free = ~touched & _window_mask(day, global_settings.available_hours_start,
+                                   global_settings.available_hours_end, slot)
+    intervals = []
+    while free:
+        first = (free & -free).bit_length() - 1
+        run = free >> first
+        length = (run ^ (run + 1)).bit_length() - 1
+        intervals.append((day_start + first * slot, day_start + (first + length) * slot))
+        free &= ~_bit_range(first, first + length)
+    return intervals
+
+
+def rooms_free_slots(room_ids, date_from, date_to, global_settings):
+    """
+    Tramos libres de varias salas en un rango de días, con una sola consulta.
+    """
+    from .models import RoomOccupancy
+
+    slot = slot_length()
+    rows = {
+        (room_id, day): touched
+        for room_id, day, touched in RoomOccupancy.objects.filter(
+            room_id__in=room_ids, day__range=(date_from, date_to),
+        ).values_list('room_id', 'day', 'touched')
+    }
+    return [
+        {
+            'room': room_id,
+            'days': [
+                {
+                    'date': day,
+                    'free': [
+                        {'start': start, 'end': end}
+                        for start, end in free_slots(day, rows.get((room_id, day), 0), global_settings, slot)
+                    ],
+                }
+                for day in days_between(date_from, date_to)
+            ],
+        }
+        for room_id in room_ids
+    ]
+
+
+def find_inconsistencies(room_ids, date_from, date_to):
+    """
+    Días cuyo bitmap no coincide con las reservas: [(room_id, día, guardado, esperado)].
+    """
+    from .models import RoomOccupancy
+
+    days = list(days_between(date_from, date_to))
+    stored = {
+        (room_id, day): (full, touched)
+        for room_id, day, full, touched in RoomOccupancy.objects.filter(
+            room_id__in=room_ids, day__range=(date_from, date_to),
+        ).values_list('room_id', 'day', 'full', 'touched')
+    }
+    mismatches = []
+    for room_id in room_ids:
+        for day, expected in compute_days(room_id, days).items():
+            current = stored.get((room_id, day), (0, 0))
+            if current != expected:
+                mismatches.append((room_id, day, current, expected))
+    return mismatches
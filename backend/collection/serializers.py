@@ -12,3 +12,18 @@ class RoomSerializer(serializers.ModelSerializer):
     class Meta:
         model = Room
         fields = '__all__'
+
+
+class FreeIntervalSerializer(serializers.Serializer):
+    start = serializers.DateTimeField()
+    end = serializers.DateTimeField()
+
+
+class DayAvailabilitySerializer(serializers.Serializer):
+    date = serializers.DateField()
+    free = FreeIntervalSerializer(many=True)
+
+
+class RoomAvailabilitySerializer(serializers.Serializer):
+    room = serializers.IntegerField()
+    days = DayAvailabilitySerializer(many=True)
@@ -0,0 +1,17 @@
+# collection/signals.py
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from backend.versioning import bump_versions
+from .models import Instrument, Room
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+@receiver(post_save, sender=Instrument)
+@receiver(post_delete, sender=Instrument)
+@receiver(m2m_changed, sender=Room.instruments.through)
+def bump_catalog_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_versions('catalog:rooms'))
@@ -1,3 +1,119 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from application.models import Band, Reservation, User
+from .availability import parse_availability_range
+from .models import Instrument, Room, RoomOccupancy
+from .occupancy import check_slot, find_inconsistencies, is_room_free
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Listar salas no debe ejecutar una consulta de instrumentos por sala.
+    """
+    BUDGETS = {
+        'room-list': 2,
+        'instrument-list': 1,
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='owner', password='secret123', ruf='1-9'))
+        self.seeded = 0
+
+    def seed(self, count):
+        for i in range(self.seeded, self.seeded + count):
+            room = Room.objects.create(name=f'Sala {i}', capacity=10)
+            room.instruments.add(
+                Instrument.objects.create(name=f'Guitarra {i}'),
+                Instrument.objects.create(name=f'Batería {i}'),
+            )
+        self.seeded += count
+
+    def count_queries(self):
+        counts = {}
+        for name in self.BUDGETS:
+            # Partir siempre del cache vacío: los caches no deben ocultar consultas en la medición
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200, name)
+            counts[name] = len(context)
+        return counts
+
+    def test_query_budget_does_not_grow_with_rows(self):
+        self.seed(2)
+        small = self.count_queries()
+        self.seed(10)
+        large = self.count_queries()
+
+        for name, budget in self.BUDGETS.items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(small[name], large[name])
+                self.assertLessEqual(large[name], budget)
+
+
+class OccupancyBitmapTests(TestCase):
+    """
+    El bitmap debe seguir a Reservation en altas, cambios y bajas.
+    """
+
+    def setUp(self):
+        self.room = Room.objects.create(name='Sala 1', capacity=10)
+        self.band = Band.objects.create(name='Banda', is_approved=True)
+        self.base = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=1)
+
+    def reserve(self, start, end):
+        return Reservation.objects.create(band=self.band, room=self.room,
+                                          start_time=self.base + start, end_time=self.base + end)
+
+    def assertConsistent(self):
+        day = self.base.date()
+        self.assertEqual(find_inconsistencies([self.room.pk], day, day), [])
+
+    def test_aligned_slots_are_decided_by_the_bitmap(self):
+        self.reserve(timedelta(0), timedelta(hours=1))
+        self.assertIs(check_slot(self.room.pk, self.base, self.base + timedelta(minutes=30)), False)
+        self.assertIs(check_slot(self.room.pk, self.base + timedelta(hours=1), self.base + timedelta(hours=2)), True)
+        self.assertConsistent()
+
+    def test_partial_slots_fall_back_to_the_reservations(self):
+        self.reserve(timedelta(minutes=10), timedelta(minutes=20))
+        start, end = self.base + timedelta(minutes=20), self.base + timedelta(minutes=30)
+        self.assertIsNone(check_slot(self.room.pk, start, end))
+        self.assertTrue(is_room_free(self.room.pk, start, end))
+
+    def test_moves_and_deletes_clear_the_bitmap(self):
+        reservation = self.reserve(timedelta(0), timedelta(hours=1))
+        reservation.start_time += timedelta(hours=2)
+        reservation.end_time += timedelta(hours=2)
+        reservation.save()
+        self.assertIs(check_slot(self.room.pk, self.base, self.base + timedelta(hours=1)), True)
+        self.assertConsistent()
+
+        reservation.delete()
+        self.assertIs(check_slot(self.room.pk, self.base, self.base + timedelta(hours=4)), True)
+        self.assertConsistent()
+
+    def test_deleting_a_room_with_reservations(self):
+        self.reserve(timedelta(0), timedelta(hours=1))
+        self.room.delete()
+        # Las claves foráneas son diferidas: comprobarlas como lo haría el commit
+        connection.check_constraints()
+        self.assertFalse(RoomOccupancy.objects.exists())
+
+
+class AvailabilityRangeTests(SimpleTestCase):
+
+    def test_invalid_dates_are_a_validation_error(self):
+        for params in ({'from': '2026-02-30'}, {'from': '2026-02-01', 'to': '2026-13-01'}, {'from': 'mañana'}):
+            with self.assertRaises(ValidationError):
+                parse_availability_range(params)
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import InstrumentViewSet, RoomViewSet
 
 router = DefaultRouter()
@@ -8,4 +9,9 @@ router.register(r'rooms', RoomViewSet, basename='room')
 
 urlpatterns = [
     path('', include(router.urls)),
+
+    # Lecturas asíncronas (servir con un servidor ASGI)
+    path('async/rooms/', async_views.room_list, name='async-room-list'),
+    path('async/rooms/availability/', async_views.room_availability_list, name='async-room-availability-list'),
+    path('async/rooms/<int:pk>/availability/', async_views.room_availability_list, name='async-room-availability'),
 ]
@@ -1,8 +1,15 @@
 # collection/views.py
 
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from application.authentication import CALENDAR_AUTHENTICATION
+from backend.versioning import ConditionalGetMixin, conditional_get
+from .availability import parse_availability_range, parse_room_ids, room_availability
+from .occupancy import rooms_free_slots
 from .models import Instrument, Room
-from .serializers import InstrumentSerializer, RoomSerializer
+from .serializers import InstrumentSerializer, RoomSerializer, RoomAvailabilitySerializer
 from rest_framework.permissions import IsAuthenticated
 
 class InstrumentViewSet(viewsets.ModelViewSet):
@@ -10,7 +17,73 @@ class InstrumentViewSet(viewsets.ModelViewSet):
     serializer_class = InstrumentSerializer
     permission_classes = [IsAuthenticated]
 
-class RoomViewSet(viewsets.ModelViewSet):
-    queryset = Room.objects.all()
+class RoomViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Room.objects.prefetch_related('instruments')
     serializer_class = RoomSerializer
     permission_classes = [IsAuthenticated]
+
+    def get_version_names(self):
+        return ['catalog:rooms']
+
+    @action(detail=True, methods=['get'], url_path='calendar.ics', authentication_classes=CALENDAR_AUTHENTICATION)
+    def calendar(self, request, pk=None):
+        """
+        Calendario iCalendar con las reservas de la sala. Los clientes de calendario se
+        suscriben con `?token=` (ver application.views.CalendarFeedView).
+        """
+        from application.ical import calendar_response, window_start
+
+        def build():
+            room = self.get_object()
+            return calendar_response({'room': room}, f"Reservas de {room.name}", f"sala-{room.pk}.ics")
+
+        return conditional_get(request, [f'calendar:room:{pk}', 'catalog:rooms', 'catalog:bands'], build,
+                               extra=window_start().isoformat())
+
+    def _global_settings(self):
+        from composer.cache import get_global_settings
+        global_settings = get_global_settings()
+        if not global_settings:
+            raise ValidationError("Configuraciones globales no definidas.")
+        return global_settings
+
+    @action(detail=True, methods=['get'])
+    def availability(self, request, pk=None):
+        """
+        Intervalos libres de la sala entre `from` y `to`, dentro del horario disponible.
+        """
+        room = self.get_object()
+        date_from, date_to = parse_availability_range(request.query_params)
+        data = room_availability(room.id, date_from, date_to, self._global_settings())
+        return Response(RoomAvailabilitySerializer(data).data)
+
+    @action(detail=False, methods=['get'], url_path='availability')
+    def availability_list(self, request):
+        """
+        Disponibilidad de varias salas (`rooms=1,2,3`) o de todas si no se indica.
+        """
+        date_from, date_to = parse_availability_range(request.query_params)
+        rooms = self.get_queryset()
+        room_ids = parse_room_ids(request.query_params)
+        if room_ids is not None:
+            rooms = rooms.filter(id__in=room_ids)
+        global_settings = self._global_settings()
+        data = [
+            room_availability(room_id, date_from, date_to, global_settings)
+            for room_id in rooms.values_list('id', flat=True)
+        ]
+        return Response(RoomAvailabilitySerializer(data, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def slots(self, request):
+        """
+        Tramos libres en bloques de OCCUPANCY_SLOT_MINUTES de varias salas (`rooms=1,2,3`),
+        calculados sobre el bitmap de ocupación con una sola consulta.
+        """
+        date_from, date_to = parse_availability_range(request.query_params)
+        rooms = self.get_queryset()
+        room_ids = parse_room_ids(request.query_params)
+        if room_ids is not None:
+            rooms = rooms.filter(id__in=room_ids)
+        data = rooms_free_slots(list(rooms.values_list('id', flat=True)), date_from, date_to, self._global_settings())
+        return Response(RoomAvailabilitySerializer(data, many=True).data)
@@ -0,0 +1,58 @@
+# composer/cache.py
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import GlobalSettings
+
+VERSION_CACHE_KEY = 'composer:global_settings:version'
+
+_lock = threading.Lock()
+_state = {
+    'settings': None,
+    'version': None,
+    'checked_at': None,
+}
+
+
+def get_global_settings():
+    """
+    Devuelve la fila de GlobalSettings cargada una vez por proceso.
+
+    La copia local se revalida contra la versión guardada en el cache de Django
+    como máximo cada GLOBAL_SETTINGS_MAX_STALENESS segundos; sólo se vuelve a
+    consultar la base de datos cuando esa versión cambia. La versión debe estar en un
+    cache compartido para que la invalidación llegue a los demás workers: con un
+    cache por proceso y varios workers el backend no inicia (backend/checks.py).
+    """
+    now = time.monotonic()
+    checked_at = _state['checked_at']
+    if checked_at is not None and now - checked_at < settings.GLOBAL_SETTINGS_MAX_STALENESS:
+        return _state['settings']
+
+    with _lock:
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            version = uuid.uuid4().hex
+            # Si otro worker ya publicó una versión, respetar la suya
+            if not cache.add(VERSION_CACHE_KEY, version, None):
+                version = cache.get(VERSION_CACHE_KEY, version)
+
+        if _state['checked_at'] is None or version != _state['version']:
+            _state['settings'] = GlobalSettings.objects.first()
+            _state['version'] = version
+        _state['checked_at'] = now
+        return _state['settings']
+
+
+def invalidate_global_settings():
+    """
+    Publica una nueva versión para que todos los workers recarguen la configuración.
+    """
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+    with _lock:
+        _state['checked_at'] = None
@@ -0,0 +1,14 @@
+# composer/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_global_settings
+from .models import GlobalSettings
+
+
+@receiver(post_save, sender=GlobalSettings)
+@receiver(post_delete, sender=GlobalSettings)
+def global_settings_changed(sender, **kwargs):
+    transaction.on_commit(invalidate_global_settings)
@@ -1,3 +1,57 @@
-from django.test import TestCase
+import uuid
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from . import cache as settings_cache
+from .cache import VERSION_CACHE_KEY, get_global_settings
+from .models import GlobalSettings
+
+
+@override_settings(GLOBAL_SETTINGS_MAX_STALENESS=5)
+class GlobalSettingsCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        settings_cache._state.update(settings=None, version=None, checked_at=None)
+        self.addCleanup(settings_cache._state.update, settings=None, version=None, checked_at=None)
+        self.row = GlobalSettings.objects.create(max_reservations_per_band_week=2)
+        self.clock = mock.patch('composer.cache.time.monotonic', return_value=1000.0).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_first_call_loads_the_row_and_publishes_a_version(self):
+        with self.assertNumQueries(1):
+            loaded = get_global_settings()
+
+        self.assertEqual(loaded.max_reservations_per_band_week, 2)
+        self.assertIsNotNone(cache.get(VERSION_CACHE_KEY))
+
+    def test_copy_is_reused_within_the_staleness_window(self):
+        get_global_settings()
+        # Un cambio publicado por otro proceso no se ve hasta que vence la ventana
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        self.clock.return_value += 4
+
+        with self.assertNumQueries(0):
+            loaded = get_global_settings()
+        self.assertEqual(loaded.max_reservations_per_band_week, 2)
+
+    def test_unchanged_version_is_revalidated_without_querying(self):
+        get_global_settings()
+        self.clock.return_value += 6
+
+        with self.assertNumQueries(0):
+            get_global_settings()
+
+    def test_version_bumped_by_another_process_reloads_the_row(self):
+        get_global_settings()
+        # Otro worker guarda la fila y publica una versión nueva; este proceso no
+        # recibe la señal, sólo ve el cache compartido
+        GlobalSettings.objects.filter(pk=self.row.pk).update(max_reservations_per_band_week=5)
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        self.clock.return_value += 6
+
+        with self.assertNumQueries(1):
+            loaded = get_global_settings()
+        self.assertEqual(loaded.max_reservations_per_band_week, 5)
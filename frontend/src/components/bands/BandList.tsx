@@ -16,7 +16,7 @@ const BandList: React.FC = () => {
     const fetchBands = async () => {
       try {
         const response = await axiosInstance.get('/api/application/bands/');
-        setBands(response.data);
+        setBands(response.data.results);
       } catch (err: any) {
         setError('Error al cargar las bandas.');
       } finally {
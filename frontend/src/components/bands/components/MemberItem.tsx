@@ -23,7 +23,7 @@ const MemberItem: React.FC<MemberItemProps> = ({ member, bandId, onRemove }) =>
         try {
             // Obtener el BandMember ID asociado
             const response = await axiosInstance.get(`/api/application/band-members/?band=${bandId}&user=${member.id}`);
-            const bandMember = response.data[0]; // Asumiendo que existe un único bandMember
+            const bandMember = response.data.results[0]; // Asumiendo que existe un único bandMember
             if (bandMember) {
                 await axiosInstance.delete(`/api/application/band-members/${bandMember.id}/`);
                 if (onRemove) {
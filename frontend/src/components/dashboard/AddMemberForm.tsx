@@ -32,7 +32,7 @@ export default function AddMemberForm({ bandId, refreshMembers }: AddMemberFormP
                     'X-CSRFToken': getCSRFToken(),
                 },
             });
-            const foundUsers: User[] = response.data;
+            const foundUsers: User[] = response.data.results;
 
             if (foundUsers.length === 0) {
                 toast.error('No se encontró ningún usuario con ese RUT.');
@@ -40,7 +40,7 @@ const BandSearch: React.FC<BandSearchProps> = ({ onJoin }) => {
             setLoading(true);
             setError(null);
             const response = await axiosInstance.get(`/api/application/bands/?search=${encodeURIComponent(searchTerm)}`);
-            setBands(response.data);
+            setBands(response.data.results);
         } catch (err: any) {
             setError('Error al buscar bandas.');
         } finally {
@@ -24,7 +24,7 @@ export default function MembersList({ bandId, refreshMembers }: MembersListProps
         setIsLoading(true);
         try {
             const response = await axiosInstance.get(`/api/application/band-members/?band=${bandId}`);
-            setMembers(response.data);
+            setMembers(response.data.results);
         } catch (error: any) {
             console.error('Error al obtener los miembros:', error);
             toast.error('Error al obtener los miembros de la banda.');
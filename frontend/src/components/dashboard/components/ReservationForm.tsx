@@ -29,7 +29,7 @@ const ReservationForm: React.FC = () => {
                     {
 
                     });
-                setRooms(response.data);
+                setRooms(response.data.results);
             } catch (err: any) {
                 setError('Error al cargar las salas disponibles.');
             }